@@ -0,0 +1,250 @@
+import os
+import json
+import uuid
+import argparse
+import filecmp
+import tempfile
+import contextlib
+
+# Batch journals are named <prefix><pid>.<uuid><suffix> next to the first staged file, so batches never share one
+JOURNAL_PREFIX = ".atomic_batch."
+JOURNAL_SUFFIX = ".journal"
+# Per-directory lock held while a journal is live and while leftover journals are recovered
+LOCK_NAME = ".atomic_batch.lock"
+
+def _fsync_dir(directory):
+    """Flushes a directory entry (the rename) to disk. Not supported on Windows, where it is skipped."""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_temp(path, content, encoding=None, newline=None):
+    """
+    Writes content to a fsynced temp file in path's directory and returns its path.
+    content is str or bytes, or an iterable of str or bytes chunks (e.g. a line generator),
+    which is written as it is produced. The temp file takes over the permissions of an existing target.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        try:
+            chunks = iter([content] if isinstance(content, (str, bytes)) else content)
+            # The first chunk decides between binary and text mode
+            first = next(chunks, b'')
+            f = os.fdopen(fd, 'wb') if isinstance(first, bytes) else os.fdopen(fd, 'w', encoding=encoding, newline=newline)
+        except BaseException:
+            os.close(fd)
+            raise
+        with f:
+            f.write(first)
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return tmp_path
+
+def atomic_write(path, content, encoding=None, newline=None):
+    """
+    Replaces path with content so readers (and a crash) only ever see the old or the new file:
+    temp file in the same directory, fsync, os.replace, then fsync of the directory.
+    """
+    tmp_path = write_temp(path, content, encoding, newline)
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+def write_if_changed(path, content, encoding=None, newline=None):
+    """
+    atomic_write, skipped when path already holds exactly this content, so unchanged outputs
+    keep their mtime. content may be a chunk generator (see write_temp). Returns True if the file was written.
+    """
+    tmp_path = write_temp(path, content, encoding, newline)
+    if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+    return True
+
+def journal_name():
+    return f"{JOURNAL_PREFIX}{os.getpid()}.{uuid.uuid4().hex}{JOURNAL_SUFFIX}"
+
+@contextlib.contextmanager
+def directory_lock(directory):
+    """Exclusive lock on the batch journals of a directory (flock on POSIX, msvcrt.locking on Windows)."""
+    fd = os.open(os.path.join(directory or ".", LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.name == 'posix':
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if os.name != 'posix':
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        # Closing the descriptor also drops the flock
+        os.close(fd)
+
+def recover_journal(journal_path):
+    """
+    Finishes a batch that was interrupted after its commit point: every temp file listed in the
+    journal that still exists is moved over its target. Returns the number of files recovered.
+    """
+    if not os.path.exists(journal_path):
+        return 0
+    try:
+        with open(journal_path, 'r') as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        # A journal that isn't complete was never committed; nothing was replaced yet
+        print(f"Discarding incomplete batch journal {journal_path}: {e}")
+        os.remove(journal_path)
+        return 0
+
+    recovered = 0
+    for tmp_path, path in entries:
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, path)
+            recovered += 1
+    os.remove(journal_path)
+    print(f"Recovered {recovered} file(s) from interrupted batch {journal_path}")
+    return recovered
+
+def recover_journals(root=".", recursive=False):
+    """
+    Rolls forward every batch journal left behind by an interrupted commit in root (and below it
+    with recursive). Each directory is scanned under its lock, and a committing batch holds
+    that lock while its journal exists, so a live journal is never touched.
+    Returns the number of files recovered.
+    """
+    directories = [dirpath for dirpath, _, _ in os.walk(root)] if recursive else [root]
+    recovered = 0
+    for directory in directories:
+        try:
+            names = os.listdir(directory or ".")
+        except OSError:
+            continue
+        if not any(n.startswith(JOURNAL_PREFIX) and n.endswith(JOURNAL_SUFFIX) for n in names):
+            continue
+        with directory_lock(directory):
+            # Listed again under the lock; a batch may have finished in between
+            for name in sorted(os.listdir(directory or ".")):
+                if name.startswith(JOURNAL_PREFIX) and name.endswith(JOURNAL_SUFFIX):
+                    recovered += recover_journal(os.path.join(directory, name))
+    return recovered
+
+def recover_journals_for(paths):
+    """
+    recover_journals for the directory of every path a batch is about to stage. A batch's journal
+    lands next to whichever file it stages first, so each of those directories has to be checked.
+    """
+    recovered = 0
+    for directory in sorted({os.path.dirname(os.path.abspath(path)) for path in paths}):
+        recovered += recover_journals(directory)
+    return recovered
+
+class WriteBatch:
+    """
+    All-or-nothing multi-file write.
+    stage() writes each new file to a fsynced temp file next to its target. commit() takes the
+    directory lock, writes a journal with a unique name listing the (temp, target) pairs (the
+    commit point), renames every temp file over its target and deletes the journal. A crash
+    before the journal exists leaves all targets untouched; a crash after it is rolled forward
+    by recover_journals, which callers run explicitly (or: python atomic_write.py DIR).
+    Used as a context manager, the batch commits on success and is discarded on an exception.
+    """
+
+    def __init__(self, journal_path=None):
+        self.journal_path = journal_path
+        self.staged = [] # (tmp_path, target_path)
+
+    def stage(self, path, content, encoding=None, newline=None, skip_unchanged=False):
+        """
+        Stages the new content of path (str, bytes or a chunk generator, see write_temp).
+        Staging a path again replaces its earlier content. With skip_unchanged, content equal
+        to the current file is dropped instead. Returns True if the path was staged.
+        """
+        tmp_path = write_temp(path, content, encoding, newline)
+        if skip_unchanged and os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+            return False
+        self.adopt(path, tmp_path)
+        return True
+
+    def adopt(self, path, tmp_path):
+        """Stages a temp file already written with write_temp (e.g. by a worker process) for path."""
+        path = os.path.abspath(path)
+        if self.journal_path is None:
+            self.journal_path = os.path.join(os.path.dirname(path), journal_name())
+        for i, (old_tmp_path, target) in enumerate(self.staged):
+            if target == path:
+                os.remove(old_tmp_path)
+                del self.staged[i]
+                break
+        self.staged.append((tmp_path, path))
+
+    def commit(self):
+        """Atomically applies every staged file. Returns the list of paths written."""
+        if not self.staged:
+            return []
+        if len(self.staged) == 1:
+            # A single rename is already atomic; no journal needed
+            tmp_path, path = self.staged[0]
+            os.replace(tmp_path, path)
+            _fsync_dir(os.path.dirname(path))
+        else:
+            with directory_lock(os.path.dirname(self.journal_path)):
+                atomic_write(self.journal_path, json.dumps(self.staged))
+                for tmp_path, path in self.staged:
+                    os.replace(tmp_path, path)
+                for directory in {os.path.dirname(path) for _, path in self.staged}:
+                    _fsync_dir(directory)
+                os.remove(self.journal_path)
+        written = [path for _, path in self.staged]
+        self.staged = []
+        return written
+
+    def abort(self):
+        """Drops every staged temp file; no target is touched."""
+        for tmp_path, _ in self.staged:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        self.staged = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Finish WriteBatch commits that were interrupted (e.g. by a crash) by rolling their journals forward.")
+    parser.add_argument("directories", nargs='*', default=["."], help="Directories to scan recursively for leftover batch journals")
+    args = parser.parse_args()
+    total = sum(recover_journals(directory, recursive=True) for directory in args.directories)
+    print(f"Recovered {total} file(s).")
+
+if __name__ == "__main__":
+    main()
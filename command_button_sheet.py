@@ -0,0 +1,206 @@
+import os
+import argparse
+from PIL import Image, ImageDraw, ImageFont
+
+from mapped_image_index import MappedImageIndex
+from wnd_to_svg import scan_textures, crop_mapped_image, find_texture_path
+
+def parse_command_buttons(filepath):
+    """
+    Parses CommandButton.ini and returns an ordered dict of CommandButton name -> ButtonImage.
+    Buttons without a ButtonImage map to None. When a block repeats ButtonImage, the last one wins.
+    """
+    buttons = {}
+    current = None
+
+    with open(filepath, 'r', errors='ignore') as f:
+        for line in f:
+            stripped = line.split(';', 1)[0].strip()
+            if not stripped:
+                continue
+            lowered = stripped.lower()
+
+            if lowered.startswith('commandbutton'):
+                parts = stripped.split()
+                if len(parts) >= 2:
+                    current = parts[1]
+                    buttons[current] = None
+                continue
+            if lowered == 'end':
+                current = None
+                continue
+            if current is not None and '=' in stripped:
+                key, value = stripped.split('=', 1)
+                if key.strip().lower() == 'buttonimage' and value.strip():
+                    buttons[current] = value.split()[0]
+
+    return buttons
+
+def resolve_button_images(buttons, mapped_images, texture_map):
+    """
+    Resolves every ButtonImage through the MappedImage index and the texture map in one pass.
+    Returns (resolved, report), where resolved is a list of (button, image_name) that can be
+    cropped and report holds 'no_image', 'missing_image', 'missing_texture' and 'unused' lists.
+    """
+    report = {'no_image': [], 'missing_image': [], 'missing_texture': [], 'unused': []}
+    resolved = []
+    used_images = set()
+    icon_textures = set()
+
+    for button, image_name in buttons.items():
+        if image_name is None:
+            report['no_image'].append(button)
+            continue
+        if image_name not in mapped_images:
+            report['missing_image'].append((button, image_name))
+            continue
+        used_images.add(image_name)
+        texture = mapped_images[image_name].get('texture', '')
+        icon_textures.add(texture.lower())
+        if not find_texture_path(texture, texture_map):
+            report['missing_texture'].append((button, image_name, texture))
+            continue
+        resolved.append((button, image_name))
+
+    # Unused: images on the same texture pages as the button icons that no button references
+    for image_name in sorted(mapped_images.names()):
+        if image_name in used_images:
+            continue
+        image = mapped_images.get(image_name)
+        if image and image.get('texture', '').lower() in icon_textures:
+            report['unused'].append(image_name)
+
+    return resolved, report
+
+def render_contact_sheets(resolved, mapped_images, texture_map, output_dir, columns=10, rows=8, cell=96):
+    """
+    Renders paginated contact sheets (PNG plus an SVG referencing the saved crops), each icon
+    labelled with its CommandButton name. Every ButtonImage is cropped once; textures are decoded
+    once through a shared cache. Returns the list of PNG pages written.
+    """
+    icons_dir = os.path.join(output_dir, "icons")
+    if not os.path.exists(icons_dir):
+        os.makedirs(icons_dir)
+
+    try:
+        font = ImageFont.truetype("arial.ttf", 10)
+    except IOError:
+        font = ImageFont.load_default()
+
+    texture_cache = {}
+    crops = {} # image name -> (PIL image, saved path)
+    label_height = 14
+    cell_height = cell + label_height
+    per_page = columns * rows
+    pages = []
+
+    for page_start in range(0, len(resolved), per_page):
+        page_items = resolved[page_start:page_start + per_page]
+        page_number = page_start // per_page + 1
+        sheet = Image.new('RGBA', (columns * cell, rows * cell_height), (32, 32, 32, 255))
+        draw = ImageDraw.Draw(sheet)
+        svg_lines = [
+            f'<svg width="{columns * cell}" height="{rows * cell_height}" viewBox="0 0 {columns * cell} {rows * cell_height}" xmlns="http://www.w3.org/2000/svg">',
+            '  <style>',
+            '    text { font-family: Arial, sans-serif; font-size: 10px; fill: white; text-anchor: middle; }',
+            '  </style>',
+            f'  <rect x="0" y="0" width="{columns * cell}" height="{rows * cell_height}" fill="rgb(32,32,32)" />',
+        ]
+
+        for i, (button, image_name) in enumerate(page_items):
+            x = (i % columns) * cell
+            y = (i // columns) * cell_height
+
+            if image_name not in crops:
+                cropped = crop_mapped_image(mapped_images[image_name], texture_map, texture_cache)
+                saved_path = None
+                if cropped is not None:
+                    saved_path = os.path.join(icons_dir, f"{image_name}.png")
+                    cropped.save(saved_path)
+                crops[image_name] = (cropped, saved_path)
+            cropped, saved_path = crops[image_name]
+
+            label = button[len("Command_"):] if button.startswith("Command_") else button
+            if cropped is not None:
+                thumb = cropped.convert('RGBA')
+                thumb.thumbnail((cell - 4, cell - 4))
+                sheet.alpha_composite(thumb, dest=(x + (cell - thumb.width) // 2, y + (cell - thumb.height) // 2))
+                href = os.path.relpath(saved_path, output_dir).replace('\\', '/')
+                svg_lines.append(f'  <g id="{button}">')
+                svg_lines.append(f'    <image href="{href}" x="{x + 2}" y="{y + 2}" width="{cell - 4}" height="{cell - 4}" preserveAspectRatio="xMidYMid meet" />')
+            else:
+                draw.rectangle([x + 2, y + 2, x + cell - 3, y + cell - 3], outline=(255, 0, 0, 255))
+                svg_lines.append(f'  <g id="{button}">')
+                svg_lines.append(f'    <rect x="{x + 2}" y="{y + 2}" width="{cell - 4}" height="{cell - 4}" fill="none" stroke="red" />')
+
+            draw.text((x + 2, y + cell), label[:16], fill="white", font=font)
+            svg_lines.append(f'    <text x="{x + cell / 2}" y="{y + cell + 10}">{label}</text>')
+            svg_lines.append('  </g>')
+
+        svg_lines.append('</svg>')
+
+        png_path = os.path.join(output_dir, f"command_buttons_{page_number:02d}.png")
+        sheet.save(png_path)
+        with open(os.path.splitext(png_path)[0] + ".svg", 'w') as f:
+            f.write('\n'.join(svg_lines))
+        pages.append(png_path)
+
+    return pages
+
+def write_report(report, output_path):
+    """Writes the missing/unused image report as plain text."""
+    with open(output_path, 'w') as f:
+        f.write(f"CommandButtons without ButtonImage: {len(report['no_image'])}\n")
+        for button in report['no_image']:
+            f.write(f"  {button}\n")
+        f.write(f"\nButtonImage not found in MappedImages: {len(report['missing_image'])}\n")
+        for button, image_name in report['missing_image']:
+            f.write(f"  {button}: {image_name}\n")
+        f.write(f"\nTexture not found: {len(report['missing_texture'])}\n")
+        for button, image_name, texture in report['missing_texture']:
+            f.write(f"  {button}: {image_name} ({texture})\n")
+        f.write(f"\nUnused MappedImages on icon texture pages: {len(report['unused'])}\n")
+        for image_name in report['unused']:
+            f.write(f"  {image_name}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Render contact sheets of every CommandButton icon and report missing/unused images.")
+    parser.add_argument("--command_buttons", default="INI/CommandButton.ini", help="CommandButton INI file")
+    parser.add_argument("--mapped_images_dir", nargs='+', default=["MappedImages", "INI/MappedImages"], help="Folder(s) containing INI files with Mapped Images")
+    parser.add_argument("--textures_dir", default="Art/Textures", help="Folder containing textures")
+    parser.add_argument("--outdir", default="command_button_sheet", help="Directory for sheets, icons and the report")
+    parser.add_argument("--columns", type=int, default=10, help="Icons per row")
+    parser.add_argument("--rows", type=int, default=8, help="Rows per page")
+    parser.add_argument("--cell", type=int, default=96, help="Cell size in pixels")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.command_buttons):
+        print(f"Error: File {args.command_buttons} not found.")
+        return
+
+    buttons = parse_command_buttons(args.command_buttons)
+    print(f"Parsed {len(buttons)} CommandButtons.")
+
+    mapped_images = MappedImageIndex()
+    for mapped_dir in args.mapped_images_dir:
+        if os.path.exists(mapped_dir):
+            mapped_images.add_path(mapped_dir)
+    print(f"Indexed {len(mapped_images)} mapped images.")
+    texture_map = scan_textures(args.textures_dir)
+
+    resolved, report = resolve_button_images(buttons, mapped_images, texture_map)
+    print(f"Resolved {len(resolved)} icons; {len(report['missing_image'])} missing images, "
+          f"{len(report['missing_texture'])} missing textures, {len(report['no_image'])} without ButtonImage.")
+
+    if not os.path.exists(args.outdir):
+        os.makedirs(args.outdir)
+
+    pages = render_contact_sheets(resolved, mapped_images, texture_map, args.outdir, args.columns, args.rows, args.cell)
+    print(f"Saved {len(pages)} contact sheet page(s) to {args.outdir}")
+
+    report_path = os.path.join(args.outdir, "command_buttons_report.txt")
+    write_report(report, report_path)
+    print(f"Saved report to {report_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import re
+import os
+
+from atomic_write import atomic_write
+
+# ControlBarResizer values are authored against the default 800x600 display and
+# are relative to the parent window, like the engine's winSetPosition.
+DEFAULT_DISPLAY_WIDTH = 800
+DEFAULT_DISPLAY_HEIGHT = 600
+
+ALT_PATTERN = re.compile(r"^(\s*)(AltPosition|AltSize)(\s*=\s*)X:\s*(-?\d+)\s+Y:\s*(-?\d+)(.*)$", re.IGNORECASE | re.DOTALL)
+
+def parse_resizer_ini(filepath):
+    """
+    Parses ControlBarResizer.ini.
+    Returns an ordered dict of window name -> {'x', 'y', 'w', 'h'} (AltPosition/AltSize).
+    """
+    entries = {}
+    if not os.path.exists(filepath):
+        print(f"Warning: Resizer file {filepath} not found.")
+        return entries
+
+    current = None
+    with open(filepath, 'r') as f:
+        for line in f:
+            stripped = line.split(';', 1)[0].strip()
+            if not stripped:
+                continue
+            if stripped.lower().startswith('controlbarresizer'):
+                parts = stripped.split()
+                current = entries.setdefault(parts[1], {'x': 0, 'y': 0, 'w': 0, 'h': 0}) if len(parts) >= 2 else None
+                continue
+            if stripped.lower() == 'end':
+                current = None
+                continue
+            if current is None:
+                continue
+            m = ALT_PATTERN.match(stripped)
+            if m:
+                if m.group(2).lower() == 'altposition':
+                    current['x'], current['y'] = int(m.group(4)), int(m.group(5))
+                else:
+                    current['w'], current['h'] = int(m.group(4)), int(m.group(5))
+    return entries
+
+def resizer_scale(creation_res):
+    """Returns the (x, y) factors from 800x600 resizer units to the WND CREATIONRESOLUTION."""
+    return creation_res[0] / DEFAULT_DISPLAY_WIDTH, creation_res[1] / DEFAULT_DISPLAY_HEIGHT
+
+def join_resizer_entries(window_tree, entries, creation_res):
+    """
+    Joins resizer entries onto a parsed window tree (see wnd_to_svg.parse_wnd_tree) by window NAME.
+    Returns {name: {'x', 'y', 'width', 'height', 'origin', 'parent'}} in absolute WND coordinates,
+    where origin is the absolute point the AltPosition is relative to and parent is the name of
+    the parent's alt rect it follows (or None).
+    """
+    # Imported here to avoid a circular import with wnd_to_svg
+    from wnd_to_svg import iter_window_tree
+
+    scale_x, scale_y = resizer_scale(creation_res)
+    alt_rects = {}
+
+    for window, depth, parent in iter_window_tree(window_tree):
+        entry = entries.get(window['name'])
+        if entry is None:
+            continue
+
+        alt_parent = None
+        if parent is None:
+            origin = (0, 0)
+        elif parent['name'] in alt_rects:
+            alt_parent = parent['name']
+            origin = (alt_rects[alt_parent]['x'], alt_rects[alt_parent]['y'])
+        else:
+            origin = (parent['x'], parent['y'])
+
+        # The engine only resizes when the alt size is larger than 2x2
+        if entry['w'] > 2 or entry['h'] > 2:
+            width, height = round(entry['w'] * scale_x), round(entry['h'] * scale_y)
+        else:
+            width, height = window['width'], window['height']
+
+        alt_rects[window['name']] = {
+            'x': origin[0] + round(entry['x'] * scale_x),
+            'y': origin[1] + round(entry['y'] * scale_y),
+            'width': width,
+            'height': height,
+            'origin': origin,
+            'parent': alt_parent,
+        }
+    return alt_rects
+
+def alt_updates_to_entries(alt_updates, alt_rects, entries, creation_res):
+    """
+    Converts absolute alt rects edited in the SVG ({name: {x, y, w, h}}) back into resizer units.
+    Only entries whose rect actually moved or resized are returned, as {name: {'x', 'y', 'w', 'h'}}.
+    Children are resolved relative to their parent's edited alt position.
+    """
+    scale_x, scale_y = resizer_scale(creation_res)
+    changed = {}
+    new_origins = {} # name -> edited absolute position
+
+    # alt_rects is built parents-first, so parents are resolved before children
+    for name, shown in alt_rects.items():
+        u = alt_updates.get(name)
+        if u is None:
+            new_origins[name] = (shown['x'], shown['y'])
+            continue
+        new_origins[name] = (u['x'], u['y'])
+        if (u['x'], u['y'], u['w'], u['h']) == (shown['x'], shown['y'], shown['width'], shown['height']):
+            continue
+
+        origin = new_origins[shown['parent']] if shown['parent'] else shown['origin']
+
+        entry = dict(entries[name])
+        entry['x'] = round((u['x'] - origin[0]) / scale_x)
+        entry['y'] = round((u['y'] - origin[1]) / scale_y)
+        if (u['w'], u['h']) != (shown['width'], shown['height']):
+            entry['w'] = round(u['w'] / scale_x)
+            entry['h'] = round(u['h'] / scale_y)
+        if entry != entries[name]:
+            changed[name] = entry
+    return changed
+
+def update_resizer_ini(filepath, changed_entries, output_path=None, batch=None):
+    """
+    Rewrites AltPosition/AltSize for the changed entries in a single streaming pass,
+    preserving indentation and comments. The file is replaced atomically, or staged in
+    batch (an atomic_write.WriteBatch) when given. Returns the number of entries updated.
+    """
+    if not changed_entries:
+        return 0
+    if output_path is None:
+        output_path = filepath
+
+    with open(filepath, 'r') as f:
+        lines = f.readlines()
+
+    new_lines = []
+    current = None
+    updated = set()
+    for line in lines:
+        stripped = line.split(';', 1)[0].strip()
+        if stripped.lower().startswith('controlbarresizer'):
+            parts = stripped.split()
+            current = parts[1] if len(parts) >= 2 and parts[1] in changed_entries else None
+        elif stripped.lower() == 'end':
+            current = None
+        elif current is not None:
+            m = ALT_PATTERN.match(line)
+            if m:
+                entry = changed_entries[current]
+                if m.group(2).lower() == 'altposition':
+                    x, y = entry['x'], entry['y']
+                else:
+                    x, y = entry['w'], entry['h']
+                line = f"{m.group(1)}{m.group(2)}{m.group(3)}X:{x} Y:{y}{m.group(6)}"
+                updated.add(current)
+        new_lines.append(line)
+
+    if batch is not None:
+        batch.stage(output_path, "".join(new_lines))
+    else:
+        atomic_write(output_path, "".join(new_lines))
+    print(f"Updated {len(updated)} ControlBarResizer entries in {output_path}")
+    return len(updated)
@@ -0,0 +1,205 @@
+import os
+import struct
+import threading
+import numpy as np
+from PIL import Image
+
+# Decoded pages are kept here as raw RGBA, one file per texture version (mtime + size)
+DEFAULT_CACHE_DIR = ".texture_cache"
+
+DDS_HEADER_SIZE = 128
+
+# One lock per texture path: threads sharing a texture_cache (wnd_batch workers) open each page once,
+# so two of them never create, or delete, the same cache file at the same time
+open_locks = {}
+open_locks_guard = threading.Lock()
+BLOCK_SIZES = {b'DXT1': 8, b'DXT3': 16, b'DXT5': 16}
+
+def read_dds_header(path):
+    """
+    Reads the DDS header. Returns {'width', 'height', 'fourcc', 'block_size'}, where block_size
+    is None for formats that aren't DXT1/3/5 (those are left to PIL).
+    """
+    with open(path, 'rb') as f:
+        header = f.read(DDS_HEADER_SIZE)
+    if len(header) < DDS_HEADER_SIZE or header[:4] != b'DDS ':
+        raise ValueError(f"{path} is not a DDS file")
+    height, width = struct.unpack_from('<II', header, 12)
+    pf_flags = struct.unpack_from('<I', header, 80)[0]
+    fourcc = header[84:88] if pf_flags & 0x4 else None
+    return {'width': width, 'height': height, 'fourcc': fourcc, 'block_size': BLOCK_SIZES.get(fourcc)}
+
+def expand_565(c):
+    """Expands RGB565 values to an (..., 3) uint8 array, replicating the top bits like PIL does."""
+    r = (c >> 8) & 0xf8
+    g = (c >> 3) & 0xfc
+    b = (c << 3) & 0xf8
+    return np.stack([r | (r >> 5), g | (g >> 6), b | (b >> 5)], axis=-1).astype(np.uint8)
+
+def decode_color_blocks(blocks, four_color_only):
+    """Decodes the 8-byte color part of n blocks into (n, 16, 4) RGBA."""
+    c0 = blocks[:, 0].astype(np.uint32) | (blocks[:, 1].astype(np.uint32) << 8)
+    c1 = blocks[:, 2].astype(np.uint32) | (blocks[:, 3].astype(np.uint32) << 8)
+    bits = (blocks[:, 4].astype(np.uint32) | (blocks[:, 5].astype(np.uint32) << 8)
+            | (blocks[:, 6].astype(np.uint32) << 16) | (blocks[:, 7].astype(np.uint32) << 24))
+
+    p0 = expand_565(c0).astype(np.int32)
+    p1 = expand_565(c1).astype(np.int32)
+    four = (c0 > c1) if not four_color_only else np.ones(len(blocks), dtype=bool)
+    f = four[:, None]
+    p2 = np.where(f, (2 * p0 + p1) // 3, (p0 + p1) // 2)
+    p3 = np.where(f, (p0 + 2 * p1) // 3, 0)
+
+    palette = np.zeros((len(blocks), 4, 4), dtype=np.uint8)
+    palette[:, 0, :3] = p0
+    palette[:, 1, :3] = p1
+    palette[:, 2, :3] = p2
+    palette[:, 3, :3] = p3
+    palette[:, :, 3] = 255
+    # DXT1 three-color mode: index 3 is transparent black
+    palette[~four, 3, 3] = 0
+
+    indices = (bits[:, None] >> (2 * np.arange(16, dtype=np.uint32))) & 3
+    return np.take_along_axis(palette, indices[:, :, None].astype(np.intp), axis=1)
+
+def decode_dxt5_alpha(blocks):
+    """Decodes the interpolated alpha part of n DXT5 blocks into (n, 16)."""
+    a0 = blocks[:, 0].astype(np.int32)
+    a1 = blocks[:, 1].astype(np.int32)
+    bits = np.zeros(len(blocks), dtype=np.uint64)
+    for i in range(6):
+        bits |= blocks[:, 2 + i].astype(np.uint64) << np.uint64(8 * i)
+
+    eight = (a0 > a1)[:, None]
+    i = np.arange(2, 8, dtype=np.int32)[None, :]
+    interp8 = ((8 - i) * a0[:, None] + (i - 1) * a1[:, None]) // 7
+    interp6 = ((6 - i) * a0[:, None] + (i - 1) * a1[:, None]) // 5
+    interp6[:, 4] = 0
+    interp6[:, 5] = 255
+    alphas = np.concatenate([a0[:, None], a1[:, None], np.where(eight, interp8, interp6)], axis=1).astype(np.uint8)
+
+    indices = (bits[:, None] >> (np.uint64(3) * np.arange(16, dtype=np.uint64))) & np.uint64(7)
+    return np.take_along_axis(alphas, indices.astype(np.intp), axis=1)
+
+def decode_blocks(blocks, fourcc):
+    """Decodes n raw DXT blocks ((n, block_size) uint8) into (n, 4, 4, 4) RGBA pixels."""
+    if fourcc == b'DXT1':
+        pixels = decode_color_blocks(blocks, four_color_only=False)
+    else:
+        pixels = decode_color_blocks(blocks[:, 8:], four_color_only=True)
+        if fourcc == b'DXT3':
+            nibbles = np.stack([blocks[:, :8] & 0x0f, blocks[:, :8] >> 4], axis=-1).reshape(len(blocks), 16)
+            pixels[:, :, 3] = nibbles * 17
+        else:
+            pixels[:, :, 3] = decode_dxt5_alpha(blocks)
+    return pixels.reshape(len(blocks), 4, 4, 4)
+
+class DDSTexture:
+    """
+    A DXT1/3/5 texture that only decodes the 4x4 blocks a crop touches.
+    With a cache_dir, decoded blocks go into a memory-mapped raw RGBA file (a per-block
+    'decoded' table followed by the pixels), so each block is decompressed once per texture
+    version across runs. Offers the .width/.height/.crop(box) subset of PIL's Image API.
+    """
+
+    def __init__(self, path, header, cache_dir=DEFAULT_CACHE_DIR):
+        self.path = path
+        self.width = header['width']
+        self.height = header['height']
+        self.fourcc = header['fourcc']
+        self.blocks_x = max(1, (self.width + 3) // 4)
+        self.blocks_y = max(1, (self.height + 3) // 4)
+
+        # The top mip level comes first; only its blocks are mapped, nothing is read yet
+        self.source = np.memmap(path, dtype=np.uint8, mode='r', offset=DDS_HEADER_SIZE,
+                                shape=(self.blocks_y, self.blocks_x, header['block_size']))
+
+        flag_count = self.blocks_y * self.blocks_x
+        pixel_shape = (self.blocks_y * 4, self.blocks_x * 4, 4)
+        if cache_dir:
+            storage = self.open_cache(cache_dir, flag_count + int(np.prod(pixel_shape)))
+        else:
+            storage = np.zeros(flag_count + int(np.prod(pixel_shape)), dtype=np.uint8)
+        self.decoded = storage[:flag_count].reshape(self.blocks_y, self.blocks_x)
+        self.pixels = storage[flag_count:].reshape(pixel_shape)
+
+    def open_cache(self, cache_dir, size):
+        """Maps this texture version's cache file, creating it (and dropping older versions) if needed."""
+        st = os.stat(self.path)
+        base = os.path.basename(self.path).lower()
+        cache_path = os.path.join(cache_dir, f"{base}.{st.st_mtime_ns}-{st.st_size}.rgba")
+
+        if not os.path.exists(cache_path) or os.path.getsize(cache_path) != size:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir, exist_ok=True)
+            for name in os.listdir(cache_dir):
+                if name.startswith(base + ".") and name.endswith(".rgba"):
+                    try:
+                        os.remove(os.path.join(cache_dir, name))
+                    except OSError:
+                        pass
+            # Sized in a temp file and renamed, so another process never maps a half-created file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.truncate(size)
+            os.replace(tmp_path, cache_path)
+
+        return np.memmap(cache_path, dtype=np.uint8, mode='r+', shape=(size,))
+
+    def decode_region(self, bx0, by0, bx1, by1):
+        """Decodes the not yet decoded blocks in [bx0, bx1) x [by0, by1)."""
+        missing = np.argwhere(self.decoded[by0:by1, bx0:bx1] == 0)
+        if len(missing) == 0:
+            return
+        ys = missing[:, 0] + by0
+        xs = missing[:, 1] + bx0
+        pixels = decode_blocks(np.asarray(self.source[ys, xs]), self.fourcc)
+        self.pixels.reshape(self.blocks_y, 4, self.blocks_x, 4, 4)[ys, :, xs] = pixels
+        self.decoded[ys, xs] = 1
+
+    def crop(self, box):
+        """Returns the RGBA crop of box (left, top, right, bottom); areas outside the texture are transparent."""
+        left, top, right, bottom = (int(v) for v in box)
+        result = Image.new('RGBA', (max(right - left, 0), max(bottom - top, 0)), (0, 0, 0, 0))
+        cl, ct = max(left, 0), max(top, 0)
+        cr, cb = min(right, self.width), min(bottom, self.height)
+        if cl >= cr or ct >= cb:
+            return result
+
+        self.decode_region(cl // 4, ct // 4, (cr + 3) // 4, (cb + 3) // 4)
+        region = Image.fromarray(np.ascontiguousarray(self.pixels[ct:cb, cl:cr]), 'RGBA')
+        result.paste(region, (cl - left, ct - top))
+        return result
+
+def open_texture(path, texture_cache=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Opens a texture for cropping: DXT-compressed DDS files as a DDSTexture, anything else through PIL.
+    Opened textures are kept in texture_cache (path -> texture) when one is given.
+    Safe to call from several threads with the same texture_cache.
+    Raises the underlying error if the file can't be read.
+    """
+    if texture_cache is not None and path in texture_cache:
+        return texture_cache[path]
+
+    with open_locks_guard:
+        lock = open_locks.setdefault(os.path.normcase(os.path.abspath(path)), threading.Lock())
+    with lock:
+        # Another thread may have opened it while this one waited
+        if texture_cache is not None and path in texture_cache:
+            return texture_cache[path]
+        img = load_texture(path, cache_dir)
+        if texture_cache is not None:
+            texture_cache[path] = img
+    return img
+
+def load_texture(path, cache_dir=DEFAULT_CACHE_DIR):
+    """Opens a texture without caching or locking; use open_texture."""
+    img = None
+    if path.lower().endswith('.dds'):
+        header = read_dds_header(path)
+        if header['block_size']:
+            img = DDSTexture(path, header, cache_dir)
+    if img is None:
+        img = Image.open(path)
+        img.load()
+    return img
@@ -0,0 +1,181 @@
+import os
+import re
+import glob
+import json
+import hashlib
+import argparse
+
+from mapped_image_index import MappedImageIndex
+
+def reference_pattern(key=None):
+    """
+    One compiled matcher per file type. Instead of one regex per MappedImage name, each
+    identifier-like token is matched once and looked up in the (hashed) set of defined names.
+    The optional key prefix marks tokens that must be images, which is how dangling references
+    are told apart from ordinary words; key lists only the keys of that file type that hold MappedImage names.
+    """
+    key_group = rf"(?P<key>{key})?" if key else "(?P<key>(?!))?"
+    return re.compile(key_group + r"(?P<token>[A-Za-z_][\w\-]*)(?![\w.:\-])", re.MULTILINE)
+
+# WND draw data
+WND_PATTERN = reference_pattern(r"\bIMAGE:[ \t]*")
+# ControlBarScheme '<Key> <Image>' lines (ImageName, QueueButtonImage, OptionsButtonEnable, GenBarButtonIn, ...)
+SCHEME_PATTERN = reference_pattern(r"^[ \t]*(?:\w*Image\w*|\w*Button(?:Enable|Hightlited|Pushed|Disabled)"
+                                   r"|ToggleButton(?:Up|Down)(?:In|On|Pushed)|GenBarButton(?:In|On)|GenArrow)[ \t]+")
+# Other INIs: ButtonImage = / SelectPortrait = / Animation2D Image = / PlayerTemplate medallions ...
+INI_PATTERN = reference_pattern(r"^[ \t]*(?:\w*Image|\w*Portrait(?:Small|Large)?|Medallion(?:Regular|Hilite|Select)"
+                                r"|FlagWaterMark)[ \t]*=[ \t]*")
+# Files whose image-like keys name something else (Mouse.ini cursor Image = is an animated cursor, not a MappedImage)
+PLAIN_PATTERN = reference_pattern()
+UNKEYED_FILES = {"mouse.ini"}
+
+def pattern_for(path):
+    """The reference matcher for a source file, chosen by its name."""
+    name = os.path.basename(path).lower()
+    if name.endswith('.wnd'):
+        return WND_PATTERN
+    if name in UNKEYED_FILES:
+        return PLAIN_PATTERN
+    if name.startswith('controlbarscheme'):
+        return SCHEME_PATTERN
+    return INI_PATTERN
+
+COMMENT_PATTERN = re.compile(r";[^\n]*")
+
+CACHE_VERSION = 2
+
+def scan_references(text, defined_lower, strip_comments=True, pattern=INI_PATTERN):
+    """
+    Scans one file's text with pattern (see pattern_for). Returns (refs, dangling): the sorted
+    canonical names of defined MappedImages it mentions, and the sorted image names it references that aren't defined.
+    """
+    if strip_comments:
+        text = COMMENT_PATTERN.sub("", text)
+
+    refs = set()
+    dangling = set()
+    for m in pattern.finditer(text):
+        token = m.group('token')
+        canonical = defined_lower.get(token.lower())
+        if canonical is not None:
+            refs.add(canonical)
+        elif m.group('key') and token != "NoImage":
+            dangling.add(token)
+    return sorted(refs), sorted(dangling)
+
+def collect_sources(patterns, excluded_dirs):
+    """Expands the source globs, skipping files inside the MappedImage definition folders."""
+    excluded = [os.path.abspath(d) + os.sep for d in excluded_dirs]
+    sources = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern, recursive=True):
+            abs_path = os.path.abspath(path)
+            if os.path.isfile(path) and not any(abs_path.startswith(d) for d in excluded):
+                sources.add(os.path.normpath(path))
+    return sorted(sources)
+
+def load_cache(cache_path, defs_digest):
+    """Returns the cached per-file results, or an empty dict when definitions or the format changed."""
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache {cache_path}: {e}")
+        return {}
+    if data.get('version') != CACHE_VERSION or data.get('defs_digest') != defs_digest:
+        return {}
+    return data.get('files', {})
+
+def save_cache(cache_path, defs_digest, files):
+    with open(cache_path, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'defs_digest': defs_digest, 'files': files}, f)
+
+def build_reference_index(sources, mapped_images, cache_path=None):
+    """
+    Builds the inverted index over all sources, reusing cached results for unchanged files.
+    Returns (referenced_by, dangling, rescanned) where referenced_by maps image -> [files]
+    and dangling maps file -> [image names].
+    """
+    defined_lower = {name.lower(): name for name in mapped_images.names()}
+    # The matchers themselves are part of the digest, so changing them invalidates old results too
+    patterns = [WND_PATTERN, SCHEME_PATTERN, INI_PATTERN, PLAIN_PATTERN]
+    digest_source = "\n".join(p.pattern for p in patterns) + "\n" + " ".join(sorted(UNKEYED_FILES)) + "\n" + "\n".join(sorted(defined_lower))
+    defs_digest = hashlib.sha1(digest_source.encode('utf-8')).hexdigest()
+    cached = load_cache(cache_path, defs_digest)
+
+    files = {}
+    rescanned = 0
+    for path in sources:
+        st = os.stat(path)
+        entry = cached.get(path)
+        if entry is None or entry['mtime_ns'] != st.st_mtime_ns or entry['size'] != st.st_size:
+            with open(path, 'r', errors='ignore') as f:
+                text = f.read()
+            # WND files have no comments; ';' only terminates properties there
+            refs, dangling = scan_references(text, defined_lower, strip_comments=not path.lower().endswith('.wnd'),
+                                             pattern=pattern_for(path))
+            entry = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'refs': refs, 'dangling': dangling}
+            rescanned += 1
+        files[path] = entry
+
+    if cache_path:
+        save_cache(cache_path, defs_digest, files)
+
+    referenced_by = {}
+    dangling = {}
+    for path, entry in files.items():
+        for name in entry['refs']:
+            referenced_by.setdefault(name, []).append(path)
+        if entry['dangling']:
+            dangling[path] = entry['dangling']
+    return referenced_by, dangling, rescanned
+
+def write_report(output_path, mapped_images, referenced_by, dangling):
+    """Writes referenced-by lists, dangling references and unused MappedImages as plain text."""
+    unused = sorted(name for name in mapped_images.names() if name not in referenced_by)
+    with open(output_path, 'w') as f:
+        f.write(f"Unused MappedImages: {len(unused)}\n")
+        for name in unused:
+            location = mapped_images.locations[name][0]
+            f.write(f"  {name} ({location})\n")
+
+        dangling_count = sum(len(names) for names in dangling.values())
+        f.write(f"\nDangling references: {dangling_count}\n")
+        for path in sorted(dangling):
+            for name in dangling[path]:
+                f.write(f"  {path}: {name}\n")
+
+        f.write(f"\nReferenced MappedImages: {len(referenced_by)}\n")
+        for name in sorted(referenced_by):
+            f.write(f"  {name}\n")
+            for path in referenced_by[name]:
+                f.write(f"    {path}\n")
+    return unused
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit unused and missing MappedImages across the asset tree.")
+    parser.add_argument("--mapped_images_dir", nargs='+', default=["MappedImages", "INI/MappedImages"], help="Folder(s) containing INI files with Mapped Images")
+    parser.add_argument("--sources", nargs='+', default=["Window/**/*.wnd", "INI/**/*.ini"], help="Glob(s) of text assets to scan for references")
+    parser.add_argument("--cache", default=".image_audit_cache.json", help="Cache file for incremental reruns ('' to disable)")
+    parser.add_argument("--output", default="image_audit_report.txt", help="Report file")
+    args = parser.parse_args()
+
+    mapped_images = MappedImageIndex()
+    for mapped_dir in args.mapped_images_dir:
+        if os.path.exists(mapped_dir):
+            mapped_images.add_path(mapped_dir)
+    print(f"Indexed {len(mapped_images)} mapped images.")
+
+    sources = collect_sources(args.sources, args.mapped_images_dir)
+    referenced_by, dangling, rescanned = build_reference_index(sources, mapped_images, args.cache or None)
+    print(f"Scanned {rescanned} of {len(sources)} files ({len(sources) - rescanned} unchanged, from cache).")
+
+    unused = write_report(args.output, mapped_images, referenced_by, dangling)
+    dangling_count = sum(len(names) for names in dangling.values())
+    print(f"{len(referenced_by)} referenced, {len(unused)} unused, {dangling_count} dangling references.")
+    print(f"Saved report to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import os
+import glob
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+def load_rgba(path):
+    """Loads an image as an (H, W, 4) uint8 array."""
+    with Image.open(path) as img:
+        return np.asarray(img.convert('RGBA'))
+
+def diff_arrays(actual, reference, threshold=0):
+    """
+    Compares two RGBA arrays.
+    Returns (changed_pixels, bbox, magnitude) where bbox is (left, top, right, bottom) or None
+    and magnitude is the per-pixel max channel difference as an (H, W) uint8 array.
+    Arrays of different sizes are compared over their common area; the rest counts as changed.
+    """
+    height = max(actual.shape[0], reference.shape[0])
+    width = max(actual.shape[1], reference.shape[1])
+    magnitude = np.full((height, width), 255, dtype=np.uint8)
+
+    common_h = min(actual.shape[0], reference.shape[0])
+    common_w = min(actual.shape[1], reference.shape[1])
+    a = actual[:common_h, :common_w].astype(np.int16)
+    r = reference[:common_h, :common_w].astype(np.int16)
+    magnitude[:common_h, :common_w] = np.abs(a - r).max(axis=2).astype(np.uint8)
+
+    changed = magnitude > threshold
+    changed_pixels = int(changed.sum())
+    if not changed_pixels:
+        return 0, None, magnitude
+
+    rows = np.flatnonzero(changed.any(axis=1))
+    cols = np.flatnonzero(changed.any(axis=0))
+    bbox = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+    return changed_pixels, bbox, magnitude
+
+def write_heatmap(reference, magnitude, output_path):
+    """Writes the reference dimmed to grayscale with changed pixels highlighted in red."""
+    height, width = magnitude.shape
+    base = np.zeros((height, width, 3), dtype=np.uint8)
+    gray = reference[..., :3].mean(axis=2).astype(np.uint8) // 3
+    base[:gray.shape[0], :gray.shape[1]] = gray[..., None]
+
+    heat = base.astype(np.uint16)
+    heat[..., 0] = np.maximum(heat[..., 0], magnitude)
+    heat[..., 1] = np.where(magnitude > 0, heat[..., 1] // 2, heat[..., 1])
+    heat[..., 2] = np.where(magnitude > 0, heat[..., 2] // 2, heat[..., 2])
+
+    out_dir = os.path.dirname(output_path)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    Image.fromarray(heat.astype(np.uint8), 'RGB').save(output_path)
+
+def compare_image(actual_path, reference_path, heatmap_path=None, threshold=0):
+    """
+    Compares a rendered image against its golden reference.
+    Returns a result dict: {'name', 'status', 'changed', 'total', 'bbox'} with status
+    in ok/changed/missing_reference/missing_output.
+    """
+    result = {'name': actual_path, 'status': 'ok', 'changed': 0, 'total': 0, 'bbox': None}
+    if not os.path.exists(actual_path):
+        result['status'] = 'missing_output'
+        return result
+    if not os.path.exists(reference_path):
+        result['status'] = 'missing_reference'
+        return result
+
+    actual = load_rgba(actual_path)
+    reference = load_rgba(reference_path)
+    changed, bbox, magnitude = diff_arrays(actual, reference, threshold)
+    result['total'] = magnitude.size
+    if changed:
+        result.update({'status': 'changed', 'changed': changed, 'bbox': bbox})
+        if heatmap_path:
+            write_heatmap(reference, magnitude, heatmap_path)
+    return result
+
+# Per-process state for the corpus workers, so resources are scanned once per worker
+_worker_resources = None
+
+def _init_corpus_worker(mapped_images_dir, textures_dir):
+    global _worker_resources
+    from wnd_to_svg import scan_mapped_images, scan_textures
+    _worker_resources = {
+        'mapped_images': scan_mapped_images(mapped_images_dir),
+        'texture_map': scan_textures(textures_dir),
+        'texture_cache': {},
+        'crop_cache': {},
+    }
+
+def _check_wnd(job):
+    """Renders one WND preview and compares it against its reference (runs in a worker)."""
+    from wnd_preview import render_wnd_preview
+    wnd_path, rel_name, size, refdir, outdir, threshold, update_refs = job
+    res = _worker_resources
+
+    actual_path = os.path.join(outdir, rel_name + ".png")
+    reference_path = os.path.join(refdir, rel_name + ".png")
+    os.makedirs(os.path.dirname(actual_path), exist_ok=True)
+    try:
+        preview = render_wnd_preview(wnd_path, res['mapped_images'], res['texture_map'], size,
+                                     res['texture_cache'], res['crop_cache'])
+        preview.save(actual_path)
+    except Exception as e:
+        return {'name': rel_name, 'status': f'error: {e}', 'changed': 0, 'total': 0, 'bbox': None}
+
+    if update_refs:
+        os.makedirs(os.path.dirname(reference_path), exist_ok=True)
+        shutil.copyfile(actual_path, reference_path)
+        return {'name': rel_name, 'status': 'updated', 'changed': 0, 'total': 0, 'bbox': None}
+
+    heatmap_path = os.path.join(outdir, rel_name + "_heatmap.png")
+    result = compare_image(actual_path, reference_path, heatmap_path, threshold)
+    result['name'] = rel_name
+    return result
+
+def print_results(results):
+    """Prints one line per non-ok result and a summary. Returns the number of failures."""
+    failures = 0
+    for r in sorted(results, key=lambda r: r['name']):
+        if r['status'] in ('ok', 'updated'):
+            continue
+        failures += 1
+        if r['status'] == 'changed':
+            pct = 100.0 * r['changed'] / r['total'] if r['total'] else 0.0
+            print(f"  CHANGED  {r['name']}: {r['changed']} px ({pct:.2f}%) bbox={r['bbox']}")
+        else:
+            print(f"  {r['status'].upper()}  {r['name']}")
+    updated = sum(1 for r in results if r['status'] == 'updated')
+    if updated:
+        print(f"Updated {updated} reference images.")
+    print(f"Checked {len(results)} images: {len(results) - failures} ok, {failures} failing.")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden-image regression checks for overlays and WND previews.")
+    parser.add_argument("--compare", nargs=2, metavar=("ACTUAL", "REFERENCE"), help="Compare a single image against a reference (e.g. output_overlay.png)")
+    parser.add_argument("--window_dir", default="Window", help="Folder scanned recursively for .wnd files")
+    parser.add_argument("--mapped_images_dir", default="MappedImages", help="Folder containing INI files with Mapped Images")
+    parser.add_argument("--textures_dir", default="Art/Textures", help="Folder containing textures")
+    parser.add_argument("--refdir", default="regression/reference", help="Folder holding the golden images")
+    parser.add_argument("--outdir", default="regression/output", help="Folder for rendered images and heatmaps")
+    parser.add_argument("--size", help="Render size as WIDTHxHEIGHT (default: CREATIONRESOLUTION)")
+    parser.add_argument("--threshold", type=int, default=0, help="Ignore channel differences up to this value")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--update-goldens", "--update-refs", dest="update_refs", action="store_true",
+                        help="Store the rendered images as the new references (creates --refdir on first use)")
+    args = parser.parse_args()
+
+    if args.compare:
+        actual_path, reference_path = args.compare
+        heatmap_path = os.path.splitext(actual_path)[0] + "_heatmap.png"
+        result = compare_image(actual_path, reference_path, heatmap_path, args.threshold)
+        return 1 if print_results([result]) else 0
+
+    from wnd_preview import parse_size
+    size = parse_size(args.size) if args.size else None
+
+    wnd_files = sorted(glob.glob(os.path.join(args.window_dir, "**", "*.wnd"), recursive=True))
+    if not wnd_files:
+        print(f"No .wnd files found in {args.window_dir}.")
+        return 0
+
+    jobs = []
+    for wnd_path in wnd_files:
+        rel_name = os.path.splitext(os.path.relpath(wnd_path, args.window_dir))[0]
+        jobs.append((wnd_path, rel_name, size, args.refdir, args.outdir, args.threshold, args.update_refs))
+
+    print(f"Checking {len(jobs)} WND files...")
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_corpus_worker,
+                             initargs=(args.mapped_images_dir, args.textures_dir)) as pool:
+        results = list(pool.map(_check_wnd, jobs, chunksize=4))
+
+    failures = print_results(results)
+    if any(r['status'] == 'missing_reference' for r in results):
+        print(f"Missing references in {args.refdir}; render them with --update-goldens and commit them.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
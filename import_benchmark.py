@@ -0,0 +1,127 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# Modules that update-only runs (WND/scheme updates, lint) should load at startup
+DEFAULT_MODULES = ["wnd_to_svg", "scheme_to_svg", "sync_overlay", "control_bar_resizer", "wnd_lint"]
+# Real update-only runs: everything they import on the way counts, not just the module's top level
+DEFAULT_COMMANDS = [
+    ["wnd_to_svg.py", "Window/ControlBar.wnd", "--update", "--svg", "Window/ControlBar.svg", "--dry-run"],
+]
+# Imports that belong to image or GUI code paths only
+HEAVY_MODULES = ["PIL", "numpy", "tkinter"]
+
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def run_importtime(args, runs=5, total_of=None):
+    """
+    Runs python -X importtime args in fresh interpreters. Returns the fastest run as
+    {'total_us', 'modules': {name: (self_us, cumulative_us)}}. The total is the cumulative time
+    of total_of, or (for a script) of every top-level import except the interpreter's own startup ones.
+    """
+    startup = set() if total_of else set(run_importtime(["-c", "pass"], 1, "site")['modules'])
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime"] + args,
+                                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr}")
+        modules = {}
+        total = 0
+        for line in result.stderr.splitlines():
+            m = IMPORTTIME_PATTERN.match(line)
+            if m:
+                modules[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+                if not total_of and len(m.group(3)) == 1 and m.group(4) not in startup:
+                    total += int(m.group(2))
+        if total_of:
+            total = modules.get(total_of, (0, 0))[1]
+        if best is None or total < best['total_us']:
+            best = {'total_us': total, 'modules': modules}
+    return best
+
+def measure_import(module, runs=5):
+    """Times import module on its own."""
+    return run_importtime(["-c", f"import {module}"], runs, module)
+
+def measure_command(argv, runs=5):
+    """Times all imports of a real script run, e.g. a --dry-run update."""
+    return run_importtime(argv, runs)
+
+def load_last_record(history_path):
+    """Returns the last benchmark record of the history file, or None."""
+    if not history_path or not os.path.exists(history_path):
+        return None
+    last = None
+    with open(history_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup import cost of the update-only scripts with python -X importtime.")
+    parser.add_argument("modules", nargs='*', default=DEFAULT_MODULES, help="Modules to import (default: the update-path scripts)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module; the fastest run is kept")
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports (self time) to list per module")
+    parser.add_argument("--history", default="regression/import_times.jsonl", help="JSON-lines file the results are appended to ('' to disable)")
+    parser.add_argument("--budget_ms", type=float, help="Fail when any module or command takes longer than this to import")
+    parser.add_argument("--no_commands", action="store_true", help="Only time the module imports, not the real --dry-run update runs")
+    args = parser.parse_args()
+
+    previous = load_last_record(args.history)
+    previous_totals = previous['totals_ms'] if previous else {}
+
+    totals = {}
+    failed = False
+    runs = [(module, lambda module=module: measure_import(module, args.runs)) for module in args.modules]
+    if not args.no_commands:
+        runs += [(" ".join(argv), lambda argv=argv: measure_command(argv, args.runs)) for argv in DEFAULT_COMMANDS]
+
+    for label, measure in runs:
+        result = measure()
+        total_ms = result['total_us'] / 1000
+        totals[label] = round(total_ms, 2)
+
+        line = f"{label}: {total_ms:.1f} ms"
+        if label in previous_totals:
+            line += f" ({total_ms - previous_totals[label]:+.1f} ms vs {previous.get('revision') or 'last run'})"
+        print(line)
+
+        heavy = [name for name in HEAVY_MODULES if name in result['modules']]
+        if heavy:
+            print(f"  loads {', '.join(heavy)} at startup")
+            failed = True
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            print(f"  over the {args.budget_ms:g} ms budget")
+            failed = True
+
+        slowest = sorted(((times[0], name) for name, times in result['modules'].items() if name != label), reverse=True)
+        for self_us, name in slowest[:args.top]:
+            print(f"    {self_us / 1000:6.1f} ms  {name}")
+
+    if args.history:
+        history_dir = os.path.dirname(args.history)
+        if history_dir and not os.path.exists(history_dir):
+            os.makedirs(history_dir)
+        record = {'date': time.strftime("%Y-%m-%d %H:%M:%S"), 'revision': git_revision(),
+                  'python': sys.version.split()[0], 'totals_ms': totals}
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Appended results to {args.history}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+
+def parse_mapped_image_block(lines):
+    """
+    Parses the lines of one 'MappedImage <name>' ... 'End' block.
+    Returns {'name', 'texture', 'width', 'height', 'coords'} (missing keys are omitted).
+    """
+    image = None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(';'):
+            continue
+
+        if image is None:
+            parts = line.split()
+            if parts[0].lower() == 'mappedimage' and len(parts) >= 2:
+                image = {'name': parts[1]}
+            continue
+
+        if line.lower() == 'end':
+            break
+        if '=' not in line:
+            continue
+
+        key, value = line.split('=', 1)
+        key = key.strip().lower()
+        value = value.split(';', 1)[0].strip()
+
+        try:
+            if key == 'texture':
+                image['texture'] = value
+            elif key == 'texturewidth':
+                if value:
+                    image['width'] = int(value)
+            elif key == 'textureheight':
+                if value:
+                    image['height'] = int(value)
+            elif key == 'coords':
+                coords = {}
+                for part in value.split():
+                    if ':' in part:
+                        k, v = part.split(':', 1)
+                        if v:
+                            coords[k] = int(v)
+                image['coords'] = coords
+        except ValueError as e:
+            print(f"Warning: Error parsing line '{line}': {e}")
+
+    return image
+
+class MappedImageIndex:
+    """
+    Lazy MappedImage lookup.
+    Adding files only records name -> (file, byte offset) for each 'MappedImage' header;
+    a block is parsed the first time its name is requested and then kept.
+    Later files override earlier ones, like dict.update on fully parsed INIs.
+    Supports `name in index`, `index[name]`, `index.get(name)` and `len(index)`.
+    """
+
+    def __init__(self):
+        self.locations = {} # name -> (filepath, offset)
+        self.definitions = {} # name -> [(filepath, offset), ...], every block defining it, in index order
+        self.parsed = {} # name -> image dict
+        self.files = []
+
+    def add_file(self, filepath):
+        """Indexes every MappedImage header in a single INI/TXT file. Returns the count found."""
+        count = 0
+        offset = 0
+        try:
+            with open(filepath, 'rb') as f:
+                for raw in f:
+                    line_start = offset
+                    offset += len(raw)
+                    stripped = raw.lstrip()
+                    if stripped[:11].lower() != b'mappedimage':
+                        continue
+                    parts = stripped.split()
+                    if len(parts) >= 2 and parts[0].lower() == b'mappedimage':
+                        name = parts[1].decode('latin-1')
+                        self.locations[name] = (filepath, line_start)
+                        self.definitions.setdefault(name, []).append((filepath, line_start))
+                        self.parsed.pop(name, None)
+                        count += 1
+        except OSError as e:
+            print(f"Skipping {filepath}: {e}")
+            return 0
+
+        if count:
+            self.files.append(filepath)
+        return count
+
+    def add_path(self, root, extensions=('.ini',)):
+        """Indexes a single file, or every file with one of the extensions below a directory."""
+        if os.path.isfile(root):
+            return self.add_file(root)
+
+        count = 0
+        for dirpath, dirnames, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if filename.lower().endswith(extensions):
+                    count += self.add_file(os.path.join(dirpath, filename))
+        return count
+
+    def load(self, name):
+        """Parses (once) and returns the MappedImage called name, or None if it isn't indexed."""
+        image = self.parsed.get(name)
+        if image is not None:
+            return image
+
+        location = self.locations.get(name)
+        if location is None:
+            return None
+
+        image = self.load_location(location)
+        if image is not None:
+            self.parsed[name] = image
+        return image
+
+    def load_location(self, location):
+        """Parses the block at a (filepath, offset) location, e.g. one of the overridden definitions."""
+        filepath, offset = location
+        lines = []
+        with open(filepath, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                line = raw.decode('latin-1')
+                lines.append(line)
+                if line.strip().lower() == 'end':
+                    break
+
+        return parse_mapped_image_block(lines)
+
+    def iter_definitions(self):
+        """Yields ((filepath, offset), image) for every indexed block, overridden ones included."""
+        for name, locations in self.definitions.items():
+            for location in locations:
+                image = self.load_location(location)
+                if image is not None:
+                    yield location, image
+
+    def names(self):
+        return self.locations.keys()
+
+    def get(self, name, default=None):
+        image = self.load(name)
+        return default if image is None else image
+
+    def __contains__(self, name):
+        return name in self.locations
+
+    def __getitem__(self, name):
+        image = self.load(name)
+        if image is None:
+            raise KeyError(name)
+        return image
+
+    def __len__(self):
+        return len(self.locations)
@@ -1,6 +1,9 @@
 import re
+import argparse
 from PIL import Image, ImageDraw, ImageFont
-import random
+from scheme_index import parse_scheme_section
+from svg_colors import name_color
+from wnd_to_svg import build_scale_pyramid
 
 def parse_mapped_images(filepath, target_image_name):
     """Parses HandCreatedMappedImages.txt to find the coordinates of the target image."""
@@ -46,69 +49,62 @@ def parse_control_bar_scheme(filepath, scheme_name):
     """Parses ControlBarSchemeUSA.txt to find coordinates for the scheme."""
     offset = {'X': 0, 'Y': 0}
     rects = []
-    ul_coords = {}
-    lr_coords = {}
-    
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-        
-    in_scheme = False
-    in_image_part = False
-    
-    for line in lines:
-        raw_line = line
-        line = line.strip()
-        if not line or line.startswith(';'):
-            continue
-            
-        # Check for scheme start
-        if line.startswith("ControlBarScheme") and scheme_name in line:
-            in_scheme = True
-            continue
-            
-        if in_scheme:
-            if line == "End":
-                if in_image_part:
-                    in_image_part = False
-                    continue
-                else:
-                    in_scheme = False
-                    break # End of scheme
-            
-            if line.startswith("ImagePart"):
-                in_image_part = True
-                continue
-                
-            if in_image_part:
-                # Parse Position
-                # Position X:0 Y:408
-                if line.lower().startswith("position"):
-                    pos_match = re.search(r"X:(\d+)\s+Y:(\d+)", line, re.IGNORECASE)
-                    if pos_match:
-                        offset['X'] = int(pos_match.group(1))
-                        offset['Y'] = int(pos_match.group(2))
-            else:
-                # Parse UL/LR
-                # NameUL X:123 Y:456
-                ul_match = re.search(r"(\w+)UL\s+X:(\d+)\s+Y:(\d+)", line)
-                if ul_match:
-                    name = ul_match.group(1)
-                    ul_coords[name] = (int(ul_match.group(2)), int(ul_match.group(3)))
-                    
-                lr_match = re.search(r"(\w+)LR\s+X:(\d+)\s+Y:(\d+)", line)
-                if lr_match:
-                    name = lr_match.group(1)
-                    lr_coords[name] = (int(lr_match.group(2)), int(lr_match.group(3)))
     
+    section = parse_scheme_section(filepath, scheme_name)
+    if section is None:
+        return offset, rects
+
+    image_part = section['image_part'] or {}
+    if 'x' in image_part:
+        offset['X'] = image_part['x']
+        offset['Y'] = image_part['y']
+
     # Pair them up
-    for name, ul in ul_coords.items():
-        if name in lr_coords:
-            lr = lr_coords[name]
-            rects.append({'name': name, 'UL': ul, 'LR': lr})
+    for name, corners in section['corners'].items():
+        if 'UL' in corners and 'LR' in corners:
+            rects.append({'name': name, 'UL': corners['UL'], 'LR': corners['LR']})
                 
     return offset, rects
 
+def draw_overlay(img, draw_data, font, scale=1):
+    """Draws the outlined, labeled rects onto img, with rect coordinates multiplied by scale."""
+    draw = ImageDraw.Draw(img)
+    for item in draw_data:
+        x1, y1, x2, y2 = (round(item[k] * scale) for k in ('x1', 'y1', 'x2', 'y2'))
+        color = item['color']
+        text = item['name']
+        
+        # Draw hollow rectangle (outline only)
+        draw.rectangle([x1, y1, x2, y2], outline=color, width=2)
+        
+        # Calculate center
+        center_x = (x1 + x2) / 2
+        center_y = (y1 + y2) / 2
+        
+        # Use textbbox to get text size
+        if hasattr(draw, 'textbbox'):
+            bbox = draw.textbbox((0, 0), text, font=font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+        else:
+            text_width, text_height = draw.textsize(text, font=font)
+            
+        text_x = center_x - (text_width / 2)
+        text_y = center_y - (text_height / 2)
+        
+        # Draw text
+        draw.text((text_x, text_y), text, fill="white", font=font)
+
+def overlay_png_path(scale):
+    """output_overlay.png at 1x, output_overlay_<scale>x.png otherwise."""
+    return "output_overlay.png" if scale == 1 else f"output_overlay_{scale:g}x.png"
+
 def main():
+    parser = argparse.ArgumentParser(description="Draws a control bar scheme's rects over its base image")
+    parser.add_argument("--scales", nargs='+', type=float, default=[1],
+                        help="Write the PNG overlay at these scales of the base image (e.g. 1 2 4); the crop is resampled once per scale")
+    args = parser.parse_args()
+
     mapped_images_file = "HandCreatedMappedImages.txt"
     control_scheme_file = "ControlBarSchemeUSA.txt"
     target_image_name = "InGameUIAmericaBase"
@@ -173,9 +169,8 @@ def main():
         x2 = lr[0] - offset['X']
         y2 = lr[1] - offset['Y']
         
-        # Generate a random color for outline
-        # Make it fully opaque for the outline
-        color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255), 255)
+        # Stable color from the name, fully opaque for the outline
+        color = name_color(rect['name']) + (255,)
         
         draw_data.append({
             'name': rect['name'],
@@ -183,9 +178,7 @@ def main():
             'color': color
         })
 
-    # 5. Draw PNG
-    draw = ImageDraw.Draw(cropped_img)
-    
+    # 5. Draw PNG at every scale
     try:
         # Try to load a standard font
         font = ImageFont.truetype("arial.ttf", 12)
@@ -193,35 +186,12 @@ def main():
         # Fallback to default font if arial is not found
         font = ImageFont.load_default()
         
-    for item in draw_data:
-        x1, y1, x2, y2 = item['x1'], item['y1'], item['x2'], item['y2']
-        color = item['color']
-        text = item['name']
-        
-        # Draw hollow rectangle (outline only)
-        draw.rectangle([x1, y1, x2, y2], outline=color, width=2)
-        
-        # Calculate center
-        center_x = (x1 + x2) / 2
-        center_y = (y1 + y2) / 2
-        
-        # Use textbbox to get text size
-        if hasattr(draw, 'textbbox'):
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-        else:
-            text_width, text_height = draw.textsize(text, font=font)
-            
-        text_x = center_x - (text_width / 2)
-        text_y = center_y - (text_height / 2)
-        
-        # Draw text
-        draw.text((text_x, text_y), text, fill="white", font=font)
-
-    # Save PNG Output
-    cropped_img.save("output_overlay.png")
-    print("Saved output_overlay.png")
+    for scale, level in build_scale_pyramid(cropped_img, cropped_img.size, args.scales).items():
+        # Levels can share the crop; don't draw twice onto the same image
+        level = level.copy()
+        draw_overlay(level, draw_data, font, scale)
+        level.save(overlay_png_path(scale))
+        print(f"Saved {overlay_png_path(scale)}")
 
     # 6. Generate SVG
     svg_width = cropped_img.width
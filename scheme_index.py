@@ -0,0 +1,151 @@
+import os
+import re
+
+# Nested blocks inside a ControlBarScheme that are closed by their own 'End'
+NESTED_BLOCKS = ('imagepart', 'animatingpart')
+
+# One compiled dispatcher for every key we care about inside a scheme section.
+# The alternatives are tried in order, so corners win over button mappings.
+KEY_PATTERN = re.compile(r"""
+    (?P<corner>(?P<corner_name>\w+?)(?P<corner_kind>UL|LR)\s+X:(?P<corner_x>-?\d+)\s+Y:(?P<corner_y>-?\d+))
+  | (?P<res>ScreenCreationRes\s+X:(?P<res_x>\d+)\s+Y:(?P<res_y>\d+))
+  | (?P<position>(?i:Position)\s+X:(?P<pos_x>-?\d+)\s+Y:(?P<pos_y>-?\d+))
+  | (?P<size>(?i:Size)\s+X:(?P<size_x>\d+)\s+Y:(?P<size_y>\d+))
+  | (?P<image_name>ImageName\s+(?P<image_name_value>\S+))
+  | (?P<button>(?P<button_name>\w*?)Button(?P<button_state>\w*)\s+(?P<button_image>\S+))
+""", re.VERBOSE)
+
+_index_cache = {}  # abspath -> (mtime_ns, size, index)
+
+def build_section_index(filepath):
+    """
+    Scans a ControlBarScheme file once and records the byte range of every
+    'ControlBarScheme <name>' ... 'End' section.
+    Returns a dict of lowercased-name -> {'name', 'start', 'end'}.
+    """
+    abs_path = os.path.abspath(filepath)
+    st = os.stat(abs_path)
+    cached = _index_cache.get(abs_path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    index = {}
+    current = None
+    depth = 0
+    offset = 0
+
+    with open(abs_path, 'rb') as f:
+        for raw in f:
+            line_start = offset
+            offset += len(raw)
+
+            stripped = raw.decode('latin-1').split(';', 1)[0].strip()
+            if not stripped:
+                continue
+            lowered = stripped.lower()
+
+            if current is None:
+                if lowered.startswith('controlbarscheme'):
+                    parts = stripped.split()
+                    if len(parts) >= 2:
+                        current = {'name': parts[1], 'start': line_start, 'end': None}
+                        depth = 0
+                continue
+
+            if lowered.split()[0] in NESTED_BLOCKS:
+                depth += 1
+            elif lowered == 'end':
+                if depth > 0:
+                    depth -= 1
+                else:
+                    current['end'] = offset
+                    # First definition wins, like the old line-by-line scans
+                    index.setdefault(current['name'].lower(), current)
+                    current = None
+
+    # Unterminated section at EOF
+    if current is not None:
+        current['end'] = offset
+        index.setdefault(current['name'].lower(), current)
+
+    _index_cache[abs_path] = (st.st_mtime_ns, st.st_size, index)
+    return index
+
+def read_section_lines(filepath, section_name):
+    """Seeks to a single section and returns its lines, or None if it is not indexed."""
+    entry = build_section_index(filepath).get(section_name.lower())
+    if entry is None:
+        return None
+
+    with open(filepath, 'rb') as f:
+        f.seek(entry['start'])
+        data = f.read(entry['end'] - entry['start'])
+    return data.decode('latin-1').splitlines()
+
+def parse_scheme_section(filepath, section_name):
+    """
+    Parses one ControlBarScheme section using the section index.
+    Returns None if the section does not exist, otherwise a dict with:
+      'name', 'screen_res' {'x','y'} (or None), 'corners' {Name: {'UL': (x,y), 'LR': (x,y)}},
+      'buttons' {Name: {State: ImageName}}, 'image_part' {'x','y','width','height','name'} (or None)
+    """
+    lines = read_section_lines(filepath, section_name)
+    if lines is None:
+        return None
+
+    section = {
+        'name': build_section_index(filepath)[section_name.lower()]['name'],
+        'screen_res': None,
+        'corners': {},
+        'buttons': {},
+        'image_part': None,
+    }
+    depth = 0
+    in_image_part = False
+
+    # Skip the header line; the final 'End' closes depth 0 and is ignored
+    for line in lines[1:]:
+        stripped = line.split(';', 1)[0].strip()
+        if not stripped:
+            continue
+        lowered = stripped.lower()
+
+        if lowered == 'imagepart':
+            depth += 1
+            in_image_part = True
+            section['image_part'] = {}
+            continue
+        if lowered.split()[0] in NESTED_BLOCKS:
+            depth += 1
+            continue
+        if lowered == 'end':
+            if depth > 0:
+                depth -= 1
+                in_image_part = False
+            continue
+
+        m = KEY_PATTERN.match(stripped)
+        if not m:
+            continue
+        kind = m.lastgroup
+
+        if in_image_part:
+            image_part = section['image_part']
+            if kind == 'position':
+                image_part['x'] = int(m.group('pos_x'))
+                image_part['y'] = int(m.group('pos_y'))
+            elif kind == 'size':
+                image_part['width'] = int(m.group('size_x'))
+                image_part['height'] = int(m.group('size_y'))
+            elif kind == 'image_name':
+                image_part['name'] = m.group('image_name_value')
+        elif kind == 'corner':
+            corner = section['corners'].setdefault(m.group('corner_name'), {})
+            corner[m.group('corner_kind').upper()] = (int(m.group('corner_x')), int(m.group('corner_y')))
+        elif kind == 'res':
+            section['screen_res'] = {'x': int(m.group('res_x')), 'y': int(m.group('res_y'))}
+        elif kind == 'button':
+            states = section['buttons'].setdefault(m.group('button_name'), {})
+            states[m.group('button_state')] = m.group('button_image')
+
+    return section
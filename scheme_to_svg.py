@@ -1,178 +1,38 @@
 import re
 import os
-import random
 import argparse
 import xml.etree.ElementTree as ET
-from PIL import Image
-
-def parse_ini(filepath):
-    """Parses an INI file for MappedImage definitions."""
-    mapped_images = {}
-    if not os.path.exists(filepath):
-        print(f"Warning: File {filepath} not found.")
-        return mapped_images
-
-    with open(filepath, 'r') as f:
-        content = f.read()
-
-    current_image = None
-    
-    for line in content.splitlines():
-        line = line.strip()
-        if not line or line.startswith(';'):
-            continue
-            
-        if line.lower().startswith('mappedimage'):
-            parts = line.split()
-            if len(parts) >= 2:
-                image_name = parts[1]
-                current_image = {'name': image_name}
-        elif line.lower() == 'end':
-            if current_image:
-                mapped_images[current_image['name']] = current_image
-                current_image = None
-        elif current_image:
-            if '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip().lower()
-                value = value.strip()
-                
-                try:
-                    if key == 'texture':
-                        current_image['texture'] = value
-                    elif key == 'texturewidth':
-                        if value:
-                            current_image['width'] = int(value)
-                    elif key == 'textureheight':
-                        if value:
-                            current_image['height'] = int(value)
-                    elif key == 'coords':
-                        coords = {}
-                        parts = value.split()
-                        for part in parts:
-                            if ':' in part:
-                                k, v = part.split(':')
-                                if v:
-                                    coords[k] = int(v)
-                        current_image['coords'] = coords
-                except ValueError as e:
-                    print(f"Warning: Error parsing line '{line}': {e}")
-
-    return mapped_images
+from scheme_index import parse_scheme_section
+from mapped_image_index import MappedImageIndex
+from atomic_write import atomic_write, write_if_changed
+from svg_colors import name_rgb
 
 def parse_control_scheme(filepath, section_name):
     """Parses a specific ControlBarScheme section from the INI file."""
-    base_image = None
-    
     if not os.path.exists(filepath):
         print(f"Error: File {filepath} not found.")
         return [], {}, {'x': 800, 'y': 600}
 
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-        
-    button_mappings = {} # ButtonName -> {State: ImageName}
-    button_positions = {} # ButtonName -> {UL: (x,y), LR: (x,y)}
-    
-    in_target_section = False
-    in_image_part = False
-    
-    # Parse ScreenCreationRes
-    screen_res = {'x': 800, 'y': 600} # Default
+    section = parse_scheme_section(filepath, section_name)
+    if section is None:
+        return [], None, {'x': 800, 'y': 600}
+    print(f"Found section: {section['name']}")
 
-    for line in lines:
-        stripped_line = line.strip()
-        if not stripped_line or stripped_line.startswith(';'):
-            continue
-            
-        # Check for Section Start
-        if stripped_line.lower().startswith('controlbarscheme'):
-            parts = stripped_line.split()
-            if len(parts) >= 2:
-                current_scheme = parts[1]
-                if current_scheme.lower() == section_name.lower():
-                    in_target_section = True
-                    print(f"Found section: {current_scheme}")
-                    continue
-                else:
-                    in_target_section = False
-        
-        if not in_target_section:
-            continue
-
-        # Check for Section End
-        if stripped_line.lower() == 'end' and not in_image_part:
-            in_target_section = False
-            break # We found and parsed our section, we are done
-            
-        if stripped_line.startswith('ScreenCreationRes'):
-             match = re.search(r"X:(\d+)\s+Y:(\d+)", stripped_line)
-             if match:
-                 screen_res['x'] = int(match.group(1))
-                 screen_res['y'] = int(match.group(2))
-
-        # Parse Button Mappings
-        # Look for *Button*
-        if 'Button' in stripped_line and len(stripped_line.split()) >= 2:
-            parts = stripped_line.split()
-            key_part = parts[0]
-            image_name = parts[1]
-            
-            # Split key_part into ButtonName and State
-            if 'Button' in key_part:
-                name, state = key_part.split('Button', 1)
-                
-                # Handle aliases/inconsistencies
-                if name == 'IdleWorker':
-                    name = 'Worker'
-                elif name == 'Buddy':
-                    name = 'Chat'
-                
-                if name not in button_mappings:
-                    button_mappings[name] = {}
-                button_mappings[name][state] = image_name
-                
-        # Parse Positions
-        if stripped_line.endswith('UL') or 'UL ' in stripped_line:
-             match = re.search(r"(\w+)UL\s+X:(\d+)\s+Y:(\d+)", stripped_line)
-             if match:
-                 name = match.group(1)
-                 if name not in button_positions: button_positions[name] = {}
-                 button_positions[name]['UL'] = (int(match.group(2)), int(match.group(3)))
+    screen_res = section['screen_res'] or {'x': 800, 'y': 600} # Default
 
-        if stripped_line.endswith('LR') or 'LR ' in stripped_line:
-             match = re.search(r"(\w+)LR\s+X:(\d+)\s+Y:(\d+)", stripped_line)
-             if match:
-                 name = match.group(1)
-                 if name not in button_positions: button_positions[name] = {}
-                 button_positions[name]['LR'] = (int(match.group(2)), int(match.group(3)))
+    button_mappings = {} # ButtonName -> {State: ImageName}
+    for name, states in section['buttons'].items():
+        # Handle aliases/inconsistencies
+        if name == 'IdleWorker':
+            name = 'Worker'
+        elif name == 'Buddy':
+            name = 'Chat'
+        button_mappings.setdefault(name, {}).update(states)
 
-        # Parse Base Image
-        if stripped_line == 'ImagePart':
-            in_image_part = True
-            base_image = {}
-        elif stripped_line == 'End' and in_image_part:
-            in_image_part = False
-        elif in_image_part:
-            if stripped_line.startswith('Position'):
-                match = re.search(r"X:(\d+)\s+Y:(\d+)", stripped_line)
-                if match:
-                    base_image['x'] = int(match.group(1))
-                    base_image['y'] = int(match.group(2))
-            elif stripped_line.startswith('Size'):
-                match = re.search(r"X:(\d+)\s+Y:(\d+)", stripped_line)
-                if match:
-                    base_image['width'] = int(match.group(1))
-                    base_image['height'] = int(match.group(2))
-            elif stripped_line.startswith('ImageName'):
-                parts = stripped_line.split()
-                if len(parts) > 1:
-                    base_image['name'] = parts[1]
-                
     # Combine mappings and positions
     # We want ALL positions, even if they don't have button mappings
     final_rects = []
-    for name, pos in button_positions.items():
+    for name, pos in section['corners'].items():
         if 'UL' in pos and 'LR' in pos:
             rect_info = {
                 'name': name,
@@ -184,10 +44,10 @@ def parse_control_scheme(filepath, section_name):
             }
             final_rects.append(rect_info)
             
-    return final_rects, base_image, screen_res
+    return final_rects, section['image_part'], screen_res
 
-def extract_and_save_image(image_info, output_dir):
-    """Crops and saves the image."""
+def extract_and_save_image(image_info, output_dir, texture_cache=None):
+    """Crops and saves the image. Opened textures are reused through texture_cache (path -> texture)."""
     texture_file = image_info['texture']
     
     # helper to find file with fallbacks
@@ -245,8 +105,10 @@ def extract_and_save_image(image_info, output_dir):
         print(f"Error: Texture file {texture_file} not found for {image_info['name']}")
         return None
 
+    # Loads PIL and numpy; the update path never gets here
+    from dds_texture import open_texture
     try:
-        img = Image.open(texture_file)
+        img = open_texture(texture_file, texture_cache)
     except Exception as e:
         print(f"Error opening {texture_file}: {e}")
         return None
@@ -268,20 +130,12 @@ def extract_and_save_image(image_info, output_dir):
     cropped.save(output_path)
     return output_path
 
-import colorsys
-
-def random_color():
-    """Generates a random RGB color string with high saturation (>= 70%)."""
-    h = random.random()
-    s = random.uniform(0.7, 1.0) # Saturation at least 70%
-    l = random.uniform(0.4, 0.6) # Lightness around 50% for good visibility
-    
-    r, g, b = colorsys.hls_to_rgb(h, l, s)
-    
-    return f"rgb({int(r*255)},{int(g*255)},{int(b*255)})"
-
-def generate_svg(rects, base_image_info, mapped_images, output_dir, output_file, screen_res):
-    """Generates the SVG file."""
+def generate_svg(rects, base_image_info, mapped_images, output_dir, output_file, screen_res, scales=None):
+    """
+    Generates the SVG file.
+    With scales, every referenced image is written at each Coords scale in one pass per texture
+    (see wnd_to_svg.extract_scaled_images) and the SVG links the largest, sized to its Coords.
+    """
     width = screen_res.get('x', 800)
     height = screen_res.get('y', 600)
     
@@ -293,16 +147,36 @@ def generate_svg(rects, base_image_info, mapped_images, output_dir, output_file,
         '  </style>'
     ]
     
+    texture_cache = {}
+
+    scaled_paths = {}
+    if scales:
+        from wnd_to_svg import scan_textures, extract_scaled_images
+        used = {image_name for rect in rects for image_name in rect['states'].values()}
+        if base_image_info and base_image_info.get('name'):
+            used.add(base_image_info['name'])
+        texture_map = scan_textures(os.path.join("Art", "Textures"))
+        scaled_paths = extract_scaled_images(mapped_images, sorted(name for name in used if name in mapped_images),
+                                             output_dir, texture_map, scales, texture_cache)
+
+    def image_path(name):
+        """Returns (path, size attributes) for a MappedImage, or (None, '')."""
+        if name in scaled_paths:
+            coords = mapped_images[name]['coords']
+            return scaled_paths[name][max(scales)], f' width="{coords["Right"] - coords["Left"]}" height="{coords["Bottom"] - coords["Top"]}"'
+        # Unscaled, or only found through the loose-file fallbacks
+        return extract_and_save_image(mapped_images[name], output_dir, texture_cache), ''
+
     # Add Base Image
     if base_image_info:
         name = base_image_info.get('name')
         if name and name in mapped_images:
             print(f"Processing Base Image: {name}")
-            saved_path = extract_and_save_image(mapped_images[name], output_dir)
+            saved_path, size = image_path(name)
             if saved_path:
                 rel_path = saved_path.replace('\\', '/')
                 # Use ImagePart Position for the image placement
-                svg_lines.append(f'  <image href="{rel_path}" x="{base_image_info["x"]}" y="{base_image_info["y"]}" />')
+                svg_lines.append(f'  <image href="{rel_path}" x="{base_image_info["x"]}" y="{base_image_info["y"]}"{size} />')
         else:
             print(f"Warning: Base image {name} not found in mapped images or name is missing.")
             
@@ -328,11 +202,11 @@ def generate_svg(rects, base_image_info, mapped_images, output_dir, output_file,
             for state in sorted_states:
                 image_name = states[state]
                 if image_name in mapped_images:
-                    saved_path = extract_and_save_image(mapped_images[image_name], output_dir)
+                    saved_path, size = image_path(image_name)
                     if saved_path:
                         rel_path = saved_path.replace('\\', '/')
                         visibility = 'visible' if state == 'Enable' else 'hidden'
-                        svg_lines.append(f'    <image id="{rect["name"]}_{state}" href="{rel_path}" x="{rect["x"]}" y="{rect["y"]}" visibility="{visibility}" />')
+                        svg_lines.append(f'    <image id="{rect["name"]}_{state}" href="{rel_path}" x="{rect["x"]}" y="{rect["y"]}"{size} visibility="{visibility}" />')
                 else:
                     print(f"Warning: Image {image_name} for button {rect['name']} state {state} not found.")
         else:
@@ -341,17 +215,17 @@ def generate_svg(rects, base_image_info, mapped_images, output_dir, output_file,
             center_y = rect['y'] + rect['height'] / 2
             svg_lines.append(f'    <text x="{center_x}" y="{center_y}">{rect["name"]}</text>')
 
-        # Add Rect on top with random color
-        color = random_color()
+        # Add Rect on top with a color derived from its name
+        color = name_rgb(rect['name'])
         svg_lines.append(f'    <rect id="{rect["name"]}_rect" x="{rect["x"]}" y="{rect["y"]}" width="{rect["width"]}" height="{rect["height"]}" fill="{color}" fill-opacity="0.25" />')
         svg_lines.append('  </g>')
             
     svg_lines.append('</svg>')
     
-    with open(output_file, "w") as f:
-        f.write('\n'.join(svg_lines))
-        
-    print(f"Done. Saved {output_file}")
+    if write_if_changed(output_file, '\n'.join(svg_lines)):
+        print(f"Done. Saved {output_file}")
+    else:
+        print(f"Done. {output_file} unchanged")
 
 def update_control_scheme_from_svg(svg_path, scheme_path, section_name, output_path=None):
     """Updates the ControlBarScheme section in the INI file based on SVG rect coordinates."""
@@ -511,48 +385,10 @@ def update_control_scheme_from_svg(svg_path, scheme_path, section_name, output_p
         base, ext = os.path.splitext(scheme_path)
         output_path = f"{base}-updated{ext}"
     
-    with open(output_path, 'w') as f:
-        f.writelines(new_lines)
+    atomic_write(output_path, "".join(new_lines))
         
     print(f"Saved updated scheme to {output_path}")
 
-def load_all_mapped_images(root_dirs):
-    """Recursively loads all MappedImages from INI files in the given directories."""
-    all_mapped_images = {}
-    
-    for root_dir in root_dirs:
-        if not os.path.exists(root_dir):
-            continue
-            
-        # Walk through directory
-        if os.path.isdir(root_dir):
-            for dirpath, dirnames, filenames in os.walk(root_dir):
-                for filename in filenames:
-                    if filename.lower().endswith('.ini') or filename.lower().endswith('.txt'):
-                        filepath = os.path.join(dirpath, filename)
-                        # We try to parse everything that looks like an INI/TXT
-                        # parse_ini handles the content check (looking for MappedImage)
-                        try:
-                            # optimization: quick check if file contains 'MappedImage' before full parse
-                            with open(filepath, 'r', errors='ignore') as f:
-                                if 'mappedimage' in f.read().lower():
-                                    print(f"Loading images from {filepath}...")
-                                    images = parse_ini(filepath)
-                                    all_mapped_images.update(images)
-                        except Exception as e:
-                            print(f"Skipping {filepath}: {e}")
-                            
-        elif os.path.isfile(root_dir):
-            # Single file
-             try:
-                print(f"Loading images from {root_dir}...")
-                images = parse_ini(root_dir)
-                all_mapped_images.update(images)
-             except Exception as e:
-                print(f"Skipping {root_dir}: {e}")
-
-    return all_mapped_images
-
 def main():
     parser = argparse.ArgumentParser(description="Overlay Generator and Updater")
     parser.add_argument('--generate', action='store_true', help="Generate SVG from INI/TXT")
@@ -561,6 +397,7 @@ def main():
     parser.add_argument('--svg', help="SVG file path")
     parser.add_argument('--scheme', required=True, help="ControlBarScheme Section Name (e.g. GLA8x6)")
     parser.add_argument('--scheme-file', default="INI/ControlBarScheme.ini", help="Control Bar Scheme file path (default: INI/ControlBarScheme.ini)")
+    parser.add_argument('--scales', nargs='+', type=float, help="Also write images at these Coords scales (e.g. 1 2 4) into extracted_images/<scale>x/")
     
     args = parser.parse_args()
     
@@ -577,22 +414,19 @@ def main():
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
             
-        print("Scanning for Mapped Images...")
+        print("Indexing Mapped Images...")
+        # Only the headers are indexed here; each MappedImage block is parsed
+        # the first time the scheme actually references it.
+        mapped_images = MappedImageIndex()
         # Explicitly load local HandCreatedMappedImages.txt if it exists
-        mapped_images = {}
         if os.path.exists("HandCreatedMappedImages.txt"):
-             print("Loading HandCreatedMappedImages.txt...")
-             mapped_images.update(parse_ini("HandCreatedMappedImages.txt"))
+             mapped_images.add_file("HandCreatedMappedImages.txt")
 
         # Search INI and MappedImages directories
-        search_dirs = []
-        if os.path.exists('INI'):
-            search_dirs.append('INI')
-        if os.path.exists('MappedImages'):
-            search_dirs.append('MappedImages')
-            
-        mapped_images.update(load_all_mapped_images(search_dirs))
-        print(f"Loaded {len(mapped_images)} mapped images total.")
+        for search_dir in ('INI', 'MappedImages'):
+            if os.path.exists(search_dir):
+                mapped_images.add_path(search_dir, extensions=('.ini', '.txt'))
+        print(f"Indexed {len(mapped_images)} mapped images total.")
         
         print(f"Parsing Control Scheme Section '{args.scheme}' from {args.scheme_file}...")
         rects, base_image_info, screen_res = parse_control_scheme(args.scheme_file, args.scheme)
@@ -600,7 +434,7 @@ def main():
         if not rects and not base_image_info:
             print(f"No data found for section '{args.scheme}'. Please check the name.")
         else:
-            generate_svg(rects, base_image_info, mapped_images, output_dir, args.svg, screen_res)
+            generate_svg(rects, base_image_info, mapped_images, output_dir, args.svg, screen_res, args.scales)
         
     if args.update or args.updatenew:
         output_path = None
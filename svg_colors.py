@@ -0,0 +1,19 @@
+import hashlib
+import colorsys
+
+def name_color(name):
+    """
+    Returns a stable (r, g, b) for a window or scheme entry name: hue, saturation (>= 70%) and
+    lightness (40-60%) are taken from a hash of the name, so regenerating an unchanged layout
+    gives the same colors and the same SVG bytes.
+    """
+    digest = hashlib.md5((name or "").encode('utf-8')).digest()
+    h = int.from_bytes(digest[:4], 'big') / 2**32
+    s = 0.7 + 0.3 * digest[4] / 255
+    l = 0.4 + 0.2 * digest[5] / 255
+    r, g, b = colorsys.hls_to_rgb(h, l, s)
+    return int(r * 255), int(g * 255), int(b * 255)
+
+def name_rgb(name):
+    """name_color as an SVG rgb() string."""
+    return "rgb({},{},{})".format(*name_color(name))
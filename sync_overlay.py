@@ -2,8 +2,9 @@ import re
 import argparse
 import math
 import xml.etree.ElementTree as ET
-from PIL import Image, ImageDraw, ImageFont
-import random
+from scheme_index import parse_scheme_section
+from atomic_write import atomic_write, write_if_changed
+from svg_colors import name_color
 
 def parse_matrix(matrix_str):
     """Parses an SVG matrix string 'matrix(a,b,c,d,e,f)' into a list of floats."""
@@ -185,72 +186,29 @@ def parse_control_bar_scheme(filepath, scheme_name):
     screen_res = {'X': 800, 'Y': 600} # Default
     image_part_info = {'Position': {'X': 0, 'Y': 0}, 'Size': {'X': 0, 'Y': 0}}
     rects = []
-    ul_coords = {}
-    lr_coords = {}
     
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-        
-    in_scheme = False
-    in_image_part = False
-    
-    for line in lines:
-        line = line.strip()
-        if not line or line.startswith(';'):
-            continue
-            
-        if line.startswith("ControlBarScheme") and scheme_name in line:
-            in_scheme = True
-            continue
-            
-        if in_scheme:
-            if line.startswith("ScreenCreationRes"):
-                res_match = re.search(r"X:(\d+)\s+Y:(\d+)", line)
-                if res_match:
-                    screen_res['X'] = int(res_match.group(1))
-                    screen_res['Y'] = int(res_match.group(2))
-                continue
-            if line == "End":
-                if in_image_part:
-                    in_image_part = False
-                    continue
-                else:
-                    in_scheme = False
-                    break
-            
-            if line.startswith("ImagePart"):
-                in_image_part = True
-                continue
-                
-            if in_image_part:
-                if line.lower().startswith("position"):
-                    pos_match = re.search(r"X:(\d+)\s+Y:(\d+)", line, re.IGNORECASE)
-                    if pos_match:
-                        offset['X'] = int(pos_match.group(1))
-                        offset['Y'] = int(pos_match.group(2))
-                        image_part_info['Position']['X'] = offset['X']
-                        image_part_info['Position']['Y'] = offset['Y']
-                
-                if line.lower().startswith("size"):
-                    size_match = re.search(r"X:(\d+)\s+Y:(\d+)", line, re.IGNORECASE)
-                    if size_match:
-                        image_part_info['Size']['X'] = int(size_match.group(1))
-                        image_part_info['Size']['Y'] = int(size_match.group(2))
-            else:
-                ul_match = re.search(r"(\w+)UL\s+X:(\d+)\s+Y:(\d+)", line)
-                if ul_match:
-                    name = ul_match.group(1)
-                    ul_coords[name] = (int(ul_match.group(2)), int(ul_match.group(3)))
-                    
-                lr_match = re.search(r"(\w+)LR\s+X:(\d+)\s+Y:(\d+)", line)
-                if lr_match:
-                    name = lr_match.group(1)
-                    lr_coords[name] = (int(lr_match.group(2)), int(lr_match.group(3)))
-    
-    for name, ul in ul_coords.items():
-        if name in lr_coords:
-            lr = lr_coords[name]
-            rects.append({'name': name, 'UL': ul, 'LR': lr})
+    section = parse_scheme_section(filepath, scheme_name)
+    if section is None:
+        return offset, rects, screen_res, image_part_info
+
+    if section['screen_res']:
+        screen_res['X'] = section['screen_res']['x']
+        screen_res['Y'] = section['screen_res']['y']
+
+    image_part = section['image_part'] or {}
+    if 'x' in image_part:
+        offset['X'] = image_part['x']
+        offset['Y'] = image_part['y']
+        image_part_info['Position']['X'] = offset['X']
+        image_part_info['Position']['Y'] = offset['Y']
+    if 'width' in image_part:
+        image_part_info['Size']['X'] = image_part['width']
+        image_part_info['Size']['Y'] = image_part['height']
+
+    # Pair them up
+    for name, corners in section['corners'].items():
+        if 'UL' in corners and 'LR' in corners:
+            rects.append({'name': name, 'UL': corners['UL'], 'LR': corners['LR']})
                 
     return offset, rects, screen_res, image_part_info
 
@@ -353,11 +311,13 @@ def update_control_scheme(scheme_filepath, svg_filepath, output_filepath, scheme
         
         new_lines.append(original_line)
         
-    with open(output_filepath, 'w') as f:
-        f.writelines(new_lines)
+    atomic_write(output_filepath, "".join(new_lines))
     print(f"Updated scheme written to {output_filepath}")
 
 def generate_overlay(mapped_images_file, control_scheme_file, scheme_name, target_image_name):
+    # Only the overlay needs PIL, so --update runs skip importing it
+    from PIL import Image, ImageDraw, ImageFont
+
     # 1. Parse Mapped Images
     texture_file, texture_coords = parse_mapped_images(mapped_images_file, target_image_name)
     if not texture_file or not texture_coords:
@@ -404,7 +364,7 @@ def generate_overlay(mapped_images_file, control_scheme_file, scheme_name, targe
         x2_svg = lr[0]
         y2_svg = lr[1]
         
-        color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255), 255)
+        color = name_color(rect['name']) + (255,)
         
         draw_data.append({
             'name': rect['name'],
@@ -490,9 +450,10 @@ def generate_overlay(mapped_images_file, control_scheme_file, scheme_name, targe
         
     svg_lines.append('</svg>')
     
-    with open("output_overlay.svg", "w") as f:
-        f.write('\n'.join(svg_lines))
-    print("Saved output_overlay.svg")
+    if write_if_changed("output_overlay.svg", '\n'.join(svg_lines)):
+        print("Saved output_overlay.svg")
+    else:
+        print("output_overlay.svg unchanged")
 
 def main():
     parser = argparse.ArgumentParser(description="Bidirectional sync between ControlBarScheme and SVG.")
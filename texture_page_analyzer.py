@@ -0,0 +1,157 @@
+import os
+import argparse
+from collections import Counter
+
+import numpy as np
+from PIL import Image
+
+from mapped_image_index import MappedImageIndex
+from wnd_to_svg import scan_textures, find_texture_path
+
+def group_by_texture(mapped_images):
+    """
+    Loads every MappedImage and groups them per texture page.
+    Returns {texture_lower: {'texture', 'width', 'height', 'names', 'rects'}} where rects is an
+    (N, 4) int32 array of (left, top, right, bottom) in TextureWidth/TextureHeight units.
+    """
+    pages = {}
+    for name in mapped_images.names():
+        image = mapped_images.get(name)
+        if not image or 'texture' not in image or 'coords' not in image:
+            continue
+        coords = image['coords']
+        if not all(k in coords for k in ('Left', 'Top', 'Right', 'Bottom')):
+            continue
+        page = pages.setdefault(image['texture'].lower(), {'texture': image['texture'], 'sizes': Counter(), 'names': [], 'rects': []})
+        page['sizes'][(image.get('width', 0), image.get('height', 0))] += 1
+        page['names'].append(name)
+        page['rects'].append((coords['Left'], coords['Top'], coords['Right'], coords['Bottom']))
+
+    for page in pages.values():
+        # Pages are normally declared with one size; use the most common if entries disagree
+        page['width'], page['height'] = page.pop('sizes').most_common(1)[0][0]
+        page['rects'] = np.array(page['rects'], dtype=np.int32).reshape(-1, 4)
+    return pages
+
+def find_overlaps(rects):
+    """
+    Sweep-line over the x axis: rects are visited by Left, and only the ones still 'open'
+    at that x are tested for y overlap. Returns a list of (i, j, overlap_area).
+    """
+    order = np.argsort(rects[:, 0], kind='stable')
+    active = []
+    overlaps = []
+    for i in order:
+        left, top, right, bottom = rects[i]
+        active = [j for j in active if rects[j, 2] > left]
+        for j in active:
+            o_top = max(top, rects[j, 1])
+            o_bottom = min(bottom, rects[j, 3])
+            if o_bottom > o_top:
+                o_width = min(right, rects[j, 2]) - left
+                if o_width > 0:
+                    overlaps.append((int(min(i, j)), int(max(i, j)), int(o_width * (o_bottom - o_top))))
+        active.append(i)
+    return overlaps
+
+def coverage_map(rects, width, height):
+    """Returns an (height, width) uint16 array counting how many rects cover each texel."""
+    counts = np.zeros((max(height, 1), max(width, 1)), dtype=np.uint16)
+    clipped = np.clip(rects, 0, [width, height, width, height])
+    for left, top, right, bottom in clipped:
+        if right > left and bottom > top:
+            counts[top:bottom, left:right] += 1
+    return counts
+
+def render_heatmap(counts, output_path, texture_path=None):
+    """
+    Writes a heatmap of a page: empty texels dark, single use green, overlaps red.
+    When the texture is available it is shown underneath, scaled to the INI page size.
+    """
+    height, width = counts.shape
+    heat = np.zeros((height, width, 3), dtype=np.uint8)
+    if texture_path:
+        try:
+            with Image.open(texture_path) as texture:
+                base = np.asarray(texture.convert('RGB').resize((width, height)))
+            heat[:] = base // 3
+        except Exception as e:
+            print(f"Error opening {texture_path}: {e}")
+
+    used = counts == 1
+    overlap = counts > 1
+    heat[used] = heat[used] // 2 + np.array([0, 110, 0], dtype=np.uint8)
+    heat[overlap] = np.array([255, 0, 0], dtype=np.uint8)
+    Image.fromarray(heat, 'RGB').save(output_path)
+
+def analyze_pages(pages, texture_map, output_dir, heatmaps=True):
+    """Analyzes every page and returns a list of per-page result dicts, worst coverage first."""
+    results = []
+    for key, page in sorted(pages.items()):
+        width, height = page['width'], page['height']
+        rects = page['rects']
+        counts = coverage_map(rects, width, height)
+        used_area = int(np.count_nonzero(counts))
+        page_area = counts.size
+        overlaps = find_overlaps(rects)
+
+        result = {
+            'texture': page['texture'],
+            'width': width,
+            'height': height,
+            'images': len(page['names']),
+            'coverage': 100.0 * used_area / page_area if page_area else 0.0,
+            'overlaps': [(page['names'][i], page['names'][j], area) for i, j, area in overlaps],
+            'heatmap': None,
+        }
+        if heatmaps and width > 0 and height > 0:
+            heatmap_path = os.path.join(output_dir, os.path.splitext(os.path.basename(page['texture']))[0] + "_heatmap.png")
+            render_heatmap(counts, heatmap_path, find_texture_path(page['texture'], texture_map))
+            result['heatmap'] = heatmap_path
+        results.append(result)
+
+    results.sort(key=lambda r: r['coverage'])
+    return results
+
+def write_report(results, output_path):
+    with open(output_path, 'w') as f:
+        for r in results:
+            f.write(f"{r['texture']} ({r['width']}x{r['height']}): {r['images']} images, "
+                    f"{r['coverage']:.1f}% covered, {len(r['overlaps'])} overlaps\n")
+            for a, b, area in r['overlaps']:
+                f.write(f"  overlap {a} / {b}: {area} texels\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report texture page coverage and overlapping MappedImage Coords.")
+    parser.add_argument("--mapped_images_dir", nargs='+', default=["MappedImages", "INI/MappedImages"], help="Folder(s) containing INI files with Mapped Images")
+    parser.add_argument("--textures_dir", default="Art/Textures", help="Folder containing textures")
+    parser.add_argument("--texture", nargs='*', help="Only analyze these texture pages (e.g. SAControlBar512_001.tga)")
+    parser.add_argument("--outdir", default="texture_analysis", help="Directory for heatmaps and the report")
+    parser.add_argument("--no-heatmaps", action="store_true", help="Skip writing heatmap images")
+    args = parser.parse_args()
+
+    mapped_images = MappedImageIndex()
+    for mapped_dir in args.mapped_images_dir:
+        if os.path.exists(mapped_dir):
+            mapped_images.add_path(mapped_dir)
+    print(f"Indexed {len(mapped_images)} mapped images.")
+    texture_map = scan_textures(args.textures_dir)
+
+    pages = group_by_texture(mapped_images)
+    if args.texture:
+        wanted = {t.lower() for t in args.texture}
+        pages = {k: v for k, v in pages.items() if k in wanted}
+
+    if not os.path.exists(args.outdir):
+        os.makedirs(args.outdir)
+
+    results = analyze_pages(pages, texture_map, args.outdir, heatmaps=not args.no_heatmaps)
+    for r in results:
+        print(f"  {r['texture']}: {r['images']} images, {r['coverage']:.1f}% covered, {len(r['overlaps'])} overlaps")
+
+    report_path = os.path.join(args.outdir, "texture_pages_report.txt")
+    write_report(results, report_path)
+    print(f"Analyzed {len(results)} texture pages. Saved report to {report_path}")
+
+if __name__ == "__main__":
+    main()
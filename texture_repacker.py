@@ -0,0 +1,283 @@
+import io
+import os
+import re
+import time
+import hashlib
+import argparse
+from PIL import Image
+
+from mapped_image_index import MappedImageIndex
+from wnd_to_svg import scan_textures, crop_mapped_image
+from atomic_write import WriteBatch, recover_journals, recover_journals_for
+
+# Texture/TextureWidth/TextureHeight/Coords lines inside a MappedImage block; keeps indentation and comments
+PAGE_KEY_PATTERN = re.compile(r"^(\s*)(Texture|TextureWidth|TextureHeight|Coords)(\s*=\s*)([^;\r\n]*?)(\s*(?:;[^\r\n]*)?)(\r?\n?)$", re.IGNORECASE)
+
+class MaxRectsBin:
+    """
+    MaxRects bin packer (best short side fit, no rotation).
+    Keeps the list of maximal free rectangles as (x, y, w, h) tuples.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+
+    def insert(self, w, h):
+        """Places a w x h rect and returns its (x, y), or None if it doesn't fit."""
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                score = (min(fw - w, fh - h), max(fw - w, fh - h))
+                if best_score is None or score < best_score:
+                    best, best_score = (fx, fy), score
+        if best is None:
+            return None
+
+        x, y = best
+        new_free = []
+        for fx, fy, fw, fh in self.free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                new_free.append((fx, fy, fw, fh))
+                continue
+            # Split the free rect around the placed one into up to four maximal pieces
+            if x > fx:
+                new_free.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                new_free.append((x + w, fy, fx + fw - (x + w), fh))
+            if y > fy:
+                new_free.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                new_free.append((fx, y + h, fw, fy + fh - (y + h)))
+
+        # Drop free rects contained in another one
+        new_free.sort(key=lambda r: r[2] * r[3], reverse=True)
+        pruned = []
+        for r in new_free:
+            if not any(r[0] >= p[0] and r[1] >= p[1] and r[0] + r[2] <= p[0] + p[2] and r[1] + r[3] <= p[1] + p[3] for p in pruned):
+                pruned.append(r)
+        self.free = pruned
+        return x, y
+
+def try_pack(items, width, height, padding):
+    """Packs all items (key, w, h) into one width x height page. Returns {key: (x, y)} or None."""
+    packer = MaxRectsBin(width, height)
+    placed = {}
+    for key, w, h in items:
+        pos = packer.insert(w + padding, h + padding)
+        if pos is None:
+            return None
+        placed[key] = pos
+    return placed
+
+def pack_pages(items, max_size, padding=1):
+    """
+    Packs items (key, w, h) into as few max_size pages as possible, then shrinks each page to the
+    smallest power-of-two size its items still fit in.
+    Returns a list of (width, height, {key: (x, y)}) pages.
+    """
+    # Largest first gives MaxRects its best results
+    remaining = sorted(items, key=lambda it: (max(it[1], it[2]), it[1] * it[2]), reverse=True)
+    pages = []
+    while remaining:
+        packer = MaxRectsBin(max_size, max_size)
+        page_items = []
+        leftover = []
+        for item in remaining:
+            if packer.insert(item[1] + padding, item[2] + padding) is not None:
+                page_items.append(item)
+            else:
+                leftover.append(item)
+        if not page_items:
+            raise ValueError(f"{len(leftover)} image(s) don't fit in a {max_size}x{max_size} page")
+        remaining = leftover
+
+        used_area = sum((w + padding) * (h + padding) for _, w, h in page_items)
+        max_w = max(w for _, w, _ in page_items) + padding
+        max_h = max(h for _, _, h in page_items) + padding
+        sizes = []
+        size = 1
+        while size <= max_size:
+            sizes.append(size)
+            size *= 2
+        candidates = sorted(((w, h) for w in sizes for h in sizes if w >= max_w and h >= max_h and w * h >= used_area),
+                            key=lambda s: (s[0] * s[1], abs(s[0] - s[1])))
+        for width, height in candidates:
+            placed = try_pack(page_items, width, height, padding)
+            if placed is not None:
+                pages.append((width, height, placed))
+                break
+    return pages
+
+def collect_page_images(mapped_images, textures, texture_map):
+    """
+    Crops every MappedImage definition whose own Texture is one of the given pages, overridden
+    definitions in other INIs included (a name may be defined differently per file).
+    Identical crops are packed once and shared. Returns (crops, definitions_by_key) where crops
+    maps a content hash -> PIL image and definitions_by_key maps that hash -> [((filepath, offset), image)].
+    """
+    wanted = {t.lower() for t in textures}
+    texture_cache = {}
+    crops = {}
+    definitions_by_key = {}
+    for location, image in mapped_images.iter_definitions():
+        if image.get('texture', '').lower() not in wanted:
+            continue
+        cropped = crop_mapped_image(image, texture_map, texture_cache)
+        if cropped is None:
+            print(f"Skipping {image['name']} ({location[0]}): could not crop it from {image.get('texture')}")
+            continue
+        cropped = cropped.convert('RGBA')
+        key = hashlib.sha1(f"{cropped.width}x{cropped.height}".encode() + cropped.tobytes()).hexdigest()
+        crops.setdefault(key, cropped)
+        definitions_by_key.setdefault(key, []).append((location, image))
+    return crops, definitions_by_key
+
+def write_pages(pages, crops, output_dir, page_name, batch):
+    """Stages every packed page as an RGBA TGA in batch. Returns the list of texture file names."""
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    texture_names = []
+    for i, (width, height, placed) in enumerate(pages, start=1):
+        page = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        for key, (x, y) in placed.items():
+            page.paste(crops[key], (x, y))
+        texture_name = f"{page_name}_{i:03d}.tga"
+        buffer = io.BytesIO()
+        page.save(buffer, format='TGA')
+        batch.stage(os.path.join(output_dir, texture_name), buffer.getvalue())
+        texture_names.append(texture_name)
+    return texture_names
+
+def rewrite_mapped_image_inis(placements, batch):
+    """
+    Rewrites Texture/TextureWidth/TextureHeight/Coords of the repacked MappedImage blocks in place,
+    one streaming pass per INI file, staging the results in batch. Only the blocks in placements
+    are touched, so a definition of the same name on another page keeps its own values.
+    placements maps (filepath, offset) -> {'texture', 'width', 'height', 'coords'}. Returns the number of blocks updated.
+    """
+    files = {}
+    for filepath, offset in placements:
+        files.setdefault(filepath, {})[offset] = placements[(filepath, offset)]
+
+    updated = 0
+    for filepath, file_placements in files.items():
+        # latin-1 and newline='' keep the file byte-for-byte apart from the edited values
+        with open(filepath, 'r', encoding='latin-1', newline='') as f:
+            lines = f.readlines()
+
+        current = None
+        offset = 0
+        for i, line in enumerate(lines):
+            # latin-1 maps every byte to one character, so this is the byte offset the index recorded
+            line_start = offset
+            offset += len(line)
+            stripped = line.strip()
+            parts = stripped.split()
+            if parts and parts[0].lower() == 'mappedimage':
+                current = file_placements.get(line_start)
+                if current:
+                    updated += 1
+                continue
+            if stripped.lower() == 'end':
+                current = None
+                continue
+            if current is None:
+                continue
+
+            m = PAGE_KEY_PATTERN.match(line)
+            if not m:
+                continue
+            p = current
+            key = m.group(2).lower()
+            if key == 'texture':
+                value = p['texture']
+            elif key == 'texturewidth':
+                value = str(p['width'])
+            elif key == 'textureheight':
+                value = str(p['height'])
+            else:
+                c = p['coords']
+                value = f"Left:{c['Left']} Top:{c['Top']} Right:{c['Right']} Bottom:{c['Bottom']}"
+            lines[i] = f"{m.group(1)}{m.group(2)}{m.group(3)}{value}{m.group(5)}{m.group(6)}"
+
+        batch.stage(filepath, "".join(lines), encoding='latin-1', newline='')
+        print(f"Updated {len(file_placements)} MappedImages in {filepath}")
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="Repack the MappedImages of some texture pages into new power-of-two TGA pages and rewrite their INIs.")
+    parser.add_argument("textures", nargs='+', help="Texture pages to repack (e.g. SUControlBar512_001.tga SUControlBar512_002.tga)")
+    parser.add_argument("--name", required=True, help="Base name of the new pages (written as <name>_001.tga, ...)")
+    parser.add_argument("--mapped_images_dir", nargs='+', default=["MappedImages", "INI/MappedImages"], help="Folder(s) containing INI files with Mapped Images")
+    parser.add_argument("--textures_dir", default="Art/Textures", help="Folder containing textures")
+    parser.add_argument("--outdir", help="Where to write the new pages (defaults to --textures_dir)")
+    parser.add_argument("--max_size", type=int, default=512, help="Largest page size (power of two)")
+    parser.add_argument("--padding", type=int, default=1, help="Empty pixels between packed images")
+    parser.add_argument("--dry-run", action="store_true", help="Pack and report, but don't write textures or INIs")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    mapped_images = MappedImageIndex()
+    for mapped_dir in args.mapped_images_dir:
+        if os.path.exists(mapped_dir):
+            mapped_images.add_path(mapped_dir)
+    print(f"Indexed {len(mapped_images)} mapped images.")
+    texture_map = scan_textures(args.textures_dir)
+
+    crops, definitions_by_key = collect_page_images(mapped_images, args.textures, texture_map)
+    if not crops:
+        print("No MappedImages found on the given texture pages.")
+        return
+    image_count = sum(len(definitions) for definitions in definitions_by_key.values())
+    print(f"Cropped {image_count} MappedImage definitions ({len(crops)} unique) from {len(args.textures)} page(s).")
+
+    try:
+        pages = pack_pages([(key, img.width, img.height) for key, img in crops.items()], args.max_size, args.padding)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    old_area = 0
+    for texture in args.textures:
+        sizes = {(img.get('width', 0), img.get('height', 0)) for definitions in definitions_by_key.values()
+                 for _, img in definitions if img['texture'].lower() == texture.lower()}
+        old_area += max((w * h for w, h in sizes), default=0)
+    new_area = sum(w * h for w, h, _ in pages)
+    print(f"Packed into {len(pages)} page(s): " + ", ".join(f"{w}x{h}" for w, h, _ in pages))
+    print(f"Texture area {old_area} -> {new_area} texels ({time.perf_counter() - start:.2f}s)")
+
+    if args.dry_run:
+        print("Dry run: no files written.")
+        return
+
+    # Finish any batch a crash interrupted in the folders written below
+    recover_journals(args.outdir or args.textures_dir)
+    recover_journals_for([location[0] for definitions in definitions_by_key.values() for location, _ in definitions])
+
+    # New pages and INI edits land together, so a failed run never leaves INIs pointing at missing pages
+    batch = WriteBatch()
+    try:
+        texture_names = write_pages(pages, crops, args.outdir or args.textures_dir, args.name, batch)
+        placements = {}
+        for texture_name, (width, height, placed) in zip(texture_names, pages):
+            for key, (x, y) in placed.items():
+                img = crops[key]
+                coords = {'Left': x, 'Top': y, 'Right': x + img.width, 'Bottom': y + img.height}
+                # Each definition gets the placement of its own crop
+                for location, _ in definitions_by_key[key]:
+                    placements[location] = {'texture': texture_name, 'width': width, 'height': height, 'coords': coords}
+
+        updated = rewrite_mapped_image_inis(placements, batch)
+    except BaseException:
+        batch.abort()
+        raise
+    batch.commit()
+    print(f"Wrote {', '.join(texture_names)} and updated {updated} MappedImage blocks.")
+    print("The old texture pages were left in place; remove them once nothing else references them.")
+
+if __name__ == "__main__":
+    main()
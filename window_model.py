@@ -0,0 +1,167 @@
+import sys
+from array import array
+
+class WindowTable:
+    """
+    Shared storage for many parsed windows, possibly from many WND files.
+    Rects live in one array('i') (x, y, width, height per window), ENABLEDDRAWDATA entries in
+    parallel arrays (image index, packed RGBA color, packed RGBA border) and every string
+    (names, STATUS, DRAWCALLBACK, image names) once in a string table. Each window's name,
+    STATUS and DRAWCALLBACK are string table indices in string_refs (-1 for no name), and its
+    draw data range is (start, count) in draw_ranges.
+    """
+
+    def __init__(self):
+        self.rects = array('i')
+        self.draw_images = array('i')
+        self.draw_colors = array('I')
+        self.draw_borders = array('I')
+        self.string_refs = array('i')
+        self.draw_ranges = array('i')
+        self.strings = []
+        self.string_ids = {}
+
+    def string_id(self, value):
+        """Returns the string table index of value, adding it (interned) on first use."""
+        index = self.string_ids.get(value)
+        if index is None:
+            index = len(self.strings)
+            value = sys.intern(value)
+            self.strings.append(value)
+            self.string_ids[value] = index
+        return index
+
+    def add_window(self, props, children=()):
+        """Stores a parse_window_block dict and returns its Window record."""
+        index = len(self.rects) // 4
+        self.rects.extend((props['x'], props['y'], props['width'], props['height']))
+
+        draw_start = len(self.draw_images)
+        for entry in props['draw_data']:
+            self.draw_images.append(self.string_id(entry['image']))
+            self.draw_colors.append(pack_rgba(entry['color']))
+            self.draw_borders.append(pack_rgba(entry['border']))
+
+        self.draw_ranges.extend((draw_start, len(props['draw_data'])))
+        name_id = self.string_id(props['name']) if props['name'] is not None else -1
+        self.string_refs.extend((name_id, self.string_id(props['status']), self.string_id(props['draw_callback'])))
+        return Window(self, index, tuple(children))
+
+def pack_rgba(rgba):
+    r, g, b, a = rgba
+    return (r << 24) | (g << 16) | (b << 8) | a
+
+def unpack_rgba(value):
+    return ((value >> 24) & 0xff, (value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff)
+
+RECT_FIELDS = {'x': 0, 'y': 1, 'width': 2, 'height': 3}
+
+class Window:
+    """
+    Compact record for one window; geometry and draw data are read from its WindowTable.
+    Supports the window dict keys used across the tools (window['name'], window['x'],
+    window['draw_data'], window['children'], ...), so it can stand in for the dicts.
+    """
+    __slots__ = ('table', 'index', 'children')
+
+    def __init__(self, table, index, children):
+        self.table = table
+        self.index = index
+        self.children = children
+
+    def _string(self, field):
+        string_id = self.table.string_refs[self.index * 3 + field]
+        return self.table.strings[string_id] if string_id >= 0 else None
+
+    @property
+    def name(self):
+        return self._string(0)
+
+    @property
+    def status(self):
+        return self._string(1)
+
+    @property
+    def draw_callback(self):
+        return self._string(2)
+
+    @property
+    def rect(self):
+        """(x, y, width, height)"""
+        i = self.index * 4
+        return tuple(self.table.rects[i:i + 4])
+
+    def draw_range(self):
+        """range over this window's entries in the table's draw data arrays"""
+        start, count = self.table.draw_ranges[self.index * 2:self.index * 2 + 2]
+        return range(start, start + count)
+
+    def image_names(self):
+        """Every ENABLEDDRAWDATA image name, NoImage included, in draw-state order."""
+        strings = self.table.strings
+        return [strings[self.table.draw_images[i]] for i in self.draw_range()]
+
+    def __getitem__(self, key):
+        if key in ('x', 'y', 'width', 'height'):
+            return self.table.rects[self.index * 4 + RECT_FIELDS[key]]
+        if key == 'images':
+            return [name for name in self.image_names() if name != "NoImage"]
+        if key == 'draw_data':
+            table = self.table
+            return [{'image': table.strings[table.draw_images[i]],
+                     'color': unpack_rgba(table.draw_colors[i]),
+                     'border': unpack_rgba(table.draw_borders[i])} for i in self.draw_range()]
+        if key in ('name', 'status', 'draw_callback', 'children'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"Window({self.name!r}, {self.rect})"
+
+def parse_wnd_records(lines, table=None, on_block=None):
+    """
+    Parses WND lines into top-level Window records stored in table (a new one if None).
+    Lines are consumed as a stream: each window's own lines are parsed as soon as its first
+    CHILD or its END is reached, so only the open windows' unparsed lines are ever held.
+    on_block(window, block_str), if given, is called with each record and the text of its own
+    lines, for callers that need properties the records don't keep.
+    """
+    # Imported here to avoid a circular import with wnd_to_svg
+    from wnd_to_svg import parse_window_block
+
+    if table is None:
+        table = WindowTable()
+
+    roots = []
+    stack = [] # [own_lines or parsed props, children, own text (only kept for on_block)]
+    for line in lines:
+        stripped = line.strip()
+        if stripped == "WINDOW":
+            stack.append([[], [], None])
+        elif stripped == "CHILD" and stack:
+            if isinstance(stack[-1][0], list):
+                block_str = "".join(stack[-1][0])
+                stack[-1][0] = parse_window_block(block_str)
+                if on_block is not None:
+                    stack[-1][2] = block_str
+        elif stripped == "END" and stack:
+            own, children, block_str = stack.pop()
+            if isinstance(own, list):
+                block_str = "".join(own)
+                own = parse_window_block(block_str)
+            window = table.add_window(own, children)
+            if on_block is not None:
+                on_block(window, block_str)
+            (stack[-1][1] if stack else roots).append(window)
+        elif stripped == "ENDALLCHILDREN":
+            continue
+        elif stack and isinstance(stack[-1][0], list):
+            stack[-1][0].append(line)
+
+    return roots
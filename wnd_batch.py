@@ -0,0 +1,112 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from wnd_to_svg import (scan_mapped_images, scan_textures, parse_wnd_and_generate_svg,
+                        update_wnd_from_svg, preprocess_wnd_if_needed, is_generated_wnd)
+
+# Prefix of the machine-readable per-file result lines (read by wnd_to_svg_gui's status table)
+STATUS_PREFIX = "STATUS "
+
+report_lock = threading.Lock()
+
+def expand_wnd_paths(patterns):
+    """
+    Expands files and globs (recursive '**' allowed) into a sorted, de-duplicated list of WND paths.
+    Globs skip the _labeled/_NEW copies written by this tool, so no worker reads a file another one is writing.
+    """
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = [p for p in sorted(glob.glob(pattern, recursive=True)) if not is_generated_wnd(p)]
+        else:
+            matches = [pattern]
+        for path in matches:
+            key = os.path.normcase(os.path.abspath(path))
+            if key not in seen and path.lower().endswith('.wnd'):
+                seen.add(key)
+                paths.append(path)
+    return paths
+
+def report(path, status, seconds=None, windows=None, images=None, message=None):
+    """Prints one STATUS line (JSON) for path."""
+    record = {'file': path, 'status': status, 'seconds': seconds, 'windows': windows, 'images': images, 'message': message}
+    # One write per line, so lines from worker threads never interleave
+    with report_lock:
+        sys.stdout.write(STATUS_PREFIX + json.dumps(record) + "\n")
+        sys.stdout.flush()
+
+def generate_one(wnd_path, resources, output_dir, scales):
+    start = time.perf_counter()
+    report(wnd_path, 'running')
+    try:
+        summary = parse_wnd_and_generate_svg(preprocess_wnd_if_needed(wnd_path), None, None, output_dir,
+                                             scales=scales, resources=resources)
+    except Exception as e:
+        report(wnd_path, 'error', round(time.perf_counter() - start, 2), message=str(e))
+        return False
+    if summary is None:
+        report(wnd_path, 'error', round(time.perf_counter() - start, 2), message="not found")
+        return False
+    report(wnd_path, 'done', round(time.perf_counter() - start, 2), summary['windows'], summary['images'])
+    return True
+
+def update_one(wnd_path, update_new):
+    start = time.perf_counter()
+    report(wnd_path, 'running')
+    base = os.path.splitext(wnd_path)[0]
+    output_path = base + "_NEW.wnd" if update_new else wnd_path
+    try:
+        summary = update_wnd_from_svg(wnd_path, base + ".svg", output_path)
+    except Exception as e:
+        report(wnd_path, 'error', round(time.perf_counter() - start, 2), message=str(e))
+        return False
+    if summary is None:
+        report(wnd_path, 'error', round(time.perf_counter() - start, 2), message="missing WND or SVG")
+        return False
+    report(wnd_path, 'done' if summary['written'] else 'unchanged', round(time.perf_counter() - start, 2),
+           summary['updates'])
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate SVGs for, or update from their SVGs, many WND files in one run.")
+    parser.add_argument("mode", choices=["generate", "update"], help="generate: WND -> SVG; update: <base>.svg -> WND")
+    parser.add_argument("wnd_files", nargs='+', help="WND files or globs (e.g. Window/Menus/*.wnd or Window/**/*.wnd)")
+    parser.add_argument("--mapped_images_dir", default="MappedImages", help="Folder containing INI files with Mapped Images")
+    parser.add_argument("--textures_dir", default="Art/Textures", help="Folder containing textures")
+    parser.add_argument("--outdir", default="extracted_images", help="Directory to save extracted images")
+    parser.add_argument("--scales", nargs='+', type=float, help="Also write images at these Coords scales (generate)")
+    parser.add_argument("--updatenew", action="store_true", help="Write <base>_NEW.wnd instead of overwriting (update)")
+    parser.add_argument("--jobs", type=int, default=4, help="Files processed in parallel")
+    args = parser.parse_args()
+
+    paths = expand_wnd_paths(args.wnd_files)
+    if not paths:
+        print("No WND files matched.")
+        sys.exit(1)
+    for path in paths:
+        report(path, 'queued')
+
+    start = time.perf_counter()
+    if args.mode == "generate":
+        # Scanned once for the whole batch; threads share the index and the opened textures
+        resources = (scan_mapped_images(args.mapped_images_dir), scan_textures(args.textures_dir), {})
+        work = lambda path: generate_one(path, resources, args.outdir, args.scales)
+    else:
+        work = lambda path: update_one(path, args.updatenew)
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(executor.map(work, paths))
+
+    failed = results.count(False)
+    print(f"Processed {len(paths)} file(s) in {time.perf_counter() - start:.1f}s, {failed} failed.")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
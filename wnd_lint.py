@@ -0,0 +1,148 @@
+import os
+import sys
+import glob
+import json
+import heapq
+import time
+import argparse
+from collections import Counter
+
+from wnd_to_svg import parse_wnd_tree, read_creation_resolution
+
+def rect_of(window):
+    """(x1, y1, x2, y2) of a window."""
+    return window['x'], window['y'], window['x'] + window['width'], window['y'] + window['height']
+
+def sibling_overlaps(windows, threshold):
+    """
+    Sort-and-sweep over the sibling rects: sorted by left edge, each rect is only compared with
+    the still-active rects whose right edge is past its left edge. Yields (a, b, fraction) for
+    pairs whose overlap covers more than threshold of the smaller rect's area.
+    """
+    items = sorted(((rect_of(w), w) for w in windows if w['width'] > 0 and w['height'] > 0), key=lambda item: item[0])
+    active = [] # heap of (right edge, order, rect, window)
+    for order, (rect, window) in enumerate(items):
+        x1, y1, x2, y2 = rect
+        while active and active[0][0] <= x1:
+            heapq.heappop(active)
+        for _, _, (ax1, ay1, ax2, ay2), other in active:
+            ix = min(x2, ax2) - x1
+            iy = min(y2, ay2) - max(y1, ay1)
+            if ix <= 0 or iy <= 0:
+                continue
+            smaller = min((x2 - x1) * (y2 - y1), (ax2 - ax1) * (ay2 - ay1))
+            fraction = ix * iy / smaller
+            if fraction > threshold:
+                yield other, window, fraction
+        heapq.heappush(active, (x2, order, rect, window))
+
+def lint_windows(roots, resolution, threshold=0.25, check_overlaps=True):
+    """
+    Checks a parsed window tree. Returns a list of (kind, name, other, message) issues, where kind is
+    'outside-parent', 'overlap' or 'off-screen' and other is the parent or overlapped window (None off-screen).
+    """
+    issues = []
+
+    def visit(siblings, parent):
+        for window in siblings:
+            name = window['name'] or "<unnamed>"
+            x1, y1, x2, y2 = rect_of(window)
+            if resolution and (x1 < 0 or y1 < 0 or x2 > resolution[0] or y2 > resolution[1]):
+                issues.append(('off-screen', name, None, f"({x1}, {y1})-({x2}, {y2}) is outside {resolution[0]}x{resolution[1]}"))
+            if parent is not None:
+                px1, py1, px2, py2 = rect_of(parent)
+                if x1 < px1 or y1 < py1 or x2 > px2 or y2 > py2:
+                    issues.append(('outside-parent', name, parent['name'] or "<unnamed>", f"({x1}, {y1})-({x2}, {y2}) escapes parent "
+                                                           f"{parent['name']} ({px1}, {py1})-({px2}, {py2})"))
+        if check_overlaps:
+            for a, b, fraction in sibling_overlaps(siblings, threshold):
+                issues.append(('overlap', b['name'] or "<unnamed>", a['name'] or "<unnamed>", f"overlaps {a['name']} by {fraction:.0%}"))
+        for window in siblings:
+            visit(window['children'], window)
+
+    visit(roots, None)
+    return issues
+
+def lint_file(path, threshold=0.25, check_overlaps=True):
+    """Lints one WND file. Returns its list of issues."""
+    with open(path, 'r', errors='ignore') as f:
+        roots = parse_wnd_tree(f)
+    return lint_windows(roots, read_creation_resolution(path), threshold, check_overlaps)
+
+def issue_key(issue):
+    """(kind, name, other) of an issue. Leaves out the coordinates, so a known issue still matches after a move."""
+    return tuple(issue[:3])
+
+def new_issues(issues, known):
+    """The issues not accounted for by known (a list of issue keys); repeated keys are matched one for one."""
+    remaining = Counter(tuple(key) for key in known)
+    result = []
+    for issue in issues:
+        key = issue_key(issue)
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            result.append(issue)
+    return result
+
+def load_baseline(baseline_path):
+    """Returns {normalized path: [issue keys]} from a baseline file, or {} when it doesn't exist."""
+    if not baseline_path or not os.path.exists(baseline_path):
+        return {}
+    with open(baseline_path, 'r') as f:
+        return {os.path.normpath(path): keys for path, keys in json.load(f).items()}
+
+def save_baseline(baseline_path, paths, threshold=0.25, check_overlaps=True):
+    """Records the current issues of paths as accepted. Returns the number recorded."""
+    # Imported here to keep wnd_lint's startup light
+    from atomic_write import atomic_write
+    baseline = {os.path.normpath(path): [issue_key(i) for i in lint_file(path, threshold, check_overlaps)] for path in paths}
+    atomic_write(baseline_path, json.dumps(baseline, indent=1, sort_keys=True))
+    return sum(len(keys) for keys in baseline.values())
+
+def lint_paths(paths, threshold=0.25, check_overlaps=True, baseline=None):
+    """
+    Lints and reports several WND files. With baseline ({normalized path: [issue keys]}), issues
+    already recorded there are accepted and not reported. Returns the total number of reported issues.
+    """
+    total = 0
+    for path in paths:
+        issues = lint_file(path, threshold, check_overlaps)
+        if baseline:
+            issues = new_issues(issues, baseline.get(os.path.normpath(path), []))
+        for kind, name, _, message in issues:
+            print(f"{path}: {kind}: {name} {message}")
+        total += len(issues)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Check WND layouts for children outside their parent, overlapping siblings and rects outside CREATIONRESOLUTION.")
+    parser.add_argument("paths", nargs='*', default=["Window/**/*.wnd"], help="WND files or globs (default: Window/**/*.wnd)")
+    parser.add_argument("--overlap_threshold", type=float, default=0.25, help="Report sibling overlaps covering more than this fraction of the smaller rect")
+    parser.add_argument("--no-overlaps", action="store_true", help="Skip the sibling overlap check")
+    parser.add_argument("--baseline", help="JSON file of accepted issues; only issues not recorded there are reported")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the current issues in --baseline and exit")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = []
+    for pattern in args.paths:
+        for path in (sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]):
+            if path not in paths:
+                paths.append(path)
+
+    if args.update_baseline:
+        if not args.baseline:
+            print("Error: --update-baseline needs --baseline.")
+            sys.exit(2)
+        recorded = save_baseline(args.baseline, paths, args.overlap_threshold, not args.no_overlaps)
+        print(f"Recorded {recorded} issue(s) in {len(paths)} file(s) to {args.baseline}")
+        return
+
+    total = lint_paths(paths, args.overlap_threshold, not args.no_overlaps, load_baseline(args.baseline))
+    print(f"{total} issue(s) in {len(paths)} file(s) ({time.perf_counter() - start:.2f}s)")
+    # Non-zero exit so it can gate a commit
+    sys.exit(1 if total else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import re
+import os
+import time
+import argparse
+from PIL import Image, ImageDraw
+
+from wnd_to_svg import scan_mapped_images, scan_textures, crop_mapped_image, parse_wnd_tree, iter_window_tree
+
+def composite_clipped(canvas, layer, x, y):
+    """Alpha-composites layer onto canvas at (x, y), clipping anything outside the canvas."""
+    left = max(x, 0)
+    top = max(y, 0)
+    right = min(x + layer.width, canvas.width)
+    bottom = min(y + layer.height, canvas.height)
+    if left >= right or top >= bottom:
+        return
+    if (left, top, right, bottom) != (x, y, x + layer.width, y + layer.height):
+        layer = layer.crop((left - x, top - y, right - x, bottom - y))
+    canvas.alpha_composite(layer, dest=(left, top))
+
+def render_wnd_preview(wnd_path, mapped_images, texture_map, target_size=None, texture_cache=None, crop_cache=None):
+    """
+    Composites the window tree of a WND file into an RGBA image.
+    Windows are drawn parents first, following the CHILD hierarchy. Windows with the IMAGE
+    status draw their first ENABLEDDRAWDATA image; the others draw their COLOR fill and,
+    with the BORDER status, their BORDERCOLOR outline. HIDDEN windows (and their children)
+    and W3DNoDraw windows are skipped.
+    target_size is (width, height); by default the CREATIONRESOLUTION is used.
+    """
+    if texture_cache is None:
+        texture_cache = {}
+    if crop_cache is None:
+        crop_cache = {}
+
+    with open(wnd_path, 'r') as f:
+        lines = f.readlines()
+
+    res_match = None
+    for line in lines:
+        res_match = re.search(r"CREATIONRESOLUTION:\s*(\d+)\s+(\d+)", line)
+        if res_match:
+            break
+    if res_match:
+        creation_width = int(res_match.group(1))
+        creation_height = int(res_match.group(2))
+    else:
+        creation_width, creation_height = 800, 600
+
+    if not target_size:
+        target_size = (creation_width, creation_height)
+    scale_x = target_size[0] / creation_width
+    scale_y = target_size[1] / creation_height
+
+    canvas = Image.new('RGBA', target_size, (0, 0, 0, 0))
+    hidden = set()
+
+    for window, depth, parent in iter_window_tree(parse_wnd_tree(lines)):
+        status = window['status'].split('+')
+        if 'HIDDEN' in status or (parent is not None and id(parent) in hidden):
+            hidden.add(id(window))
+            continue
+        if window['draw_callback'] == "W3DNoDraw":
+            continue
+
+        x = int(round(window['x'] * scale_x))
+        y = int(round(window['y'] * scale_y))
+        w = int(round(window['width'] * scale_x))
+        h = int(round(window['height'] * scale_y))
+        if w <= 0 or h <= 0 or not window['draw_data']:
+            continue
+
+        draw_data = window['draw_data'][0]
+        image_name = draw_data['image']
+
+        if 'IMAGE' in status and image_name != "NoImage":
+            key = (image_name, w, h)
+            layer = crop_cache.get(key)
+            if layer is None and image_name in mapped_images:
+                cropped = crop_mapped_image(mapped_images[image_name], texture_map, texture_cache)
+                if cropped is not None:
+                    layer = cropped.convert('RGBA').resize((w, h))
+                    crop_cache[key] = layer
+            if layer is not None:
+                composite_clipped(canvas, layer, x, y)
+            continue
+
+        if 'SEE_THRU' in status:
+            continue
+
+        color = draw_data['color']
+        border = draw_data['border'] if 'BORDER' in status else (0, 0, 0, 0)
+        if color[3] == 0 and border[3] == 0:
+            continue
+
+        # One solid layer per window; alpha_composite does the blend for the whole rect at once
+        layer = Image.new('RGBA', (w, h), color if color[3] else (0, 0, 0, 0))
+        if border[3]:
+            ImageDraw.Draw(layer).rectangle([0, 0, w - 1, h - 1], outline=border)
+        composite_clipped(canvas, layer, x, y)
+
+    return canvas
+
+def parse_size(size_str):
+    """Parses 'WIDTHxHEIGHT' into a tuple of ints."""
+    width, height = size_str.lower().split('x')
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render PNG previews of .wnd layouts without Inkscape.")
+    parser.add_argument("wnd_files", nargs='+', help="Path(s) to the .wnd file(s)")
+    parser.add_argument("--mapped_images_dir", default="MappedImages", help="Folder containing INI files with Mapped Images")
+    parser.add_argument("--textures_dir", default="Art/Textures", help="Folder containing textures")
+    parser.add_argument("--size", help="Target resolution as WIDTHxHEIGHT (default: CREATIONRESOLUTION)")
+    parser.add_argument("--outdir", help="Directory to save previews (default: next to each WND)")
+    args = parser.parse_args()
+
+    target_size = parse_size(args.size) if args.size else None
+
+    # Resources are loaded once and shared by every preview
+    mapped_images = scan_mapped_images(args.mapped_images_dir)
+    texture_map = scan_textures(args.textures_dir)
+    texture_cache = {}
+    crop_cache = {}
+
+    for wnd_path in args.wnd_files:
+        if not os.path.exists(wnd_path):
+            print(f"Error: File {wnd_path} not found.")
+            continue
+
+        start = time.perf_counter()
+        preview = render_wnd_preview(wnd_path, mapped_images, texture_map, target_size, texture_cache, crop_cache)
+
+        base_name = os.path.splitext(os.path.basename(wnd_path))[0] + "_preview.png"
+        out_dir = args.outdir if args.outdir else os.path.dirname(os.path.abspath(wnd_path))
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+        output_path = os.path.join(out_dir, base_name)
+        preview.save(output_path)
+        print(f"Saved preview to {output_path} ({time.perf_counter() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
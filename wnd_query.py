@@ -0,0 +1,210 @@
+import os
+import re
+import glob
+import json
+import time
+import bisect
+import argparse
+
+# Every callback property a window can name; DRAWCALLBACK is also kept by parse_window_block
+CALLBACK_PATTERN = re.compile(r"\b(SYSTEMCALLBACK|INPUTCALLBACK|TOOLTIPCALLBACK|DRAWCALLBACK)\s*=\s*\"([^\"]*)\"")
+# Images of every draw state (ENABLEDDRAWDATA, DISABLEDDRAWDATA, HILITEDRAWDATA, ...)
+IMAGE_PATTERN = re.compile(r"IMAGE:\s*([^\s,]+)")
+
+INDEX_VERSION = 1
+
+def scan_wnd_file(path):
+    """
+    Parses one WND file into a list of window entries in file order:
+    {'name', 'offset' (byte offset of its WINDOW line), 'depth', 'parent', 'rect' [x, y, w, h],
+    'images' (all draw states, NoImage left out), 'callbacks' {property: function}}.
+    """
+    # Only needed when a file changed, so querying an up-to-date index never loads the parser
+    from wnd_to_svg import parse_wnd_tree, iter_window_tree
+
+    offsets = [] # byte offset of every WINDOW line, in file order
+
+    def read_lines(f):
+        offset = 0
+        for raw in f:
+            if raw.strip() == b"WINDOW":
+                offsets.append(offset)
+            offset += len(raw)
+            yield raw.decode('latin-1')
+
+    extras = {} # record index -> (images, callbacks); the records only keep ENABLEDDRAWDATA
+
+    def on_block(window, block_str):
+        images = []
+        for image in IMAGE_PATTERN.findall(block_str):
+            if image != "NoImage" and image not in images:
+                images.append(image)
+        callbacks = {key: value for key, value in CALLBACK_PATTERN.findall(block_str) if value and value != "[None]"}
+        extras[window.index] = (images, callbacks)
+
+    with open(path, 'rb') as f:
+        roots = parse_wnd_tree(read_lines(f), on_block=on_block)
+
+    # Draw order (parents first) is file order, so the n-th window is the n-th WINDOW line
+    entries = []
+    for (window, depth, parent), offset in zip(iter_window_tree(roots), offsets):
+        images, callbacks = extras[window.index]
+        entries.append({'name': window['name'], 'offset': offset, 'depth': depth,
+                        'parent': parent['name'] if parent is not None else None,
+                        'rect': list(window.rect), 'images': images, 'callbacks': callbacks})
+    return entries
+
+def load_index(index_path):
+    """Returns the persisted per-file entries, or an empty dict when missing, unreadable or outdated."""
+    if not index_path or not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable index {index_path}: {e}")
+        return {}
+    if data.get('version') != INDEX_VERSION:
+        return {}
+    return data.get('files', {})
+
+def save_index(index_path, files):
+    # Imported here so a query against an unchanged index stays as light as possible
+    from atomic_write import atomic_write
+    atomic_write(index_path, json.dumps({'version': INDEX_VERSION, 'files': files}))
+
+def update_index(patterns, index_path=None):
+    """
+    Brings the persisted index up to date with the WND files matching patterns. Only files whose
+    mtime or size changed are parsed again; deleted files are dropped. Returns (files, rescanned).
+    """
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path):
+                paths.add(os.path.normpath(path))
+
+    cached = load_index(index_path)
+    files = {}
+    rescanned = 0
+    for path in sorted(paths):
+        st = os.stat(path)
+        entry = cached.get(path)
+        if entry is None or entry['mtime_ns'] != st.st_mtime_ns or entry['size'] != st.st_size:
+            entry = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'windows': scan_wnd_file(path)}
+            rescanned += 1
+        files[path] = entry
+
+    if index_path and (rescanned or set(cached) != set(files)):
+        save_index(index_path, files)
+    return files, rescanned
+
+class WindowQueryIndex:
+    """
+    In-memory lookup tables over the indexed windows: exact names, a sorted name list for
+    prefix queries, an inverted image index and, per file, windows sorted by left edge for
+    rect intersection queries.
+    """
+
+    def __init__(self, files):
+        self.windows = []
+        self.by_name = {}
+        self.by_image = {}
+        self.by_callback = {}
+        self.spatial = {} # file -> (sorted left edges, [window index])
+        for path, entry in files.items():
+            file_windows = []
+            for window in entry['windows']:
+                index = len(self.windows)
+                self.windows.append(dict(window, file=path))
+                file_windows.append(index)
+                if window['name']:
+                    self.by_name.setdefault(window['name'].lower(), []).append(index)
+                for image in window['images']:
+                    self.by_image.setdefault(image.lower(), []).append(index)
+                for value in window['callbacks'].values():
+                    self.by_callback.setdefault(value.lower(), []).append(index)
+            file_windows.sort(key=lambda i: self.windows[i]['rect'][0])
+            self.spatial[path] = ([self.windows[i]['rect'][0] for i in file_windows], file_windows)
+        self.sorted_names = sorted(self.by_name)
+
+    def name(self, name):
+        return [self.windows[i] for i in self.by_name.get(name.lower(), [])]
+
+    def prefix(self, prefix):
+        prefix = prefix.lower()
+        result = []
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        for key in self.sorted_names[start:]:
+            if not key.startswith(prefix):
+                break
+            result.extend(self.windows[i] for i in self.by_name[key])
+        return result
+
+    def image(self, image):
+        return [self.windows[i] for i in self.by_image.get(image.lower(), [])]
+
+    def callback(self, callback):
+        return [self.windows[i] for i in self.by_callback.get(callback.lower(), [])]
+
+    def intersecting(self, x1, y1, x2, y2, file_filter=None):
+        """Windows whose SCREENRECT overlaps (x1, y1)-(x2, y2). Each WND has its own coordinate space."""
+        result = []
+        for path, (lefts, indices) in self.spatial.items():
+            if file_filter and file_filter.lower() not in path.lower():
+                continue
+            # Windows starting at or right of x2 can't overlap
+            for i in indices[:bisect.bisect_left(lefts, x2)]:
+                x, y, w, h = self.windows[i]['rect']
+                if x + w > x1 and y < y2 and y + h > y1:
+                    result.append(self.windows[i])
+        return result
+
+def format_window(window):
+    x, y, w, h = window['rect']
+    line = f"{window['file']}@{window['offset']}  {window['name']}  ({x}, {y}, {w}x{h})"
+    if window['images']:
+        line += "  images: " + ", ".join(window['images'])
+    if window['callbacks']:
+        line += "  callbacks: " + ", ".join(f"{k}={v}" for k, v in window['callbacks'].items())
+    return line
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the windows of all WND files through a persisted, incrementally updated index.")
+    parser.add_argument("--name", help="Exact window NAME (e.g. ControlBar.wnd:ButtonCommand01), case-insensitive")
+    parser.add_argument("--prefix", help="Window NAME prefix (e.g. ControlBar.wnd:Button)")
+    parser.add_argument("--image", help="MappedImage referenced by any draw state")
+    parser.add_argument("--callback", help="Callback function name (system, input, tooltip or draw)")
+    parser.add_argument("--rect", nargs=4, type=int, metavar=("X1", "Y1", "X2", "Y2"), help="Windows intersecting this rect")
+    parser.add_argument("--file", help="Only report windows from files whose path contains this text")
+    parser.add_argument("--sources", nargs='+', default=["Window/**/*.wnd"], help="Glob(s) of WND files to index")
+    parser.add_argument("--index", default=".wnd_query_index.json", help="Index file ('' to disable persisting)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    files, rescanned = update_index(args.sources, args.index or None)
+    index = WindowQueryIndex(files)
+    loaded = time.perf_counter()
+    print(f"Indexed {len(index.windows)} windows in {len(files)} files ({rescanned} rescanned) in {(loaded - start) * 1000:.1f} ms.")
+
+    if args.name:
+        results = index.name(args.name)
+    elif args.prefix:
+        results = index.prefix(args.prefix)
+    elif args.image:
+        results = index.image(args.image)
+    elif args.callback:
+        results = index.callback(args.callback)
+    elif args.rect:
+        results = index.intersecting(*args.rect, file_filter=args.file)
+    else:
+        return
+    if args.file:
+        results = [w for w in results if args.file.lower() in w['file'].lower()]
+
+    for window in results:
+        print(format_window(window))
+    print(f"{len(results)} window(s) in {(time.perf_counter() - loaded) * 1000:.2f} ms.")
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,45 @@
 import re
 import argparse
-import random
 import os
+import sys
+import io
+import glob
+import filecmp
+import itertools
 import xml.etree.ElementTree as ET
-from PIL import Image
+from collections import defaultdict
+from mapped_image_index import MappedImageIndex
+from atomic_write import WriteBatch, atomic_write, write_if_changed, write_temp, recover_journals_for
+from svg_colors import name_rgb
+from window_model import parse_wnd_records
+from control_bar_resizer import (DEFAULT_DISPLAY_WIDTH, DEFAULT_DISPLAY_HEIGHT, parse_resizer_ini,
+                                 join_resizer_entries, alt_updates_to_entries, update_resizer_ini)
 
-def random_color():
-    """Generates a random RGB color string."""
-    r = random.randint(0, 255)
-    g = random.randint(0, 255)
-    b = random.randint(0, 255)
-    return f"rgb({r},{g},{b})"
+NAME_PATTERN = re.compile(r"NAME\s*=\s*\"([^\"]+)\"")
+DRAW_ENTRY_PATTERN = re.compile(r"IMAGE:\s*(\S+?),\s*COLOR:\s*(\d+\s+\d+\s+\d+\s+\d+),\s*BORDERCOLOR:\s*(\d+\s+\d+\s+\d+\s+\d+)")
+INKSCAPE_NS = "http://www.inkscape.org/namespaces/inkscape"
+RESIZER_LAYER_ID = "ControlBarResizer"
+ALT_SUFFIX = ":Alt"
+WND_PREFIX_SEPARATOR = ".wnd:"
+# Files this tool writes next to a source WND (preprocess_wnd_if_needed, --updatenew)
+GENERATED_WND_SUFFIXES = ("_labeled.wnd", "_new.wnd")
 
-def parse_ini_file(filepath, mapped_images):
-    """Parses a single INI file and updates the mapped_images dict."""
-    try:
-        with open(filepath, 'r') as f:
-            content = f.read()
-    except Exception as e:
-        print(f"Error reading INI {filepath}: {e}")
-        return
-
-    current_image = None
-    
-    for line in content.splitlines():
-        line = line.strip()
-        if not line or line.startswith(';'):
-            continue
-            
-        if line.lower().startswith('mappedimage'):
-            parts = line.split()
-            if len(parts) >= 2:
-                image_name = parts[1]
-                current_image = {'name': image_name}
-        elif line.lower() == 'end':
-            if current_image:
-                mapped_images[current_image['name']] = current_image
-                current_image = None
-        elif current_image:
-            if '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip().lower()
-                value = value.strip()
-                
-                if key == 'texture':
-                    current_image['texture'] = value
-                elif key == 'texturewidth':
-                    current_image['width'] = int(value)
-                elif key == 'textureheight':
-                    current_image['height'] = int(value)
-                elif key == 'coords':
-                    coords = {}
-                    parts = value.split()
-                    for part in parts:
-                        if ':' in part:
-                            k, v = part.split(':')
-                            try:
-                                coords[k] = int(v)
-                            except ValueError:
-                                # Silently ignore or print debug if needed, but don't crash
-                                pass
-                    current_image['coords'] = coords
+TRANSFORM_PATTERN = re.compile(r"(translate|scale|matrix|rotate|skewX|skewY)\s*\(([^)]*)\)")
+RESOLUTION_PATTERN = re.compile(r"CREATIONRESOLUTION:\s*(\d+)\s+(\d+)")
+RECT_PATTERN = re.compile(r"(SCREENRECT\s*=\s*UPPERLEFT:\s*)(\d+)(\s+)(\d+)((?:,\s*|\s+)BOTTOMRIGHT:\s*)(\d+)(\s+)(\d+)", re.DOTALL)
 
 def scan_mapped_images(root_dir):
-    """Recursively scans for INI files and parses MappedImage definitions."""
-    mapped_images = {}
+    """
+    Recursively scans for INI files and indexes MappedImage definitions.
+    Returns a lazy MappedImageIndex: blocks are only parsed when looked up.
+    """
+    mapped_images = MappedImageIndex()
     if not os.path.exists(root_dir):
         print(f"Warning: MappedImages directory {root_dir} not found.")
         return mapped_images
 
     print(f"Scanning for INI files in {root_dir}...")
-    for root, dirs, files in os.walk(root_dir):
-        for file in files:
-            if file.lower().endswith('.ini'):
-                parse_ini_file(os.path.join(root, file), mapped_images)
+    mapped_images.add_path(root_dir)
     
     print(f"Loaded {len(mapped_images)} mapped images.")
     return mapped_images
@@ -97,16 +63,14 @@ def scan_textures(root_dir):
     print(f"Found {len(texture_map)} textures.")
     return texture_map
 
-def extract_and_save_image(image_info, output_dir, texture_map):
-    """Crops and saves the image."""
-    texture_name = image_info['texture']
-    
+def find_texture_path(texture_name, texture_map):
+    """Resolves a MappedImage Texture name to a file path, trying .tga/.png/.dds fallbacks."""
     # Try to find the texture in our map
     texture_path = texture_map.get(texture_name.lower())
+    base, ext = os.path.splitext(texture_name)
     
     if not texture_path:
         # Fallback: sometimes extension might differ (tga vs png vs dds)
-        base, ext = os.path.splitext(texture_name)
         # Try .png if .tga demanded
         texture_path = texture_map.get((base + ".png").lower())
         
@@ -123,16 +87,31 @@ def extract_and_save_image(image_info, output_dir, texture_map):
         elif os.path.exists(base + ".dds"):
             texture_path = base + ".dds"
 
+    return texture_path
+
+def crop_mapped_image(image_info, texture_map, texture_cache=None):
+    """
+    Returns the cropped PIL image for a MappedImage, or None.
+    Opened textures are kept in texture_cache (path -> texture) so each page is opened once per run;
+    DXT DDS pages only decode the blocks under the crop (see dds_texture).
+    """
+    texture_name = image_info.get('texture')
+    if not texture_name or 'coords' not in image_info:
+        return None
+
+    texture_path = find_texture_path(texture_name, texture_map)
     if not texture_path:
         print(f"Texture not found: {texture_name}")
         return None
 
+    # PIL, numpy and the DDS decoder load only when an image is actually cropped
+    from dds_texture import open_texture
     try:
-        img = Image.open(texture_path)
+        img = open_texture(texture_path, texture_cache)
     except Exception as e:
         print(f"Error opening {texture_path}: {e}")
         return None
-        
+
     ini_width = image_info.get('width', img.width)
     actual_width = img.width
     scale = actual_width / ini_width if ini_width > 0 else 1.0
@@ -146,7 +125,13 @@ def extract_and_save_image(image_info, output_dir, texture_map):
     if left >= right or top >= bottom:
          return None
 
-    cropped = img.crop((left, top, right, bottom))
+    return img.crop((left, top, right, bottom))
+
+def extract_and_save_image(image_info, output_dir, texture_map, texture_cache=None):
+    """Crops and saves the image."""
+    cropped = crop_mapped_image(image_info, texture_map, texture_cache)
+    if cropped is None:
+        return None
     
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -156,130 +141,373 @@ def extract_and_save_image(image_info, output_dir, texture_map):
     cropped.save(output_path)
     return output_path
 
-def parse_wnd_and_generate_svg(wnd_path, mapped_images_dir, textures_dir, output_dir):
+def scaled_image_path(output_dir, name, scale):
+    """Path of a MappedImage written at a Coords scale: <output_dir>/<scale>x/<name>.png."""
+    return os.path.join(output_dir, f"{scale:g}x", f"{name}.png")
+
+def build_scale_pyramid(cropped, base_size, scales):
+    """
+    Resamples one crop to every scale of base_size (the Coords size, i.e. 1x).
+    Scales are produced largest first and each level is resampled from the smallest level
+    still at or above the texture's own resolution. Returns {scale: image}.
+    """
+    from PIL import Image
+
+    levels = {}
+    source = cropped
+    for scale in sorted(set(scales), reverse=True):
+        size = (max(1, round(base_size[0] * scale)), max(1, round(base_size[1] * scale)))
+        factor = source.width // size[0]
+        if source.size == size:
+            level = source
+        elif factor > 1 and source.size == (size[0] * factor, size[1] * factor):
+            level = source.reduce(factor)
+        else:
+            level = source.resize(size, Image.LANCZOS)
+        levels[scale] = level
+        # Upscaled levels carry no extra detail, so smaller levels keep sampling the original crop
+        if level.width <= cropped.width and level.height <= cropped.height:
+            source = level
+    return levels
+
+def extract_scaled_images(mapped_images, names, output_dir, texture_map, scales=(1, 2, 4), texture_cache=None):
+    """
+    Writes each MappedImage at every requested scale of its Coords size in a single pass per texture.
+    Outputs that are newer than both the texture and the INI defining the image are reused without
+    opening the texture. Returns {name: {scale: path}}.
+    """
+    if texture_cache is None:
+        texture_cache = {}
+
+    by_texture = defaultdict(list)
+    for name in names:
+        image_info = mapped_images.get(name)
+        if not image_info or 'coords' not in image_info:
+            continue
+        texture_path = find_texture_path(image_info.get('texture', ''), texture_map)
+        if texture_path:
+            by_texture[texture_path].append(image_info)
+        else:
+            print(f"Texture not found: {image_info.get('texture')}")
+
+    results = {}
+    reused = 0
+    for texture_path, image_infos in by_texture.items():
+        texture_mtime = os.path.getmtime(texture_path)
+        for image_info in image_infos:
+            name = image_info['name']
+            paths = {scale: scaled_image_path(output_dir, name, scale) for scale in scales}
+            source_mtime = texture_mtime
+            if name in getattr(mapped_images, 'locations', {}):
+                source_mtime = max(source_mtime, os.path.getmtime(mapped_images.locations[name][0]))
+            if all(os.path.exists(p) and os.path.getmtime(p) >= source_mtime for p in paths.values()):
+                results[name] = paths
+                reused += 1
+                continue
+
+            cropped = crop_mapped_image(image_info, texture_map, texture_cache)
+            if cropped is None:
+                continue
+            coords = image_info['coords']
+            base_size = (coords['Right'] - coords['Left'], coords['Bottom'] - coords['Top'])
+            for scale, level in build_scale_pyramid(cropped.convert('RGBA'), base_size, scales).items():
+                os.makedirs(os.path.dirname(paths[scale]), exist_ok=True)
+                level.save(paths[scale])
+            results[name] = paths
+        # Done with this page; don't keep every decoded texture alive for the whole run
+        texture_cache.pop(texture_path, None)
+
+    print(f"Wrote {len(results) - reused} images at {', '.join(f'{s:g}x' for s in scales)} ({reused} up to date).")
+    return results
+
+def parse_draw_data(block_str, key="ENABLEDDRAWDATA"):
+    """
+    Parses a *DRAWDATA property into a list of {'image', 'color', 'border'} entries,
+    where color/border are (r, g, b, a) tuples.
+    """
+    match = re.search(key + r"\s*=\s*(.*?);", block_str, re.DOTALL)
+    if not match:
+        return []
+    entries = []
+    for m in DRAW_ENTRY_PATTERN.finditer(match.group(1)):
+        entries.append({
+            'image': m.group(1),
+            'color': tuple(int(v) for v in m.group(2).split()),
+            'border': tuple(int(v) for v in m.group(3).split()),
+        })
+    return entries
+
+def parse_window_block(block_str):
+    """Parses the properties of a single WINDOW (its own lines, without children) into a dict."""
+    window = {'name': None, 'x': 0, 'y': 0, 'width': 0, 'height': 0,
+              'status': '', 'draw_callback': '', 'draw_data': [], 'images': [], 'children': []}
+
+    name_match = NAME_PATTERN.search(block_str)
+    if name_match:
+        window['name'] = name_match.group(1)
+
+    rect_match = RECT_PATTERN.search(block_str)
+    if rect_match:
+        x1, y1 = int(rect_match.group(2)), int(rect_match.group(4))
+        x2, y2 = int(rect_match.group(6)), int(rect_match.group(8))
+        window.update({'x': x1, 'y': y1, 'width': x2 - x1, 'height': y2 - y1})
+
+    status_match = re.search(r"STATUS\s*=\s*([^;]*);", block_str)
+    if status_match:
+        window['status'] = status_match.group(1).strip()
+
+    callback_match = re.search(r"DRAWCALLBACK\s*=\s*\"([^\"]*)\"", block_str)
+    if callback_match:
+        window['draw_callback'] = callback_match.group(1)
+
+    window['draw_data'] = parse_draw_data(block_str)
+    window['images'] = [d['image'] for d in window['draw_data'] if d['image'] != "NoImage"]
+    return window
+
+def parse_wnd_tree(lines, table=None, on_block=None):
+    """
+    Parses WND lines into a list of top-level windows. Each window keeps its
+    CHILD windows (nested through CHILD/ENDALLCHILDREN) in window['children'].
+    Windows are compact window_model.Window records read like the window dicts
+    (window['name'], window['x'], ...); pass a shared WindowTable to store many files together.
+    on_block(window, block_str) sees each window's own text (see window_model.parse_wnd_records).
+    """
+    return parse_wnd_records(lines, table, on_block)
+
+def iter_window_tree(windows, depth=0, parent=None):
+    """Yields (window, depth, parent) in draw order: parents before their children."""
+    for window in windows:
+        yield window, depth, parent
+        yield from iter_window_tree(window['children'], depth + 1, window)
+
+def is_generated_wnd(path):
+    """True for the _labeled/_NEW copies this tool derives from a source WND."""
+    return path.lower().endswith(GENERATED_WND_SUFFIXES)
+
+def read_creation_resolution(wnd_path):
+    """Returns the first CREATIONRESOLUTION of a WND as (width, height), or None. Stops reading at the match."""
+    with open(wnd_path, 'r') as f:
+        for line in f:
+            res_match = RESOLUTION_PATTERN.search(line)
+            if res_match:
+                return int(res_match.group(1)), int(res_match.group(2))
+    return None
+
+def join_lines(lines):
+    """'\\n'.join(lines) as a generator of chunks, so joined output can be streamed to a file."""
+    for i, line in enumerate(lines):
+        yield line if i == 0 else "\n" + line
+
+def parse_wnd_and_generate_svg(wnd_path, mapped_images_dir, textures_dir, output_dir, resizer_path=None, scales=None, nested=True, resources=None):
+    """
+    Generates an SVG next to the WND with one <g id="Window Name"> per window.
+    Groups are nested like the CHILD tree (nested=False writes the old flat list of siblings).
+    With resizer_path, ControlBarResizer alt rects are added as a hidden, toggleable layer.
+    With scales, images are written at each Coords scale (see extract_scaled_images) and the
+    SVG links the largest one, for sharper zoomed previews.
+    resources is an optional (mapped_images, texture_map, texture_cache) tuple scanned once and
+    shared by many calls; the directories are scanned otherwise.
+    Returns {'svg', 'windows', 'images'} (image links written), or None if the WND is missing.
+    """
     if not os.path.exists(wnd_path):
         print(f"Error: File {wnd_path} not found.")
-        return
+        return None
 
     # Scan resources
-    mapped_images = scan_mapped_images(mapped_images_dir)
-    texture_map = scan_textures(textures_dir)
+    if resources:
+        mapped_images, texture_map, texture_cache = resources
+    else:
+        mapped_images = scan_mapped_images(mapped_images_dir)
+        texture_map = scan_textures(textures_dir)
+        texture_cache = {}
     
-    with open(wnd_path, 'r') as f:
-        content = f.read()
-
     # Find Creation Resolution (First one)
-    res_match = re.search(r"CREATIONRESOLUTION:\s*(\d+)\s+(\d+)", content)
-    if res_match:
-        width = int(res_match.group(1))
-        height = int(res_match.group(2))
+    resolution = read_creation_resolution(wnd_path)
+    if resolution:
+        width, height = resolution
     else:
         print("Warning: CREATIONRESOLUTION not found, defaulting to 800x600.")
         width = 800
         height = 600
 
-    windows = []
-    
-    blocks = content.split("WINDOW")
-    
-    for block in blocks:
-        block = block.strip()
-        if not block: continue
-        
-        # Check if this block has SCREENRECT and NAME
-        rect_match = re.search(r"SCREENRECT\s*=\s*UPPERLEFT:\s*(\d+)\s+(\d+),\s*BOTTOMRIGHT:\s*(\d+)\s+(\d+)", block, re.DOTALL)
-        name_match = re.search(r"NAME\s*=\s*\"([^\"]+)\"", block)
-        
-        if rect_match and name_match:
-            x1 = int(rect_match.group(1))
-            y1 = int(rect_match.group(2))
-            x2 = int(rect_match.group(3))
-            y2 = int(rect_match.group(4))
-            name = name_match.group(1)
-            
-            rect_width = x2 - x1
-            rect_height = y2 - y1
-            
-            window = {
-                'name': name,
-                'x': x1,
-                'y': y1,
-                'width': rect_width,
-                'height': rect_height,
-                'images': []
-            }
-            
-            # Find ENABLEDDRAWDATA
-            draw_data_match = re.search(r"ENABLEDDRAWDATA\s*=\s*(.*?);", block, re.DOTALL)
-            if draw_data_match:
-                draw_str = draw_data_match.group(1)
-                items = draw_str.split(',')
-                for item in items:
-                    item = item.strip()
-                    img_match = re.search(r"IMAGE:\s*(\w+)", item)
-                    if img_match:
-                        img_name = img_match.group(1)
-                        if img_name != "NoImage":
-                            window['images'].append(img_name)
-                            
-            windows.append(window)
+    # The file is parsed as it is read; only the compact window records are kept
+    with open(wnd_path, 'r') as f:
+        window_tree = parse_wnd_tree(f)
+    windows = [win for win, _, _ in iter_window_tree(window_tree) if win['name']]
 
     print(f"Found {len(windows)} windows.")
 
+    scaled_paths = {}
+    if scales:
+        used = {img_name for win in windows for img_name in win['images'] if img_name in mapped_images}
+        scaled_paths = extract_scaled_images(mapped_images, sorted(used), output_dir, texture_map, scales, texture_cache)
+
+    alt_rects = {}
+    if resizer_path:
+        entries = parse_resizer_ini(resizer_path)
+        alt_rects = join_resizer_entries(window_tree, entries, (width, height))
+        print(f"Joined {len(alt_rects)} of {len(entries)} ControlBarResizer entries.")
+
     # Generate SVG
-    svg_lines = [
-        f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">',
-        '  <style>',
-        '    rect { stroke: none; fill-opacity: 0.25; }',
-        '    text { font-family: Arial, sans-serif; font-size: 10px; fill: black; text-anchor: middle; dominant-baseline: middle; pointer-events: none; }',
-        '  </style>'
-    ]
-
-    for win in windows:
-        color = random_color()
-        svg_lines.append(f'  <g id="{win["name"]}">')
-        svg_lines.append(f'    <rect x="{win["x"]}" y="{win["y"]}" width="{win["width"]}" height="{win["height"]}" fill="{color}" />')
-        
-        # Add Images
-        for img_name in win['images']:
-            if img_name in mapped_images:
-                saved_path = extract_and_save_image(mapped_images[img_name], output_dir, texture_map)
-                if saved_path:
-                    # Convert to absolute path and forward slashes for SVG
-                    abs_path = os.path.abspath(saved_path)
-                    href = abs_path.replace('\\', '/')
-                    # Use file:/// URI format as requested
-                    if not href.startswith('file:///'):
-                         href = 'file:///' + href
-                    
-                    svg_lines.append(f'    <image href="{href}" x="{win["x"]}" y="{win["y"]}" width="{win["width"]}" height="{win["height"]}" />')
-            else:
-                pass 
-                # print(f"Warning: Mapped image {img_name} not found in INI.")
-                
-        svg_lines.append('  </g>')
+    namespaces = 'xmlns="http://www.w3.org/2000/svg"'
+    if alt_rects:
+        namespaces += f' xmlns:inkscape="{INKSCAPE_NS}"'
+
+    image_count = [0]
 
-    svg_lines.append('</svg>')
+    # SVG lines are generated window by window and streamed into the output file
+    def window_lines(win, depth):
+        indent = "  " * depth
+        named = bool(win['name'])
+        if named:
+            color = name_rgb(win['name'])
+            yield f'{indent}<g id="{win["name"]}">'
+            yield f'{indent}  <rect x="{win["x"]}" y="{win["y"]}" width="{win["width"]}" height="{win["height"]}" fill="{color}" />'
+
+            # Add Images
+            for img_name in win['images']:
+                if img_name in mapped_images:
+                    if scales:
+                        saved_path = scaled_paths.get(img_name, {}).get(max(scales))
+                    else:
+                        saved_path = extract_and_save_image(mapped_images[img_name], output_dir, texture_map, texture_cache)
+                    if saved_path:
+                        # Convert to absolute path and forward slashes for SVG
+                        abs_path = os.path.abspath(saved_path)
+                        href = abs_path.replace('\\', '/')
+                        # Use file:/// URI format as requested
+                        if not href.startswith('file:///'):
+                             href = 'file:///' + href
+
+                        image_count[0] += 1
+                        yield f'{indent}  <image href="{href}" x="{win["x"]}" y="{win["y"]}" width="{win["width"]}" height="{win["height"]}" />'
+            if not nested:
+                yield f'{indent}</g>'
+
+        # Nested: children live inside the parent's group, so moving the group moves the whole panel
+        child_depth = depth + 1 if nested and named else depth
+        for child in win['children']:
+            yield from window_lines(child, child_depth)
+
+        if named and nested:
+            yield f'{indent}</g>'
+
+    def svg_lines():
+        yield f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" {namespaces}>'
+        yield '  <style>'
+        yield '    rect { stroke: none; fill-opacity: 0.25; }'
+        yield '    text { font-family: Arial, sans-serif; font-size: 10px; fill: black; text-anchor: middle; dominant-baseline: middle; pointer-events: none; }'
+        yield '  </style>'
+
+        for win in window_tree:
+            yield from window_lines(win, 1)
+
+        if alt_rects:
+            # Hidden Inkscape layer; toggle it in the Layers panel to edit the alt layout
+            yield f'  <g id="{RESIZER_LAYER_ID}" inkscape:groupmode="layer" inkscape:label="ControlBarResizer (Alt)" style="display:none">'
+            for name, alt in alt_rects.items():
+                yield f'    <g id="{name}{ALT_SUFFIX}">'
+                yield f'      <rect x="{alt["x"]}" y="{alt["y"]}" width="{alt["width"]}" height="{alt["height"]}" fill="none" stroke="red" stroke-width="2" />'
+                yield '    </g>'
+            yield '  </g>'
+
+        yield '</svg>'
     
     # Create output filename in the same directory as the WND file
     wnd_dir = os.path.dirname(os.path.abspath(wnd_path))
     output_filename = os.path.join(wnd_dir, os.path.splitext(os.path.basename(wnd_path))[0] + ".svg")
     
-    with open(output_filename, 'w') as f:
-        f.write('\n'.join(svg_lines))
-        
-    print(f"Saved SVG to {output_filename}")
+    # Regenerating an unchanged layout leaves the file (and its mtime) alone
+    if write_if_changed(output_filename, join_lines(svg_lines())):
+        print(f"Saved SVG to {output_filename}")
+    else:
+        print(f"SVG unchanged: {output_filename}")
+    return {'svg': output_filename, 'windows': len(windows), 'images': image_count[0]}
+
+# SVG affine (a, b, c, d, e, f): x' = a*x + c*y + e, y' = b*x + d*y + f
+IDENTITY_TRANSFORM = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+def compose_transforms(m, n):
+    """m applied after n, as for a transform nested inside another."""
+    return (m[0] * n[0] + m[2] * n[1],
+            m[1] * n[0] + m[3] * n[1],
+            m[0] * n[2] + m[2] * n[3],
+            m[1] * n[2] + m[3] * n[3],
+            m[0] * n[4] + m[2] * n[5] + m[4],
+            m[1] * n[4] + m[3] * n[5] + m[5])
+
+def apply_transform(m, x, y):
+    return m[0] * x + m[2] * y + m[4], m[1] * x + m[3] * y + m[5]
+
+def parse_transform(value):
+    """
+    Parses an SVG transform attribute (translate/scale/matrix, in order) into an (a, b, c, d, e, f) affine.
+    Other operations (rotate, skew) can't be expressed as a SCREENRECT and are ignored.
+    """
+    matrix = IDENTITY_TRANSFORM
+    for op, args in TRANSFORM_PATTERN.findall(value or ""):
+        nums = [float(v) for v in re.split(r"[\s,]+", args.strip()) if v]
+        if op == 'translate' and nums:
+            step = (1.0, 0.0, 0.0, 1.0, nums[0], nums[1] if len(nums) > 1 else 0.0)
+        elif op == 'scale' and nums:
+            step = (nums[0], 0.0, 0.0, nums[1] if len(nums) > 1 else nums[0], 0.0, 0.0)
+        elif op == 'matrix' and len(nums) == 6:
+            step = tuple(nums)
+        else:
+            print(f"Warning: ignoring unsupported transform {op}({args})")
+            continue
+        matrix = compose_transforms(matrix, step)
+    return matrix
+
+def cluster_edges(values, tolerance):
+    """
+    Sort-and-merge clustering of edge coordinates: after sorting, a value joins the current
+    cluster while it is within tolerance of the cluster's first value. Every value is replaced
+    by the mean of its cluster.
+    """
+    import numpy as np
+
+    order = np.argsort(values, kind='stable')
+    ordered = values[order]
+    merged = np.empty_like(values)
+    start = 0
+    for i in range(1, len(ordered) + 1):
+        if i == len(ordered) or ordered[i] - ordered[start] > tolerance:
+            merged[order[start:i]] = ordered[start:i].mean()
+            start = i
+    return merged
+
+def snap_rects(x, y, w, h, tolerance=0.9, grid=1):
+    """
+    Aligns float rects before they are written: nearly equal left/right edges (and top/bottom
+    edges) across all rects are merged to a shared value, which is then rounded to the grid.
+    Returns integer (x, y, w, h) arrays. A rect never collapses below one grid step.
+    """
+    import numpy as np
+
+    n = len(x)
+    grid = max(int(grid), 1)
+    xs = cluster_edges(np.concatenate([x, x + w]), tolerance)
+    ys = cluster_edges(np.concatenate([y, y + h]), tolerance)
+    xs = (np.round(xs / grid) * grid).astype(int)
+    ys = (np.round(ys / grid) * grid).astype(int)
+    x1, x2 = xs[:n], xs[n:]
+    y1, y2 = ys[:n], ys[n:]
+    x2 = np.where((x2 <= x1) & (w >= 0.5), x1 + grid, x2)
+    y2 = np.where((y2 <= y1) & (h >= 0.5), y1 + grid, y2)
+    return x1, y1, np.maximum(x2 - x1, 0), np.maximum(y2 - y1, 0)
+
+def parse_svg_updates(svg_path, snap=None, grid=1):
+    """
+    Parses the SVG and returns (updates, svg_width, svg_height, alt_updates), where updates maps
+    each group id (the Window Name) to {x, y, w, h} and alt_updates does the same for the
+    ControlBarResizer layer. Returns None on parse errors.
+    Group transforms apply to everything nested inside them, so moving a parent group in a
+    nested SVG moves all its descendants: each rect gets the transforms composed along its path.
+    Coordinates are truncated to ints, unless snap (an edge tolerance in pixels) is given: then
+    nearly equal edges are aligned and rounded to the grid by snap_rects (the only part that needs numpy).
+    """
 
-def update_wnd_from_svg(wnd_path, svg_path, output_path):
-    """Updates the WND file using coordinates from the SVG."""
-    if not os.path.exists(wnd_path):
-        print(f"Error: WND file {wnd_path} not found.")
-        return
-    if not os.path.exists(svg_path):
-        print(f"Error: SVG file {svg_path} not found.")
-        return
-        
-    # Parse SVG
     try:
         tree = ET.parse(svg_path)
         root = tree.getroot()
@@ -294,46 +522,199 @@ def update_wnd_from_svg(wnd_path, svg_path, output_path):
         
     except Exception as e:
         print(f"Error parsing SVG: {e}")
-        return
+        return None
 
     updates = {} # Name -> {x, y, w, h}
-    
+    alt_updates = {} # Name -> {x, y, w, h} from the ControlBarResizer layer
+
     # We look for groups <g id="..."> which contain <rect ...>
     # The ID is the Window Name
-    for group in root.findall(".//g"):
-        group_id = group.get('id')
-        if not group_id: continue
-        
-        # Find the rect inside
-        rect = group.find("rect")
-        if rect is not None:
-             try:
-                x = float(rect.get('x'))
-                y = float(rect.get('y'))
-                w = float(rect.get('width'))
-                h = float(rect.get('height'))
-                updates[group_id] = {'x': int(x), 'y': int(y), 'w': int(w), 'h': int(h)}
-             except ValueError:
-                 continue
+    ids = [] # (target dict, window name)
+    rects = [] # (x, y, w, h) after the composed transforms
 
-    print(f"Found {len(updates)} updates from SVG.")
-    
-    # Process WND file
-    with open(wnd_path, 'r') as f:
-        lines = f.readlines()
-        
-    new_lines = []
+    def walk(elem, matrix):
+        if elem.get('transform'):
+            matrix = compose_transforms(matrix, parse_transform(elem.get('transform')))
+        group_id = elem.get('id') if elem.tag == 'g' else None
+        if group_id and group_id != RESIZER_LAYER_ID:
+            target = updates
+            if group_id.endswith(ALT_SUFFIX):
+                group_id = group_id[:-len(ALT_SUFFIX)]
+                target = alt_updates
+
+            # Find the rect inside
+            rect = elem.find("rect")
+            if rect is not None:
+                try:
+                    bx, by = float(rect.get('x')), float(rect.get('y'))
+                    bw, bh = float(rect.get('width')), float(rect.get('height'))
+                    rect_matrix = compose_transforms(matrix, parse_transform(rect.get('transform'))) if rect.get('transform') else matrix
+                    # Transform both corners; flips are normalized by min/abs
+                    x1, y1 = apply_transform(rect_matrix, bx, by)
+                    x2, y2 = apply_transform(rect_matrix, bx + bw, by + bh)
+                    ids.append((target, group_id))
+                    rects.append((min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1)))
+                except (TypeError, ValueError):
+                    pass
+        for child in elem:
+            if child.tag not in ('rect', 'image', 'text'):
+                walk(child, matrix)
+
+    walk(root, IDENTITY_TRANSFORM)
+    if not ids:
+        return updates, svg_width, svg_height, alt_updates
+
+    x, y, w, h = (list(column) for column in zip(*rects))
+    if snap is not None:
+        # Only --snap needs numpy; a plain update never loads it
+        import numpy as np
+        x, y, w, h = snap_rects(np.array(x), np.array(y), np.array(w), np.array(h), snap, grid)
+
+    for i, (target, group_id) in enumerate(ids):
+        target[group_id] = {'x': int(x[i]), 'y': int(y[i]), 'w': int(w[i]), 'h': int(h[i])}
+
+    return updates, svg_width, svg_height, alt_updates
+
+def iter_wnd_blocks(lines):
+    """Yields the lines of a WND file grouped into blocks, split at each WINDOW/CHILD line."""
     buffer = []
-    
+    for line in lines:
+        stripped = line.strip()
+        
+        # Start of a new block triggers processing of the previous buffer
+        if stripped == "WINDOW" or stripped == "CHILD": 
+            if buffer:
+                yield buffer
+            buffer = []
+            
+        buffer.append(line)
+        
+    if buffer:
+        yield buffer
+
+def resolve_update_id(name, updates, ambiguous_counters):
+    """
+    Returns the SVG id used for a window NAME. Ambiguous names (ending in :) fall back
+    to NameAutoLabel_Count when the exact name isn't in the SVG.
+    """
+    if name.endswith(':'):
+        ambiguous_counters[name] += 1
+        fallback_id = f"{name}AutoLabel_{ambiguous_counters[name]}"
+        if name not in updates and fallback_id in updates:
+            return fallback_id
+    return name
+
+def rect_key(rect):
+    """Returns the hashable (x, y, w, h) record of a rect, so unchanged windows compare in one step."""
+    return (rect['x'], rect['y'], rect['w'], rect['h'])
+
+def parse_wnd_rects(lines, updates):
+    """Returns {update_id: {x, y, w, h}} for every named window with a SCREENRECT, in file order."""
+    wnd_rects = {}
+    ambiguous_counters = defaultdict(int)
+    for block_lines in iter_wnd_blocks(lines):
+        block_str = "".join(block_lines)
+        name_match = NAME_PATTERN.search(block_str)
+        if not name_match:
+            continue
+        update_id = resolve_update_id(name_match.group(1), updates, ambiguous_counters)
+        rect_match = RECT_PATTERN.search(block_str)
+        if rect_match:
+            x1, y1 = int(rect_match.group(2)), int(rect_match.group(4))
+            x2, y2 = int(rect_match.group(6)), int(rect_match.group(8))
+            wnd_rects[update_id] = {'x': x1, 'y': y1, 'w': x2 - x1, 'h': y2 - y1}
+    return wnd_rects
+
+def diff_layout(wnd_rects, updates):
+    """
+    Compares WND geometry against SVG geometry.
+    Returns a list of (kind, name, old, new) with kind in moved/resized/missing/extra.
+    A window that both moved and resized is reported once per kind.
+    """
+    changes = []
+    for name, old in wnd_rects.items():
+        new = updates.get(name)
+        if new is None:
+            changes.append(('missing', name, old, None))
+            continue
+        if rect_key(old) == rect_key(new):
+            continue
+        if (old['x'], old['y']) != (new['x'], new['y']):
+            changes.append(('moved', name, old, new))
+        if (old['w'], old['h']) != (new['w'], new['h']):
+            changes.append(('resized', name, old, new))
+    for name, new in updates.items():
+        if name not in wnd_rects:
+            changes.append(('extra', name, None, new))
+    return changes
+
+def print_layout_diff(changes):
+    """Prints a compact, one-line-per-change summary of diff_layout output."""
+    if not changes:
+        print("Layout diff: no changes.")
+        return
+    for kind, name, old, new in changes:
+        if kind == 'moved':
+            print(f"  moved    {name}: ({old['x']},{old['y']}) -> ({new['x']},{new['y']})")
+        elif kind == 'resized':
+            print(f"  resized  {name}: {old['w']}x{old['h']} -> {new['w']}x{new['h']}")
+        elif kind == 'missing':
+            print(f"  missing  {name}: in WND, not in SVG")
+        elif kind == 'extra':
+            print(f"  extra    {name}: in SVG, not in WND")
+    counts = defaultdict(int)
+    for kind, _, _, _ in changes:
+        counts[kind] += 1
+    summary = ", ".join(f"{counts[k]} {k}" for k in ('moved', 'resized', 'missing', 'extra') if counts[k])
+    print(f"Layout diff: {summary}.")
+
+def update_resizer_from_alt(lines, alt_updates, svg_width, svg_height, resizer_path, dry_run=False, batch=None):
+    """
+    Writes alt rects edited in the SVG back into ControlBarResizer.ini (unedited children keep following their parent).
+    With batch (an atomic_write.WriteBatch), the INI is staged there instead of written right away.
+    lines may be any line iterable, such as an open WND file.
+    """
+    res_matches = []
+
+    def watch(lines):
+        # Picks up the first CREATIONRESOLUTION while the parser consumes the lines
+        for line in lines:
+            if not res_matches:
+                res_match = RESOLUTION_PATTERN.search(line)
+                if res_match:
+                    res_matches.append(res_match)
+            yield line
+
+    window_tree = parse_wnd_tree(watch(lines))
+    if svg_width and svg_height:
+        creation_res = (int(float(svg_width.replace('px', ''))), int(float(svg_height.replace('px', ''))))
+    elif res_matches:
+        creation_res = (int(res_matches[0].group(1)), int(res_matches[0].group(2)))
+    else:
+        creation_res = (DEFAULT_DISPLAY_WIDTH, DEFAULT_DISPLAY_HEIGHT)
+
+    entries = parse_resizer_ini(resizer_path)
+    alt_rects = join_resizer_entries(window_tree, entries, creation_res)
+    changed = alt_updates_to_entries(alt_updates, alt_rects, entries, creation_res)
+    if not changed:
+        print("ControlBarResizer: no changes.")
+        return
+    for name, entry in changed.items():
+        print(f"  alt      {name}: AltPosition X:{entry['x']} Y:{entry['y']} AltSize X:{entry['w']} Y:{entry['h']}")
+    if not dry_run:
+        update_resizer_ini(resizer_path, changed, batch=batch)
+
+def iter_svg_updates(lines, updates, svg_width, svg_height):
+    """
+    Yields the WND lines with CREATIONRESOLUTION set to the SVG size and the SCREENRECT of
+    every window found in updates replaced. Everything else is kept as is.
+    Works block by block, so only one window block of lines is held at a time.
+    """
     # Map to track occurrences of ambiguous names
     # Key: NAME string (including the :), Value: integer count
-    from collections import defaultdict
     ambiguous_counters = defaultdict(int)
 
     def process_block(block_lines):
-        if not block_lines:
-            return []
-            
         block_str = "".join(block_lines)
         
         # 1. Update CREATIONRESOLUTION if present
@@ -342,56 +723,239 @@ def update_wnd_from_svg(wnd_path, svg_path, output_path):
             block_str = re.sub(res_pattern, f"\\g<1>{svg_width}\\g<3>{svg_height}", block_str)
             
         # 2. Update SCREENRECT if we have a matching NAME
-        name_match = re.search(r"NAME\s*=\s*\"([^\"]+)\"", block_str)
+        name_match = NAME_PATTERN.search(block_str)
         if name_match:
-            name = name_match.group(1)
-            
             # Determine which ID to look up
-            update_id = name
-            
-            # Check if ambiguous (ends in :)
-            if name.endswith(':'):
-                ambiguous_counters[name] += 1
-                count = ambiguous_counters[name]
-                # Construct fallback ID: NameAutoLabel_Count
-                fallback_id = f"{name}AutoLabel_{count}"
-                
-                # If the exact name isn't in updates, but the fallback is, use fallback
-                if name not in updates and fallback_id in updates:
-                    update_id = fallback_id
+            update_id = resolve_update_id(name_match.group(1), updates, ambiguous_counters)
             
             if update_id in updates:
                 u = updates[update_id]
                 new_x2 = u['x'] + u['w']
                 new_y2 = u['y'] + u['h']
                 
-                rect_pattern = r"(SCREENRECT\s*=\s*UPPERLEFT:\s*)(\d+)(\s+)(\d+)((?:,\s*|\s+)BOTTOMRIGHT:\s*)(\d+)(\s+)(\d+)"
-                
                 def replace_coords(m):
                     return f"{m.group(1)}{u['x']}{m.group(3)}{u['y']}{m.group(5)}{new_x2}{m.group(7)}{new_y2}"
                 
-                block_str = re.sub(rect_pattern, replace_coords, block_str, flags=re.DOTALL)
+                block_str = RECT_PATTERN.sub(replace_coords, block_str)
         
         # Convert back to lines
-        import io
         return io.StringIO(block_str).readlines()
 
-    for line in lines:
-        stripped = line.strip()
-        
-        # Start of a new block triggers processing of the previous buffer
-        if stripped == "WINDOW" or stripped == "CHILD": 
-            new_lines.extend(process_block(buffer))
-            buffer = []
-            
-        buffer.append(line)
+    for block_lines in iter_wnd_blocks(lines):
+        yield from process_block(block_lines)
+
+def same_lines(lines, path):
+    """True if a line iterable equals the lines of the file at path. Both sides are streamed; nothing is written."""
+    if not os.path.exists(path):
+        return False
+    with open(path, 'r') as f:
+        return all(a == b for a, b in itertools.zip_longest(lines, f))
+
+def apply_svg_updates(lines, updates, svg_width, svg_height):
+    """iter_svg_updates as a list of lines."""
+    return list(iter_svg_updates(lines, updates, svg_width, svg_height))
+
+def update_wnd_from_svg(wnd_path, svg_path, output_path, diff=False, dry_run=False, resizer_path=None, snap=None, grid=1):
+    """
+    Updates the WND file using coordinates from the SVG.
+    The output is only written when its content actually changes. With diff (or dry_run)
+    a compact change list is printed first; dry_run never writes.
+    With resizer_path, edited ControlBarResizer alt rects are written back to that INI as well.
+    snap/grid align the SVG rects first (see parse_svg_updates).
+    Returns {'updates', 'written'}, or None when the WND or SVG can't be read.
+    """
+    if not os.path.exists(wnd_path):
+        print(f"Error: WND file {wnd_path} not found.")
+        return None
+    if not os.path.exists(svg_path):
+        print(f"Error: SVG file {svg_path} not found.")
+        return None
         
-    # Process final buffer
-    new_lines.extend(process_block(buffer))
+    parsed = parse_svg_updates(svg_path, snap, grid)
+    if parsed is None:
+        return None
+    updates, svg_width, svg_height, alt_updates = parsed
+    summary = {'updates': len(updates), 'written': False}
+
+    print(f"Found {len(updates)} updates from SVG.")
     
-    with open(output_path, 'w') as f:
-        f.writelines(new_lines)
+    # Each pass streams the WND again instead of keeping its lines around
+    if diff or dry_run:
+        with open(wnd_path, 'r') as f:
+            print_layout_diff(diff_layout(parse_wnd_rects(f, updates), updates))
+
+    # Finish any batch a crash interrupted before this one writes next to it (the INI is staged first)
+    if not dry_run:
+        recover_journals_for([output_path] + ([resizer_path] if resizer_path and alt_updates else []))
+
+    # The WND and the resizer INI are committed together or not at all
+    with WriteBatch() as batch:
+        if resizer_path and alt_updates:
+            with open(wnd_path, 'r') as f:
+                update_resizer_from_alt(f, alt_updates, svg_width, svg_height, resizer_path, dry_run, batch)
+
+        if dry_run:
+            print("Dry run: no files written.")
+            return summary
+
+        # Written block by block into a temp file; skipped (no VCS churn) when it matches the output
+        with open(wnd_path, 'r') as f:
+            staged = batch.stage(output_path, iter_svg_updates(f, updates, svg_width, svg_height), skip_unchanged=True)
+        if not staged:
+            print(f"No changes; {output_path} left untouched.")
+            return summary
     print(f"Saved updated WND to {output_path}")
+    summary['written'] = True
+    return summary
+
+def name_suffix(name):
+    """Returns the part of a window name after '<File>.wnd:', or None for names without a file prefix."""
+    if WND_PREFIX_SEPARATOR not in name:
+        return None
+    return name.split(WND_PREFIX_SEPARATOR, 1)[1] or None
+
+def build_suffix_updates(updates):
+    """
+    Maps each '<File>.wnd:<Suffix>' SVG id to its suffix, so layouts shared by several WNDs can be
+    matched across files. Suffixes that appear with different rects are ambiguous and left out.
+    Returns (suffix_updates, ambiguous).
+    """
+    suffix_updates = {}
+    ambiguous = set()
+    for update_id, rect in updates.items():
+        suffix = name_suffix(update_id)
+        if suffix is None or suffix in ambiguous:
+            continue
+        if suffix in suffix_updates and rect_key(suffix_updates[suffix]) != rect_key(rect):
+            ambiguous.add(suffix)
+            del suffix_updates[suffix]
+            continue
+        suffix_updates[suffix] = rect
+    return suffix_updates, ambiguous
+
+def _update_target(wnd_path, output_path, updates, suffix_updates, svg_width, svg_height, diff, dry_run=False):
+    """
+    Worker for update_wnds_from_svg: applies the shared SVG updates to one WND.
+    Exact names win; other prefixed names fall back to their suffix. The new WND is streamed
+    into a temp file next to output_path; the summary dict carries it as 'tmp_path' (None when
+    nothing changed) so committing stays with the caller. A dry run only compares, in memory.
+    """
+    file_updates = dict(updates)
+    by_suffix = 0
+    with open(wnd_path, 'r') as f:
+        for line in f:
+            for name in NAME_PATTERN.findall(line):
+                if name in file_updates:
+                    continue
+                suffix = name_suffix(name)
+                if suffix in suffix_updates:
+                    file_updates[name] = suffix_updates[suffix]
+                    by_suffix += 1
+
+    resolution = read_creation_resolution(wnd_path)
+    with open(wnd_path, 'r') as f:
+        wnd_rects = parse_wnd_rects(f, file_updates)
+    changes = diff_layout(wnd_rects, file_updates)
+    matched = sum(1 for name in wnd_rects if name in file_updates)
+
+    tmp_path = None
+    with open(wnd_path, 'r') as f:
+        new_lines = iter_svg_updates(f, file_updates, svg_width, svg_height)
+        if dry_run:
+            # --dry-run writes nothing, not even a temp file
+            modified = not same_lines(new_lines, output_path)
+        else:
+            tmp_path = write_temp(output_path, new_lines)
+            modified = not (os.path.exists(output_path) and filecmp.cmp(tmp_path, output_path, shallow=False))
+            if not modified:
+                os.remove(tmp_path)
+                tmp_path = None
+
+    return {
+        'wnd_path': wnd_path,
+        'output_path': output_path,
+        'windows': len(wnd_rects),
+        'matched': matched,
+        'by_suffix': by_suffix,
+        'changed': sum(1 for kind, _, _, _ in changes if kind in ('moved', 'resized')),
+        'resolution': f"{resolution[0]}x{resolution[1]}" if resolution else None,
+        # 'extra' is meaningless per file here: the SVG holds several layouts
+        'changes': [c for c in changes if c[0] != 'extra'] if diff else [],
+        'modified': modified,
+        'tmp_path': tmp_path,
+    }
+
+def update_wnds_from_svg(wnd_paths, svg_path, output_suffix="", diff=False, dry_run=False, jobs=None, snap=None, grid=1):
+    """
+    Applies one SVG to several WNDs: the SVG is parsed once and the targets are patched in
+    parallel, matching shared windows by the name after '.wnd:'. Each WND is written to
+    <base><output_suffix>.wnd (in place by default) only when it changes.
+    Prints a per-file summary and returns the list of summaries.
+    """
+    if not os.path.exists(svg_path):
+        print(f"Error: SVG file {svg_path} not found.")
+        return []
+    parsed = parse_svg_updates(svg_path, snap, grid)
+    if parsed is None:
+        return []
+    updates, svg_width, svg_height, _ = parsed
+
+    suffix_updates, ambiguous = build_suffix_updates(updates)
+    print(f"Found {len(updates)} updates from SVG ({len(suffix_updates)} shareable by suffix).")
+    if ambiguous:
+        print(f"Warning: {len(ambiguous)} suffixes have conflicting rects and only match exactly: {', '.join(sorted(ambiguous))}")
+
+    targets = []
+    for wnd_path in wnd_paths:
+        if not os.path.exists(wnd_path):
+            print(f"Error: WND file {wnd_path} not found.")
+            continue
+        output_path = os.path.splitext(wnd_path)[0] + output_suffix + ".wnd" if output_suffix else wnd_path
+        targets.append((wnd_path, output_path))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_update_target, wnd_path, output_path, updates, suffix_updates, svg_width, svg_height, diff, dry_run)
+                   for wnd_path, output_path in targets]
+        for future, (wnd_path, _) in zip(futures, targets):
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                print(f"Error updating {wnd_path}: {e}")
+
+    # Every changed WND was already written to a temp file by its worker; they are committed as one journaled batch
+    if not dry_run:
+        recover_journals_for([output_path for _, output_path in targets])
+    batch = WriteBatch()
+    for i, summary in enumerate(summaries):
+        status = "unchanged"
+        if summary['modified']:
+            status = "would write" if dry_run else f"written to {summary['output_path']}"
+        print(f"  {os.path.basename(summary['wnd_path'])}: {summary['matched']}/{summary['windows']} windows matched "
+              f"({summary['by_suffix']} by suffix), {summary['changed']} changed, {status}")
+        if svg_width and svg_height and summary['resolution'] not in (None, f"{svg_width}x{svg_height}"):
+            print(f"    Warning: CREATIONRESOLUTION {summary['resolution']} differs from the SVG ({svg_width}x{svg_height}) and is overwritten")
+        if summary['changes']:
+            print_layout_diff(summary['changes'])
+        if summary['tmp_path']:
+            try:
+                batch.adopt(summary['output_path'], summary['tmp_path'])
+            except OSError as e:
+                print(f"Error staging {summary['output_path']}: {e}; no WND files were written.")
+                batch.abort()
+                for rest in summaries[i + 1:]:
+                    if rest['tmp_path']:
+                        os.remove(rest['tmp_path'])
+                return summaries
+
+    if dry_run:
+        print("Dry run: no files written.")
+    else:
+        written = batch.commit()
+        print(f"Updated {len(written)} of {len(summaries)} WND files.")
+    return summaries
 
 def preprocess_wnd_if_needed(wnd_path):
     """
@@ -400,52 +964,57 @@ def preprocess_wnd_if_needed(wnd_path):
     if not os.path.exists(wnd_path):
         return wnd_path
 
-    with open(wnd_path, 'r') as f:
-        content = f.read()
-
-    # Fast detection
+    # Fast detection, stopping at the first hit
     # Look for NAME = "Something:" with nothing after the colon inside the quotes
     # Regex: NAME\s*=\s*"[^"]+:"
-    if not re.search(r'NAME\s*=\s*"[^"]+:"', content):
-        return wnd_path
+    with open(wnd_path, 'r') as f:
+        if not any(re.search(r'NAME\s*=\s*"[^"]+:"', line) for line in f):
+            return wnd_path
 
     print(f"Detected ambiguous window names in {wnd_path}. Pre-processing...")
 
-    new_lines = []
-    lines = content.splitlines()
-    
     # Counter for uniqueness
     # We'll stick to a simple global counter or per-file-prefix counter?
     # Simple global counter appended to the name is safest.
     # Format: "OriginalName:AutoLabel_1"
     
-    counter = 1
-    
-    for line in lines:
-        # Capture optional leading whitespace
-        match = re.search(r'^(\s*NAME\s*=\s*")([^"]+:)"', line)
-        if match:
-            # group 1: whitespace + NAME = "
-            # group 2: name content ending in :
-            prefix = match.group(1)
-            name_content = match.group(2)
-            
-            # Append label
-            new_line = f'{prefix}{name_content}AutoLabel_{counter}";'
-            new_lines.append(new_line)
-            counter += 1
-        else:
-            new_lines.append(line)
+    def labeled_lines(lines):
+        counter = 1
+        for line in lines:
+            line = line.rstrip('\n')
+            # Capture optional leading whitespace
+            match = re.search(r'^(\s*NAME\s*=\s*")([^"]+:)"', line)
+            if match:
+                # group 1: whitespace + NAME = "
+                # group 2: name content ending in :
+                prefix = match.group(1)
+                name_content = match.group(2)
+
+                # Append label
+                yield f'{prefix}{name_content}AutoLabel_{counter}";'
+                counter += 1
+            else:
+                yield line
             
     base_name = os.path.splitext(wnd_path)[0]
     new_path = f"{base_name}_labeled.wnd"
     
-    with open(new_path, 'w') as f:
-        f.write('\n'.join(new_lines))
+    # Rewritten line by line into a temp file and renamed, so a concurrent reader never sees half a file
+    with open(wnd_path, 'r') as src:
+        atomic_write(new_path, join_lines(labeled_lines(src)))
         
     print(f"Warning: Ambiguous window names found. Created pre-processed file: {new_path}")
     return new_path
 
+def lint_sources(sources):
+    """
+    Lints the WNDs before an update. sources maps output path -> source WND; returns a wnd_lint
+    baseline keyed by output, so --lint only fails on issues the update adds.
+    """
+    from wnd_lint import lint_file, issue_key
+    return {os.path.normpath(output): [issue_key(i) for i in lint_file(source)]
+            for output, source in sources.items() if os.path.exists(source)}
+
 def main():
     parser = argparse.ArgumentParser(description="Convert .wnd file to SVG.")
     parser.add_argument("wnd_file", help="Path to the .wnd file")
@@ -457,8 +1026,21 @@ def main():
     parser.add_argument("--updatenew", action="store_true", help="Update WND file from SVG and save as [basename]_NEW.wnd")
     parser.add_argument("--svg", help="SVG file to read updates from (required if --update)")
     parser.add_argument("--output", help="Output WND file (default: overwrite input)")
+    parser.add_argument("--diff", action="store_true", help="Print moved/resized/missing/extra windows before updating")
+    parser.add_argument("--dry-run", action="store_true", help="Print the layout diff only; never write the WND")
+    parser.add_argument("--resizer", help="ControlBarResizer.ini to overlay (generate) or write alt rects back to (update)")
+    parser.add_argument("--scales", nargs='+', type=float, help="Also write images at these Coords scales (e.g. 1 2 4) into <outdir>/<scale>x/")
+    parser.add_argument("--flat", action="store_true", help="Generate one flat list of window groups instead of nesting them like the CHILD tree")
+    parser.add_argument("--targets", nargs='+', help="More WND files or globs to apply the same SVG to (update mode); shared windows match by the name after '.wnd:'")
+    parser.add_argument("--jobs", type=int, help="Worker processes for --targets (default: CPU count)")
+    parser.add_argument("--snap", type=float, nargs='?', const=0.9, help="Align nearly equal edges (within this many pixels, default 0.9) and round instead of truncating (update mode)")
+    parser.add_argument("--grid", type=int, default=1, help="With --snap, round aligned edges to multiples of this many pixels")
+    parser.add_argument("--lint", action="store_true", help="After updating, check the written WNDs with wnd_lint (children outside parents, overlaps, off-screen rects); fails only on issues the update added")
     args = parser.parse_args()
     
+    if args.dry_run:
+        args.update = True
+
     if args.updatenew:
         args.update = True
         if not args.output:
@@ -472,12 +1054,37 @@ def main():
                 print("Error: --svg required for update mode.")
                 return
         
-        output = args.output if args.output else args.wnd_file
-        update_wnd_from_svg(args.wnd_file, args.svg, output)
+        if args.targets:
+            if args.output or args.resizer:
+                print("Error: --output and --resizer can't be combined with --targets.")
+                return
+            wnd_paths = [args.wnd_file]
+            for pattern in args.targets:
+                matches = [p for p in sorted(glob.glob(pattern)) if not is_generated_wnd(p)] if glob.has_magic(pattern) else [pattern]
+                wnd_paths.extend(p for p in matches if os.path.normpath(p) not in map(os.path.normpath, wnd_paths))
+            sources = {(os.path.splitext(p)[0] + "_NEW.wnd" if args.updatenew else p): p for p in wnd_paths}
+            lint_baseline = lint_sources(sources) if args.lint and not args.dry_run else None
+            summaries = update_wnds_from_svg(wnd_paths, args.svg, "_NEW" if args.updatenew else "", diff=args.diff, dry_run=args.dry_run, jobs=args.jobs,
+                                             snap=args.snap, grid=args.grid)
+            outputs = [s['output_path'] for s in summaries]
+        else:
+            output = args.output if args.output else args.wnd_file
+            lint_baseline = lint_sources({output: args.wnd_file}) if args.lint and not args.dry_run else None
+            update_wnd_from_svg(args.wnd_file, args.svg, output, diff=args.diff, dry_run=args.dry_run, resizer_path=args.resizer,
+                                snap=args.snap, grid=args.grid)
+            outputs = [output]
+
+        if args.lint and not args.dry_run:
+            from wnd_lint import lint_paths
+            outputs = [p for p in outputs if os.path.exists(p)]
+            issues = lint_paths(outputs, baseline=lint_baseline)
+            print(f"Lint: {issues} new issue(s) in {len(outputs)} file(s).")
+            if issues:
+                sys.exit(1)
     else:
         # Pre-process for generation only
         wnd_to_process = preprocess_wnd_if_needed(args.wnd_file)
-        parse_wnd_and_generate_svg(wnd_to_process, args.mapped_images_dir, args.textures_dir, args.outdir)
+        parse_wnd_and_generate_svg(wnd_to_process, args.mapped_images_dir, args.textures_dir, args.outdir, resizer_path=args.resizer, scales=args.scales, nested=not args.flat)
 
 if __name__ == "__main__":
     main()
@@ -1,18 +1,445 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
-import subprocess
+from tkinter import filedialog, messagebox, scrolledtext, ttk
 import sys
 import os
 import json
+import glob
+import queue
+import asyncio
+import itertools
 import threading
 
+from wnd_batch import STATUS_PREFIX
+from wnd_to_svg import (parse_wnd_tree, iter_window_tree, apply_svg_updates, crop_mapped_image,
+                        scan_mapped_images, scan_textures, is_generated_wnd, read_creation_resolution)
+from atomic_write import atomic_write
+from svg_colors import name_color
+
 CONFIG_FILE = "wnd_to_svg_gui_config.json"
 
+# Conversions running at the same time; further jobs wait in the queue
+MAX_CONCURRENT_JOBS = 2
+
+class JobRunner:
+    """
+    Runs command-line jobs on an asyncio loop in a background thread, at most max_jobs at a time.
+    Output is streamed line by line; every state change and output line is put on self.events
+    as (job, kind, payload) for the Tk thread to drain, since Tk widgets can't be touched from here.
+    Submitting a job with the key of one that is still queued replaces that job's command
+    instead of adding another one.
+    """
+
+    def __init__(self, max_jobs=MAX_CONCURRENT_JOBS):
+        self.max_jobs = max_jobs
+        self.events = queue.Queue()
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = None
+        self.lock = threading.Lock()
+        self.queued = {} # key -> job not started yet
+        self.active = {} # job id -> job (queued or running)
+        self.ids = itertools.count(1)
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def submit(self, label, args, cwd=None, key=None):
+        """Queues a job and returns it (a dict); returns the existing job when coalesced."""
+        with self.lock:
+            if key is not None and key in self.queued:
+                job = self.queued[key]
+                job['args'] = args
+                job['cwd'] = cwd
+                self.events.put((job, 'coalesced', None))
+                return job
+            job = {'id': next(self.ids), 'label': label, 'args': args, 'cwd': cwd, 'key': key, 'state': 'queued'}
+            if key is not None:
+                self.queued[key] = job
+            self.active[job['id']] = job
+        self.events.put((job, 'queued', None))
+        self.loop.call_soon_threadsafe(self.start, job)
+        return job
+
+    def start(self, job):
+        # Runs on the loop thread; submit and cancel_all are ordered through call_soon_threadsafe
+        job['task'] = self.loop.create_task(self.run(job))
+        job['task'].add_done_callback(lambda task: self.forget(job))
+
+    def forget(self, job):
+        """Drops a finished job; also covers jobs cancelled before their coroutine ever ran."""
+        with self.lock:
+            if self.queued.get(job['key']) is job:
+                del self.queued[job['key']]
+            self.active.pop(job['id'], None)
+            finished = job['state'] == 'done'
+            job['state'] = 'done'
+        if not finished:
+            self.events.put((job, 'cancelled', None))
+
+    def cancel_all(self):
+        """Cancels every queued and running job. Returns how many were cancelled."""
+        with self.lock:
+            count = len(self.active)
+        self.loop.call_soon_threadsafe(self.cancel_tasks)
+        return count
+
+    def cancel_tasks(self):
+        with self.lock:
+            jobs = list(self.active.values())
+        for job in jobs:
+            job['task'].cancel()
+
+    def counts(self):
+        """(running, queued) job counts."""
+        with self.lock:
+            running = sum(1 for job in self.active.values() if job['state'] == 'running')
+            return running, len(self.active) - running
+
+    async def run(self, job):
+        if self.semaphore is None:
+            # Created here so it belongs to the runner's loop
+            self.semaphore = asyncio.Semaphore(self.max_jobs)
+        process = None
+        try:
+            async with self.semaphore:
+                with self.lock:
+                    if self.queued.get(job['key']) is job:
+                        del self.queued[job['key']]
+                    job['state'] = 'running'
+                self.events.put((job, 'started', None))
+
+                # Unbuffered, so the scripts' prints arrive as they happen
+                env = dict(os.environ, PYTHONUNBUFFERED="1")
+                process = await asyncio.create_subprocess_exec(*job['args'], cwd=job['cwd'], env=env,
+                                                               stdout=asyncio.subprocess.PIPE,
+                                                               stderr=asyncio.subprocess.STDOUT)
+                async for line in process.stdout:
+                    self.events.put((job, 'output', line.decode(errors='replace').rstrip()))
+                code = await process.wait()
+                self.events.put((job, 'finished', code))
+        except asyncio.CancelledError:
+            if process is not None and process.returncode is None:
+                process.terminate()
+                await process.wait()
+            self.events.put((job, 'cancelled', None))
+        except Exception as e:
+            self.events.put((job, 'failed', e))
+        finally:
+            # CancelledError is handled above, so the task ends normally and forget() sees 'done'
+            with self.lock:
+                job['state'] = 'done'
+
+class LayoutEditor:
+    """
+    Canvas view of a WND's window tree for small moves without the Inkscape round-trip.
+    Windows are bucketed in a uniform grid (GRID_CELL creation pixels) that answers both which
+    windows are inside the viewport (only those get canvas items) and which window a click hits.
+    Dragging moves a window and its children with canvas.move, so Tk only repaints the damaged
+    area. Image crops are cut once and their scaled thumbnails cached per zoom level.
+    Save writes the moved SCREENRECTs through the WND updater (apply_svg_updates).
+    """
+    GRID_CELL = 64
+    # Extra creation pixels drawn around the viewport, so short scrolls don't pop in windows
+    VIEW_MARGIN = 64
+
+    def __init__(self, parent, wnd_path, output_path, resources):
+        self.wnd_path = wnd_path
+        self.output_path = output_path
+        self.mapped_images, self.texture_map, self.texture_cache = resources
+        self.crops = {} # image name -> PIL crop (or None)
+        self.photos = {} # (image name, width, height) -> PhotoImage
+        self.items = {} # window index -> canvas item ids
+        self.grid = {} # (cell x, cell y) -> set of window indices
+        self.moved = set()
+        self.selected = None
+        self.drag = None
+        self.refresh_pending = False
+
+        self.load()
+
+        self.top = tk.Toplevel(parent)
+        self.top.title(f"Layout: {os.path.basename(wnd_path)}")
+        self.top.geometry("1100x750")
+
+        toolbar = tk.Frame(self.top)
+        toolbar.pack(fill="x")
+        tk.Button(toolbar, text="Zoom In", command=lambda: self.set_zoom(self.zoom * 1.25)).pack(side="left", padx=2, pady=2)
+        tk.Button(toolbar, text="Zoom Out", command=lambda: self.set_zoom(self.zoom / 1.25)).pack(side="left", padx=2, pady=2)
+        tk.Button(toolbar, text="Fit", command=self.fit).pack(side="left", padx=2, pady=2)
+        tk.Button(toolbar, text="Save", command=self.save, bg="#dddddd").pack(side="right", padx=2, pady=2)
+        self.info = tk.Label(toolbar, text="", anchor="w")
+        self.info.pack(side="left", fill="x", expand=True, padx=10)
+
+        frame = tk.Frame(self.top)
+        frame.pack(fill="both", expand=True)
+        self.canvas = tk.Canvas(frame, bg="#202020", highlightthickness=0)
+        xscroll = tk.Scrollbar(frame, orient="horizontal", command=self.scroll_x)
+        yscroll = tk.Scrollbar(frame, orient="vertical", command=self.scroll_y)
+        self.canvas.config(xscrollcommand=xscroll.set, yscrollcommand=yscroll.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        yscroll.grid(row=0, column=1, sticky="ns")
+        xscroll.grid(row=1, column=0, sticky="ew")
+        frame.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_refresh())
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        for key, (dx, dy) in {"<Left>": (-1, 0), "<Right>": (1, 0), "<Up>": (0, -1), "<Down>": (0, 1)}.items():
+            self.top.bind(key, lambda e, dx=dx, dy=dy: self.nudge(dx, dy))
+
+        self.zoom = 1.0
+        self.top.update_idletasks()
+        self.fit()
+
+    def load(self):
+        """Parses the WND into a flat, draw-ordered window list and fills the grid."""
+        with open(self.wnd_path, 'r') as f:
+            self.lines = f.readlines()
+        self.resolution = read_creation_resolution(self.wnd_path) or (800, 600)
+
+        self.windows = []
+        index_of = {}
+        name_counts = {}
+        for window, depth, parent in iter_window_tree(parse_wnd_tree(self.lines)):
+            parent_index = index_of.get(id(parent)) if parent is not None else None
+            hidden = 'HIDDEN' in window['status'].split('+') or (parent_index is not None and self.windows[parent_index]['hidden'])
+            images = window['images']
+            entry = {'name': window['name'], 'rect': [window['x'], window['y'], window['width'], window['height']],
+                     'parent': parent_index, 'children': [], 'hidden': hidden, 'image': images[0] if images else None}
+            index_of[id(window)] = len(self.windows)
+            if parent_index is not None:
+                self.windows[parent_index]['children'].append(len(self.windows))
+            self.windows.append(entry)
+            if window['name']:
+                name_counts[window['name']] = name_counts.get(window['name'], 0) + 1
+
+        # The updater matches windows by NAME, so unnamed or repeated names can't be saved reliably
+        for entry in self.windows:
+            name = entry['name']
+            entry['movable'] = bool(name) and not name.endswith(':') and name_counts.get(name) == 1
+
+        for i in range(len(self.windows)):
+            self.grid_insert(i)
+
+    def cells(self, x1, y1, x2, y2):
+        cell = self.GRID_CELL
+        for cx in range(int(x1) // cell, int(max(x2, x1 + 1) - 1) // cell + 1):
+            for cy in range(int(y1) // cell, int(max(y2, y1 + 1) - 1) // cell + 1):
+                yield cx, cy
+
+    def grid_insert(self, i):
+        x, y, w, h = self.windows[i]['rect']
+        for key in self.cells(x, y, x + w, y + h):
+            self.grid.setdefault(key, set()).add(i)
+
+    def grid_remove(self, i):
+        x, y, w, h = self.windows[i]['rect']
+        for key in self.cells(x, y, x + w, y + h):
+            bucket = self.grid.get(key)
+            if bucket:
+                bucket.discard(i)
+
+    def grid_query(self, x1, y1, x2, y2):
+        found = set()
+        for key in self.cells(x1, y1, x2, y2):
+            found |= self.grid.get(key, set())
+        return {i for i in found if self.intersects(i, x1, y1, x2, y2)}
+
+    def intersects(self, i, x1, y1, x2, y2):
+        x, y, w, h = self.windows[i]['rect']
+        return x < x2 and x + max(w, 1) > x1 and y < y2 and y + max(h, 1) > y1
+
+    def subtree(self, i):
+        result = [i]
+        for child in self.windows[i]['children']:
+            result.extend(self.subtree(child))
+        return result
+
+    def thumbnail(self, i, width, height):
+        """Cached PhotoImage of window i's first image at width x height, or None."""
+        from PIL import ImageTk
+
+        name = self.windows[i]['image']
+        if not name or name not in self.mapped_images or width < 1 or height < 1:
+            return None
+        key = (name, width, height)
+        if key not in self.photos:
+            if name not in self.crops:
+                self.crops[name] = crop_mapped_image(self.mapped_images[name], self.texture_map, self.texture_cache)
+            crop = self.crops[name]
+            self.photos[key] = ImageTk.PhotoImage(crop.resize((width, height))) if crop is not None else None
+        return self.photos[key]
+
+    def set_zoom(self, zoom):
+        self.zoom = min(max(zoom, 0.05), 8.0)
+        # Everything is redrawn at the new scale; thumbnails of other zoom levels are dropped
+        self.canvas.delete("win")
+        self.items = {}
+        self.photos = {}
+        self.canvas.config(scrollregion=(0, 0, self.resolution[0] * self.zoom, self.resolution[1] * self.zoom))
+        self.refresh()
+
+    def fit(self):
+        width = max(self.canvas.winfo_width(), 100)
+        height = max(self.canvas.winfo_height(), 100)
+        self.set_zoom(min(width / self.resolution[0], height / self.resolution[1]))
+
+    def scroll_x(self, *args):
+        self.canvas.xview(*args)
+        self.schedule_refresh()
+
+    def scroll_y(self, *args):
+        self.canvas.yview(*args)
+        self.schedule_refresh()
+
+    def on_wheel(self, event):
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def refresh(self):
+        """Viewport culling: creates items for windows that scrolled in and deletes the ones that left."""
+        self.refresh_pending = False
+        z = self.zoom
+        margin = self.VIEW_MARGIN
+        x1 = self.canvas.canvasx(0) / z - margin
+        y1 = self.canvas.canvasy(0) / z - margin
+        x2 = self.canvas.canvasx(self.canvas.winfo_width()) / z + margin
+        y2 = self.canvas.canvasy(self.canvas.winfo_height()) / z + margin
+        visible = self.grid_query(x1, y1, x2, y2)
+        if self.drag:
+            # Windows being dragged are out of the grid until released
+            visible.update(self.drag['indices'])
+
+        for i in set(self.items) - visible:
+            self.canvas.delete(f"w{i}")
+            del self.items[i]
+        added = visible - set(self.items)
+        for i in added:
+            self.draw_window(i)
+        if added:
+            # New items land on top; restore the CHILD draw order
+            for i in sorted(self.items):
+                self.canvas.tag_raise(f"w{i}")
+
+    def draw_window(self, i):
+        entry = self.windows[i]
+        x, y, w, h = entry['rect']
+        z = self.zoom
+        tags = ("win", f"w{i}")
+        ids = []
+        if not entry['hidden']:
+            photo = self.thumbnail(i, round(w * z), round(h * z))
+            if photo is not None:
+                ids.append(self.canvas.create_image(x * z, y * z, image=photo, anchor="nw", tags=tags))
+        color = "#{:02x}{:02x}{:02x}".format(*name_color(entry['name'] or str(i)))
+        outline_width = 3 if i == self.selected else 1
+        ids.append(self.canvas.create_rectangle(x * z, y * z, (x + w) * z, (y + h) * z, outline=color, width=outline_width,
+                                                dash=(3, 3) if entry['hidden'] else None, tags=tags + ("outline",)))
+        self.items[i] = ids
+
+    def hit_test(self, px, py):
+        """Topmost (last drawn) window under the creation-space point, or None."""
+        hits = self.grid_query(px, py, px + 1, py + 1)
+        hits = [i for i in hits if not self.windows[i]['hidden']] or list(hits)
+        return max(hits) if hits else None
+
+    def select(self, i):
+        for index in (self.selected, i):
+            if index is not None and index in self.items:
+                self.canvas.itemconfig(self.items[index][-1], width=3 if index == i else 1)
+        self.selected = i
+        self.show_info()
+
+    def show_info(self):
+        if self.selected is None:
+            self.info.config(text=f"{len(self.moved)} window(s) moved")
+            return
+        entry = self.windows[self.selected]
+        x, y, w, h = entry['rect']
+        note = "" if entry['movable'] else "  (unnamed or ambiguous name: can't be moved)"
+        self.info.config(text=f"{entry['name']}  ({x}, {y}, {w}x{h})  {len(self.moved)} moved{note}")
+
+    def on_press(self, event):
+        self.top.focus_set()
+        z = self.zoom
+        i = self.hit_test(self.canvas.canvasx(event.x) / z, self.canvas.canvasy(event.y) / z)
+        self.select(i)
+        if i is None or not all(self.windows[j]['movable'] for j in self.subtree(i)):
+            return
+        indices = self.subtree(i)
+        for j in indices:
+            self.grid_remove(j)
+        self.drag = {'indices': indices, 'start': (event.x, event.y), 'offset': (0, 0)}
+
+    def on_drag(self, event):
+        if not self.drag:
+            return
+        z = self.zoom
+        dx = round((event.x - self.drag['start'][0]) / z)
+        dy = round((event.y - self.drag['start'][1]) / z)
+        self.move_by(self.drag['indices'], dx - self.drag['offset'][0], dy - self.drag['offset'][1])
+        self.drag['offset'] = (dx, dy)
+
+    def on_release(self, event):
+        if not self.drag:
+            return
+        for j in self.drag['indices']:
+            self.grid_insert(j)
+        self.drag = None
+        self.refresh()
+
+    def nudge(self, dx, dy):
+        if self.selected is None or self.drag:
+            return
+        indices = self.subtree(self.selected)
+        if not all(self.windows[j]['movable'] for j in indices):
+            return
+        for j in indices:
+            self.grid_remove(j)
+        self.move_by(indices, dx, dy)
+        for j in indices:
+            self.grid_insert(j)
+        self.refresh()
+
+    def move_by(self, indices, dx, dy):
+        """Moves windows by whole creation pixels; canvas.move only repaints the damaged region."""
+        if not dx and not dy:
+            return
+        for j in indices:
+            rect = self.windows[j]['rect']
+            rect[0] += dx
+            rect[1] += dy
+            self.moved.add(j)
+            if j in self.items:
+                self.canvas.move(f"w{j}", dx * self.zoom, dy * self.zoom)
+        self.show_info()
+
+    def save(self):
+        if not self.moved:
+            self.info.config(text="No changes to save.")
+            return
+        updates = {}
+        for j in self.moved:
+            x, y, w, h = self.windows[j]['rect']
+            updates[self.windows[j]['name']] = {'x': x, 'y': y, 'w': w, 'h': h}
+        # No SVG size: CREATIONRESOLUTION stays as it is
+        new_lines = apply_svg_updates(self.lines, updates, None, None)
+        atomic_write(self.output_path, "".join(new_lines))
+        # Later saves build on this one, also when the output isn't the source WND
+        self.lines = new_lines
+        self.info.config(text=f"Saved {len(updates)} window(s) to {self.output_path}")
+        self.moved = set()
+
 class WndToSvgApp:
     def __init__(self, root):
         self.root = root
         self.root.title("WND to SVG Converter GUI")
-        self.root.geometry("600x750")
+        self.root.geometry("700x1000")
 
         # Variables
         self.wnd_file_var = tk.StringVar()
@@ -24,12 +451,19 @@ class WndToSvgApp:
         self.output_wnd_var = tk.StringVar()
         self.update_new_var = tk.BooleanVar(value=False)
 
+        self.batch_files = []
+        self.batch_glob_var = tk.StringVar(value="**/*.wnd")
+
         # Load config
         self.load_config()
 
         # UI Setup
         self.create_widgets()
 
+        self.jobs = JobRunner()
+        self.resources = None # (dirs, (mapped_images, texture_map, texture_cache)) for the layout editor
+        self.poll_jobs()
+
     def create_widgets(self):
         # 1. Inputs Section
         input_frame = tk.LabelFrame(self.root, text="Configuration", padx=10, pady=10)
@@ -78,8 +512,49 @@ class WndToSvgApp:
 
         tk.Button(btn_frame, text="Generate SVG", command=self.generate_svg, bg="#dddddd", height=2).pack(side="left", expand=True, fill="x", padx=5)
         tk.Button(btn_frame, text="Update WND", command=self.update_wnd, bg="#dddddd", height=2).pack(side="left", expand=True, fill="x", padx=5)
-
-        # 4. Console Output
+        tk.Button(btn_frame, text="Edit Layout", command=self.open_layout_editor, bg="#dddddd", height=2).pack(side="left", expand=True, fill="x", padx=5)
+        tk.Button(btn_frame, text="Cancel", command=self.cancel_jobs, height=2).pack(side="left", padx=5)
+
+        # 4. Batch: many WNDs in one worker run
+        batch_frame = tk.LabelFrame(self.root, text="Batch", padx=10, pady=5)
+        batch_frame.pack(fill="x", padx=10, pady=5)
+
+        list_frame = tk.Frame(batch_frame)
+        list_frame.grid(row=0, column=0, rowspan=4, sticky="nsew")
+        self.batch_list = tk.Listbox(list_frame, selectmode=tk.EXTENDED, height=6, width=60)
+        list_scroll = tk.Scrollbar(list_frame, command=self.batch_list.yview)
+        self.batch_list.config(yscrollcommand=list_scroll.set)
+        self.batch_list.pack(side="left", fill="both", expand=True)
+        list_scroll.pack(side="left", fill="y")
+        for path in self.batch_files:
+            self.batch_list.insert(tk.END, path)
+        batch_frame.columnconfigure(0, weight=1)
+
+        tk.Button(batch_frame, text="Add Files", command=self.batch_add_files).grid(row=0, column=1, sticky="ew", padx=5)
+        tk.Button(batch_frame, text="Add Folder", command=self.batch_add_folder).grid(row=1, column=1, sticky="ew", padx=5)
+        tk.Button(batch_frame, text="Remove", command=self.batch_remove).grid(row=2, column=1, sticky="ew", padx=5)
+        tk.Button(batch_frame, text="Clear", command=self.batch_clear).grid(row=3, column=1, sticky="ew", padx=5)
+
+        tk.Label(batch_frame, text="Folder filter:").grid(row=4, column=0, sticky="w", pady=(5, 0))
+        tk.Entry(batch_frame, textvariable=self.batch_glob_var, width=20).grid(row=4, column=0, sticky="e", pady=(5, 0))
+
+        batch_btn_frame = tk.Frame(batch_frame)
+        batch_btn_frame.grid(row=5, column=0, columnspan=2, sticky="ew", pady=5)
+        tk.Button(batch_btn_frame, text="Generate Batch", command=lambda: self.run_batch("generate"), bg="#dddddd").pack(side="left", expand=True, fill="x", padx=5)
+        tk.Button(batch_btn_frame, text="Update Batch", command=lambda: self.run_batch("update"), bg="#dddddd").pack(side="left", expand=True, fill="x", padx=5)
+
+        # Per-file results of the last batch run
+        columns = ("status", "time", "windows", "images")
+        self.batch_table = ttk.Treeview(batch_frame, columns=columns, height=6)
+        self.batch_table.heading("#0", text="File")
+        self.batch_table.column("#0", width=300)
+        for column in columns:
+            self.batch_table.heading(column, text=column.capitalize())
+            self.batch_table.column(column, width=80, anchor="e" if column != "status" else "w")
+        self.batch_table.grid(row=6, column=0, columnspan=2, sticky="ew")
+        self.batch_rows = {} # file -> table item
+
+        # 5. Console Output
         tk.Label(self.root, text="Output Log:").pack(anchor="w", padx=10)
         self.console = scrolledtext.ScrolledText(self.root, height=15)
         self.console.pack(fill="both", expand=True, padx=10, pady=5)
@@ -166,6 +641,9 @@ class WndToSvgApp:
                     self.svg_file_var.set(data.get("svg_file", ""))
                     self.output_wnd_var.set(data.get("output_wnd", ""))
                     self.update_new_var.set(data.get("update_new", False))
+                    self.batch_files = [p for p in data.get("batch_files", []) if isinstance(p, str)]
+                    if "batch_glob" in data:
+                        self.batch_glob_var.set(data["batch_glob"])
             except Exception as e:
                 print(f"Error loading config: {e}")
 
@@ -177,7 +655,9 @@ class WndToSvgApp:
             "output_dir": self.output_dir_var.get(),
             "svg_file": self.svg_file_var.get(),
             "output_wnd": self.output_wnd_var.get(),
-            "update_new": self.update_new_var.get()
+            "update_new": self.update_new_var.get(),
+            "batch_files": self.batch_files,
+            "batch_glob": self.batch_glob_var.get()
         }
         try:
             with open(CONFIG_FILE, 'w') as f:
@@ -189,38 +669,143 @@ class WndToSvgApp:
         self.console.insert(tk.END, message + "\n")
         self.console.see(tk.END)
 
-    def run_command(self, args, cwd=None):
-        self.status.config(text="Running...")
-        self.console.delete(1.0, tk.END)
-        self.log(f"Executing: {' '.join(args)}")
-        
+    def run_command(self, args, cwd=None, label="Job", key=None):
+        """Queues args on the job runner; output streams into the log as it is printed."""
         target_cwd = cwd if cwd else os.getcwd()
-        self.log(f"Working Directory: {target_cwd}")
-        
-        def task():
+        job = self.jobs.submit(label, args, target_cwd, key)
+        self.log(f"[{job['label']}] Executing: {' '.join(args)}")
+        self.log(f"[{job['label']}] Working Directory: {target_cwd}")
+
+    def cancel_jobs(self):
+        cancelled = self.jobs.cancel_all()
+        self.log(f"Cancelling {cancelled} job(s)." if cancelled else "No jobs to cancel.")
+
+    def poll_jobs(self):
+        """Drains the job runner's events into the log and status bar, then reschedules itself."""
+        try:
+            while True:
+                job, kind, payload = self.jobs.events.get_nowait()
+                self.handle_job_event(job, kind, payload)
+        except queue.Empty:
+            pass
+        running, queued = self.jobs.counts()
+        if running or queued:
+            self.status.config(text=f"Running {running} job(s), {queued} queued")
+        self.root.after(50, self.poll_jobs)
+
+    def handle_job_event(self, job, kind, payload):
+        prefix = f"[{job['label']}]"
+        if kind == 'output' and STATUS_PREFIX in payload:
+            # wnd_batch result lines go to the status table instead of the log
             try:
-                # Use sys.executable to ensure we use the same python interpreter
-                process = subprocess.Popen(
-                    args, 
-                    stdout=subprocess.PIPE, 
-                    stderr=subprocess.PIPE, 
-                    text=True,
-                    cwd=target_cwd
-                )
-                
-                stdout, stderr = process.communicate()
-                
-                self.root.after(0, lambda: self.log(stdout))
-                if stderr:
-                    self.root.after(0, lambda: self.log(f"Errors:\n{stderr}"))
-                
-                self.root.after(0, lambda: self.status.config(text="Done"))
-                
-            except Exception as e:
-                self.root.after(0, lambda: self.log(f"Exception: {e}"))
-                self.root.after(0, lambda: self.status.config(text="Error"))
+                record = json.loads(payload[payload.index(STATUS_PREFIX) + len(STATUS_PREFIX):])
+            except ValueError:
+                self.log(f"{prefix} {payload}")
+            else:
+                self.update_batch_row(record)
+        elif kind == 'output':
+            self.log(f"{prefix} {payload}")
+        elif kind == 'coalesced':
+            self.log(f"{prefix} Already queued; the queued run will use the latest settings.")
+        elif kind == 'started':
+            self.log(f"{prefix} Started.")
+        elif kind == 'finished':
+            self.log(f"{prefix} Done." if payload == 0 else f"{prefix} Exited with code {payload}.")
+            self.status.config(text="Done" if payload == 0 else "Error")
+        elif kind == 'cancelled':
+            self.log(f"{prefix} Cancelled.")
+            self.status.config(text="Cancelled")
+        elif kind == 'failed':
+            self.log(f"{prefix} Exception: {payload}")
+            self.status.config(text="Error")
+
+    def batch_add(self, paths):
+        for path in paths:
+            path = os.path.normpath(path)
+            if path not in self.batch_files:
+                self.batch_files.append(path)
+                self.batch_list.insert(tk.END, path)
+        self.save_config()
+
+    def batch_add_files(self):
+        filenames = filedialog.askopenfilenames(initialdir=os.getcwd(), filetypes=[("WND Files", "*.wnd"), ("All Files", "*.*")])
+        self.batch_add(filenames)
+
+    def batch_add_folder(self):
+        dirname = filedialog.askdirectory()
+        if not dirname:
+            return
+        pattern = self.batch_glob_var.get() or "*.wnd"
+        matches = sorted(glob.glob(os.path.join(dirname, pattern), recursive=True))
+        matches = [p for p in matches if os.path.isfile(p) and p.lower().endswith(".wnd") and not is_generated_wnd(p)]
+        if not matches:
+            messagebox.showinfo("Batch", f"No WND files match {pattern} in {dirname}.")
+            return
+        self.batch_add(matches)
+
+    def batch_remove(self):
+        for index in reversed(self.batch_list.curselection()):
+            self.batch_list.delete(index)
+            del self.batch_files[index]
+        self.save_config()
+
+    def batch_clear(self):
+        self.batch_list.delete(0, tk.END)
+        self.batch_files = []
+        self.save_config()
+
+    def run_batch(self, mode):
+        """Sends the selected files (all listed files if none are selected) to one wnd_batch run."""
+        selection = self.batch_list.curselection()
+        files = [self.batch_files[i] for i in selection] if selection else list(self.batch_files)
+        if not files:
+            messagebox.showerror("Error", "Add WND files to the batch list first.")
+            return
+
+        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wnd_batch.py")
+        cmd = [sys.executable, script_path, mode] + files
+        if mode == "generate":
+            cmd.extend(["--mapped_images_dir", self.mapped_images_var.get(),
+                        "--textures_dir", self.textures_dir_var.get(),
+                        "--outdir", self.output_dir_var.get()])
+        elif self.update_new_var.get():
+            cmd.append("--updatenew")
 
-        threading.Thread(target=task, daemon=True).start()
+        self.batch_table.delete(*self.batch_table.get_children())
+        self.batch_rows = {}
+        self.run_command(cmd, label=f"Batch {mode} ({len(files)} files)", key=('batch', mode))
+
+    def update_batch_row(self, record):
+        path = record['file']
+        seconds = f"{record['seconds']:.2f}s" if record.get('seconds') is not None else ""
+        status = record['status'] if not record.get('message') else f"{record['status']}: {record['message']}"
+        values = (status, seconds, "" if record.get('windows') is None else record['windows'],
+                  "" if record.get('images') is None else record['images'])
+        if path in self.batch_rows:
+            self.batch_table.item(self.batch_rows[path], values=values)
+        else:
+            self.batch_rows[path] = self.batch_table.insert("", tk.END, text=os.path.basename(path), values=values)
+
+    def editor_resources(self):
+        """MappedImages, textures and texture cache, scanned once per pair of directories."""
+        dirs = (self.mapped_images_var.get(), self.textures_dir_var.get())
+        if self.resources is None or self.resources[0] != dirs:
+            self.resources = (dirs, (scan_mapped_images(dirs[0]), scan_textures(dirs[1]), {}))
+        return self.resources[1]
+
+    def open_layout_editor(self):
+        wnd = self.wnd_file_var.get()
+        if not wnd or not os.path.isfile(wnd):
+            messagebox.showerror("Error", "Please select a WND file.")
+            return
+        # Saves go where Update WND would write
+        output = self.output_wnd_var.get()
+        if not output:
+            output = os.path.splitext(wnd)[0] + "_NEW.wnd" if self.update_new_var.get() else wnd
+        self.status.config(text="Loading layout...")
+        self.root.update_idletasks()
+        LayoutEditor(self.root, wnd, output, self.editor_resources())
+        self.status.config(text="Ready")
 
     def generate_svg(self):
         wnd = self.wnd_file_var.get()
@@ -250,7 +835,8 @@ class WndToSvgApp:
         elif wnd and os.path.exists(os.path.dirname(wnd)):
              cwd = os.path.dirname(wnd)
              
-        self.run_command(cmd, cwd=cwd)
+        # Repeated clicks for the same file while it waits in the queue collapse into one run
+        self.run_command(cmd, cwd=cwd, label=f"Generate {os.path.basename(wnd)}", key=('generate', os.path.normcase(os.path.abspath(wnd))))
 
     def update_wnd(self):
         wnd = self.wnd_file_var.get()
@@ -277,7 +863,7 @@ class WndToSvgApp:
         if output:
             cmd.extend(["--output", output])
             
-        self.run_command(cmd)
+        self.run_command(cmd, label=f"Update {os.path.basename(wnd)}")
 
 if __name__ == "__main__":
     root = tk.Tk()